@@ -1,6 +1,6 @@
-from .threading import QWorker
+from .threading import QWorker, Cancelled, CancellationToken
 from .configuration import config
 from .context import context as ctx
 from .version import Version
 
-__all__ = [QWorker, config, ctx, Version]
+__all__ = [QWorker, Cancelled, CancellationToken, config, ctx, Version]
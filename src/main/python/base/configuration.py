@@ -120,9 +120,20 @@ class Configuration:
         self.gridImageUpdateWidth = 25
         self.gridImageMargin = 2
 
+        # Width (pixels) and JPEG quality of the thumbnails the
+        # image grids are drawn from, when they have been made
+        self.thumbnailWidth = 1600
+        self.thumbnailQuality = 85
+        self.thumbnailFolderName = ".thumbnails"
+
         # Button sizes
         self.toolbuttonSize = (20, 20)
 
+        # Milliseconds to wait for file changes to settle before
+        # re-reading the count totals or updating the library layout
+        self.totalsWatchDelay = 500
+        self.libraryWatchDelay = 200
+
     def getNatoAtPosition(self, pos: int) -> str:
         """Returns the NATO word at a given position.
         If necessary, concatenates AlfaAlfa, AlfaBravo, etc.
@@ -154,6 +165,12 @@ class Configuration:
     def _versionFile(self):
         return self._imageWaoMetaFolder() / "version.txt"
 
+    def libraryManifestFile(self):
+        return self._imageWaoMetaFolder() / "manifest.json"
+
+    def imageMetadataFile(self):
+        return self._imageWaoMetaFolder() / "images.sqlite"
+
     def projectVersion(self) -> Version:
         """Gets the project version as defined in the library folder"""
 
@@ -191,6 +208,12 @@ class Configuration:
     def flightDistributionFile(self, flightFolder):
         return self.flightDataFolder(flightFolder) / "distribution.json"
 
+    def flightImagesFile(self, flightFolder):
+        return self.flightDataFolder(flightFolder) / "images.csv"
+
+    def flightFingerprintsFile(self, flightFolder):
+        return self.flightDataFolder(flightFolder) / "fingerprints.json"
+
     # Marked folder (within transect)
 
     def markedFolder(self, transectFolder):
@@ -202,6 +225,9 @@ class Configuration:
     def transectMigrationLog(self, transectFolder):
         return self.markedFolder(transectFolder) / "migration.log"
 
+    def thumbnailFolder(self, transectFolder):
+        return self.markedFolder(transectFolder) / self.thumbnailFolderName
+
     @property
     def username(self):
         settings = QtCore.QSettings()
@@ -254,5 +280,64 @@ class Configuration:
         settings = QtCore.QSettings()
         settings.setValue("import/minPhotosPerTransect", value)
 
+    @property
+    def createThumbnails(self) -> bool:
+        """
+        Whether thumbnails of the images are made while they are
+        imported, so the image grids open without decoding the
+        full resolution images.
+        """
+        settings = QtCore.QSettings()
+        return settings.value("import/createThumbnails", True, type=bool)
+
+    @createThumbnails.setter
+    def createThumbnails(self, value):
+        settings = QtCore.QSettings()
+        settings.setValue("import/createThumbnails", value)
+
+    @property
+    def renderMarkedImages(self) -> bool:
+        """
+        Whether marked up copies of the images are rendered to the
+        .marked/ folder every time the drawings are saved.
+        If `False`, only the drawings are saved and the marked images
+        can be rendered later on request.
+        """
+        settings = QtCore.QSettings()
+        return settings.value("save/renderMarkedImages", True, type=bool)
+
+    @renderMarkedImages.setter
+    def renderMarkedImages(self, value):
+        settings = QtCore.QSettings()
+        settings.setValue("save/renderMarkedImages", value)
+
+    @property
+    def lightweightLibrary(self) -> bool:
+        """
+        Whether the library is browsed from the library manifest,
+        rather than watching the file system. Takes effect on restart.
+        """
+        settings = QtCore.QSettings()
+        return settings.value("library/lightweightModel", False, type=bool)
+
+    @lightweightLibrary.setter
+    def lightweightLibrary(self, value):
+        settings = QtCore.QSettings()
+        settings.setValue("library/lightweightModel", value)
+
+    @property
+    def markedImageQuality(self) -> int:
+        """
+        JPEG quality (0-100) of the marked images.
+        -1 uses the default quality of the image writer.
+        """
+        settings = QtCore.QSettings()
+        return int(settings.value("save/markedImageQuality", -1))
+
+    @markedImageQuality.setter
+    def markedImageQuality(self, value):
+        settings = QtCore.QSettings()
+        settings.setValue("save/markedImageQuality", value)
+
 
 config = Configuration()
@@ -1,4 +1,5 @@
 import sys
+import threading
 import traceback
 from enum import Enum
 from multiprocessing import Process, Queue
@@ -21,6 +22,10 @@ class WorkerSignals(QtCore.QObject):
         `object` data returned from processing, anything
     progress
         `int` indicating % progress
+    partialResult
+        `object` part of the result, available before processing finishes
+    cancelled
+        No data. Emitted instead of result/success if the worker was cancelled
     """
 
     finished = QtCore.Signal()
@@ -28,6 +33,35 @@ class WorkerSignals(QtCore.QObject):
     error = QtCore.Signal(tuple)
     result = QtCore.Signal(object)
     progress = QtCore.Signal(int)
+    partialResult = QtCore.Signal(object)
+    cancelled = QtCore.Signal()
+
+
+class Cancelled(Exception):
+    """ Raised by a worker's function to stop because it was cancelled """
+
+
+class CancellationToken:
+    """
+    Tells a running function that it should stop. Cancellation is cooperative:
+    the function checks the token every so often (see `raiseIfCancelled`)
+    and stops as soon as it can leave things in a consistent state.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raiseIfCancelled(self):
+        """ Raises `Cancelled` if the token was cancelled """
+        if self._event.is_set():
+            raise Cancelled()
 
 
 class QWorker(QtCore.QRunnable):
@@ -53,6 +87,7 @@ class QWorker(QtCore.QRunnable):
         self.args = args
         self.kwargs = dict()
         self.signals = WorkerSignals()
+        self.cancellation = None
 
     def includeProgress(self):
         """
@@ -61,6 +96,29 @@ class QWorker(QtCore.QRunnable):
         """
         self.kwargs.update(progress=self.signals.progress)
 
+    def includePartialResults(self):
+        """
+        The partialResult signal will be passed to the `fn`
+        as a keyword argument.
+        """
+        self.kwargs.update(partialResult=self.signals.partialResult)
+
+    def includeCancellation(self):
+        """
+        A `CancellationToken` will be passed to the `fn` as the
+        `cancellation` keyword argument, so it can be stopped with `cancel`.
+        """
+        self.cancellation = CancellationToken()
+        self.kwargs.update(cancellation=self.cancellation)
+
+    def cancel(self):
+        """
+        Asks the `fn` to stop, if the worker includes cancellation.
+        The cancelled signal is emitted once it has stopped.
+        """
+        if self.cancellation is not None:
+            self.cancellation.cancel()
+
     @QtCore.Slot()
     def run(self):
         """
@@ -69,6 +127,8 @@ class QWorker(QtCore.QRunnable):
 
         try:
             result = self.fn(*self.args, **self.kwargs)
+        except Cancelled:
+            self.signals.cancelled.emit()
         except:  # noqa
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
@@ -4,6 +4,9 @@ This file provides a class for handling, serializing, reading, and writing anima
 
 
 class CountData:
+
+    __slots__ = ("species", "number", "isDuplicate", "notes")
+
     def __init__(
         self,
         species: str = "",
@@ -3,7 +3,30 @@ from PySide2 import QtCore, QtGui
 from countdata import CountData
 
 
+# Pens are shared between all drawings with the same color and width.
+# Transects can hold tens of thousands of drawings but only use a handful
+# of pens, so there is no need for each drawing to own one.
+_pens = {}
+
+
+def internPen(color: str, width: int) -> QtGui.QPen:
+    """
+    Returns the shared pen of the given color and width.
+    The returned pen must not be modified.
+    """
+    key = (color, width)
+    try:
+        return _pens[key]
+    except KeyError:
+        pen = QtGui.QPen(QtGui.QColor(color))
+        pen.setWidth(width)
+        return _pens.setdefault(key, pen)
+
+
 class DrawingData:
+
+    __slots__ = ("name", "geom", "pen", "countData")
+
     def __init__(self, name: str, geom, pen: QtGui.QPen, countData=CountData()):
         """
         Minimum objects required to re-create an item
@@ -12,6 +35,8 @@ class DrawingData:
         Need name of item (Rect, Ellipse, Line)
         Need geometry of item (QRectF, QLine),
         and the pen used to draw the item.
+        The pen should be interned (see `internPen`) so it is
+        shared with every other drawing of the same color and width.
 
         The count data is also included.
         """
@@ -88,8 +113,7 @@ class DrawingData:
         countData = d["CountData"]
 
         # Setup pen
-        pen = QtGui.QPen(penColor)  # Does this color need to be a QColor?
-        pen.setWidth(penWidth)
+        pen = internPen(penColor, penWidth)
 
         if name == "Rect":
             geom = QtCore.QRectF(*args)
@@ -129,4 +153,4 @@ class DrawingData:
             self.geom.setP1(QtCore.QPointF(x1, y1))
             self.geom.setP2(QtCore.QPointF(x2, y2))
 
-        self.pen.setWidth(self.pen.width() * sf)
+        self.pen = internPen(self.penColor, int(self.pen.width() * sf))
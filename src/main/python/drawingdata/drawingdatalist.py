@@ -5,7 +5,7 @@ from PySide2 import QtWidgets, QtGui
 
 import scenegraphics as sg
 
-from .drawingdata import DrawingData
+from .drawingdata import DrawingData, internPen
 
 
 class DrawingDataList:
@@ -76,7 +76,8 @@ class DrawingDataList:
             # All graphics items have associated pens
             # All graphics items derived from the counts mixin have count data
             if isinstance(item, sg.SceneCountsItemMixin):
-                pen = item.pen()
+                itemPen = item.pen()
+                pen = internPen(itemPen.color().name(), itemPen.width())
                 countData = item.countData()
             else:
                 raise TypeError(f"Unable to serialize item type: {type(item)}")
@@ -163,12 +164,19 @@ class DrawingDataList:
 
         Optionally include a scaling factor if
         you are painting to a different size than what
-        the drawing was originally drawn on.
+        the drawing was originally drawn on. The scaling is
+        applied by the painter, the drawings are not modified.
         """
         painter = QtGui.QPainter(device)
+        if sf != 1:
+            painter.scale(sf, sf)
+
+        # Pens are shared between drawings, only switch when necessary
+        pen = None
         for drawing in self._drawingData:
-            drawing.scale(sf)
-            painter.setPen(drawing.pen)
+            if drawing.pen is not pen:
+                pen = drawing.pen
+                painter.setPen(pen)
             if drawing.name == "Rect":
                 painter.drawRect(drawing.geom)
             elif drawing.name == "Ellipse":
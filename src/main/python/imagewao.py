@@ -2,8 +2,9 @@ from pathlib import Path
 
 from PySide2 import QtGui, QtCore, QtWidgets
 
-from base import ctx
+from base import ctx, QWorker
 from migrator import Migrator
+from tools import exportMarkedImages, transectFoldersIn
 from ui import (
     DockWidget,
     TitleBarText,
@@ -40,6 +41,9 @@ class QImageWAO(QtWidgets.QMainWindow):
         # Whether or not the application has changes
         self._dirty = False
 
+        # Long running job that is not tied to a widget
+        self._exportWorker = None
+
         # Window icon
         self.setWindowIcon(ctx.icon("icons/winIcon.png"))
 
@@ -128,6 +132,7 @@ class QImageWAO(QtWidgets.QMainWindow):
         self.library.showFlightInfoRequested.connect(self._showFlightInfoDock)
         self.library.showMigrationLogRequested.connect(self._showMigrationLogDock)
         self.library.showDistributionFormRequested.connect(self._showDistributionDock)
+        self.library.exportMarkedImagesRequested.connect(self._exportMarkedImages)
 
         # Image grid signal connections
         self.imageGridView.loadProgress.connect(self.loadingOverlay.setProgress)
@@ -137,6 +142,7 @@ class QImageWAO(QtWidgets.QMainWindow):
         self.imageGridView.notificationMessage.connect(self.notifier.notify)
         self.imageGridView.statusMessage.connect(self.showStatusMessage)
         self.imageGridView.countDataChanged.connect(self.countTotals.setTransectData)
+        self.imageGridView.countDataSaved.connect(self.countTotals.recordSave)
 
         # Image viewer signal connections
         self.imageViewer.drawnItemsChanged.connect(self.imageGridView.setDrawings)
@@ -146,8 +152,8 @@ class QImageWAO(QtWidgets.QMainWindow):
         self.countTotals.fileActivated.connect(self.imageGridView.selectFile)
         self.countTotals.selectedFilesChanged.connect(self.library.selectFiles)
         self.countTotals.requestDrawingUpdate.connect(
-            self.imageGridView.save
-        )  # Hacky. Ideally you could request the data without saving.
+            self.imageGridView.computeTransectData
+        )
 
         # Flight info form signals
         self.flightInfoForm.closeRequested.connect(self.flightInfoDock.hide)
@@ -193,6 +199,36 @@ class QImageWAO(QtWidgets.QMainWindow):
         self.distributionDock.setTitleBarText(f"Distribute flight - {fp.name}")
         self.distributionDock.show()
 
+    @QtCore.Slot(str)
+    def _exportMarkedImages(self, folder: str):
+        """
+        Renders the marked images of every transect in `folder`
+        on another thread.
+        """
+        if self._exportWorker is not None:
+            self.showStatusMessage(("Marked images are already being exported", 5000))
+            return
+
+        # Unsaved drawings should be part of the export.
+        # The export is queued behind the save.
+        self._saveIfDirty()
+
+        transectFolders = transectFoldersIn(folder)
+        self.showStatusMessage((f"Exporting marked images in {Path(folder).name}...",))
+
+        self._exportWorker = QWorker(exportMarkedImages, [transectFolders])
+        self._exportWorker.signals.result.connect(
+            lambda n: self.showStatusMessage((f"Exported {n} marked images", 5000))
+        )
+        self._exportWorker.signals.error.connect(
+            lambda e: self.showStatusMessage((f"Export failed: {e[1]}", 5000))
+        )
+        self._exportWorker.signals.finished.connect(self._resetExportWorker)
+        self.imageGridView.startAfterSaving(self._exportWorker)
+
+    def _resetExportWorker(self):
+        self._exportWorker = None
+
     def _addDockWidget(
         self,
         w,
@@ -340,6 +376,10 @@ class QImageWAO(QtWidgets.QMainWindow):
         """
         self._exitDirectoryEvent(event)
 
+        # Saving happens in the background, let it finish before closing
+        if event.isAccepted():
+            self.imageGridView.waitForSaves()
+
     @QtCore.Slot()
     def _raiseError(self):
         raise RuntimeError("this is a problem")
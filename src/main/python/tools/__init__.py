@@ -1,13 +1,57 @@
 from .layout import clearLayout
-from .files import showInFolder, DirectoryValidator, FileNameValidator
-from .saving import saveManyImages
+from .files import (
+    showInFolder,
+    hasVisibleEntries,
+    walkFiles,
+    DirectoryValidator,
+    FileNameValidator,
+)
+from .saving import saveManyImages, exportMarkedImages, transectFoldersIn
 from .numbers import roundToMultiple
+from .exif import (
+    ImageMetadata,
+    readDateTimeOriginal,
+    readDateTimesOriginal,
+    readImageMetadata,
+    readImagesMetadata,
+)
+from .imagemetadata import ImageMetadataCache, writeImageMetadata
+from .copying import CopyVerificationError, copyFileVerified, fileHash
+from .fingerprints import fileFingerprint, fileFingerprints, FingerprintIndex
+from .thumbnails import thumbnailPath, hasThumbnail, createThumbnail, readThumbnail
+from .bulkread import ReadMeter, adviseSequential, readOrder, readFile, bulkRead
 
 __all__ = [
     clearLayout,
     showInFolder,
+    hasVisibleEntries,
+    walkFiles,
     DirectoryValidator,
     FileNameValidator,
     saveManyImages,
+    exportMarkedImages,
+    transectFoldersIn,
     roundToMultiple,
+    readDateTimeOriginal,
+    readDateTimesOriginal,
+    ImageMetadata,
+    readImageMetadata,
+    readImagesMetadata,
+    ImageMetadataCache,
+    writeImageMetadata,
+    CopyVerificationError,
+    copyFileVerified,
+    fileHash,
+    fileFingerprint,
+    fileFingerprints,
+    FingerprintIndex,
+    thumbnailPath,
+    hasThumbnail,
+    createThumbnail,
+    readThumbnail,
+    ReadMeter,
+    adviseSequential,
+    readOrder,
+    readFile,
+    bulkRead,
 ]
@@ -0,0 +1,172 @@
+"""
+Helpers for reading many files quickly, especially from slow or removable
+media (USB hard drives, SD cards) where scattered, small reads waste most
+of the throughput.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Bytes read at a time
+readChunkSize = 8 * 1024 * 1024
+
+# Bytes of file data held in memory at once by `bulkRead`
+maxInFlightBytes = 256 * 1024 * 1024
+
+
+class ReadMeter:
+    """
+    Measures the throughput of reads. Can be shared between threads.
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self._start = None
+        self._end = None
+        self._lock = threading.Lock()
+
+    def add(self, numBytes: int):
+        """ Records that `numBytes` were read """
+        with self._lock:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now
+            self._end = now
+            self.bytes += numBytes
+
+    def start(self):
+        """ Starts timing, if it hasn't already started """
+        with self._lock:
+            if self._start is None:
+                self._start = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        if self._start is None:
+            return 0.0
+        return self._end - self._start if self._end is not None else 0.0
+
+    @property
+    def mbps(self) -> float:
+        """ Megabytes per second read, or 0 if nothing was timed """
+        seconds = self.seconds
+        if seconds <= 0:
+            return 0.0
+        return self.bytes / seconds / 1e6
+
+
+def adviseSequential(fd, offset=0, length=0):
+    """
+    Tells the operating system that the file `fd` will be read sequentially
+    (from `offset`, for `length` bytes, or to the end if 0), and soon,
+    so it can read ahead in large blocks. Does nothing where
+    `posix_fadvise` isn't available.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def readOrder(files, byInode=False) -> list:
+    """
+    The indexes of `files`, in the order they are best read in.
+
+    With `byInode`, files are ordered by device and inode number, which on
+    most file systems follows where the files are on disk. Otherwise (for
+    FAT file systems, such as memory cards, whose inode numbers are made up)
+    files are read in directory order: folder by folder, by name, which is
+    the order a camera writes them in.
+    """
+    if not byInode:
+        return sorted(range(len(files)), key=lambda i: _directoryKey(files[i]))
+
+    def key(i):
+        try:
+            stat = os.stat(files[i])
+        except OSError:
+            return (0, 0)
+        return (stat.st_dev, stat.st_ino)
+
+    return sorted(range(len(files)), key=key)
+
+
+def _directoryKey(fp) -> tuple:
+    fp = os.fspath(fp)
+    return (os.path.dirname(fp), os.path.basename(fp))
+
+
+def readFile(fp, meter: ReadMeter = None) -> bytes:
+    """
+    Reads the whole file `fp` in large sequential chunks.
+    """
+    with open(fp, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        adviseSequential(f.fileno())
+
+        data = bytearray(size)
+        view = memoryview(data)
+        pos = 0
+        while pos < size:
+            n = f.readinto(view[pos : pos + readChunkSize])
+            if not n:
+                break
+            pos += n
+            if meter is not None:
+                meter.add(n)
+
+    return bytes(data[:pos]) if pos < size else bytes(data)
+
+
+def _readFileOrNone(fp, meter: ReadMeter = None) -> bytes:
+    try:
+        return readFile(fp, meter)
+    except OSError as e:
+        print(f"Warning: could not read {fp}: {e}")
+        return None
+
+
+def bulkRead(files, maxWorkers=4, byInode=False, meter: ReadMeter = None):
+    """
+    Generator yielding (index, file, data) for each of the `files`, reading
+    `maxWorkers` files at a time in the order given by `readOrder`. Files are
+    read ahead of the consumer, up to `maxInFlightBytes` of data at once.
+
+    Results are yielded in the order they are read, so use the index
+    to put them back in the order of `files`. The data of a file that
+    can't be read (e.g. it is gone) is `None`.
+    """
+    files = list(files)
+    if meter is None:
+        meter = ReadMeter()
+    meter.start()
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        pending = deque()
+        inFlight = 0
+
+        for i in readOrder(files, byInode=byInode):
+            try:
+                size = os.stat(files[i]).st_size
+            except OSError:
+                size = 0
+
+            # Wait for the oldest reads to be consumed
+            # before going over the limit
+            while pending and inFlight + size > maxInFlightBytes:
+                j, future, n = pending.popleft()
+                inFlight -= n
+                yield j, files[j], future.result()
+
+            pending.append((i, executor.submit(_readFileOrNone, files[i], meter), size))
+            inFlight += size
+
+        while pending:
+            j, future, _ = pending.popleft()
+            yield j, files[j], future.result()
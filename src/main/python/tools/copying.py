@@ -0,0 +1,107 @@
+import errno
+import hashlib
+import os
+from pathlib import Path
+
+from .bulkread import adviseSequential, readChunkSize
+
+# Bytes
+_chunkSize = readChunkSize
+
+# `copy_file_range` fails with these if the files can't be copied
+# with it (e.g. they are on different file systems on older kernels)
+_unsupportedErrors = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+
+class CopyVerificationError(IOError):
+    """ A copied file does not match its source """
+
+
+def copyFileVerified(src, dst, bytesCopied=None) -> str:
+    """
+    Copies `src` to `dst` and verifies the copy against the source
+    with a hash. The data is written to a temporary file next to `dst`
+    that is only renamed to `dst` once it has been verified,
+    so `dst` is never left half written.
+
+    The copy is done by the kernel with `os.copy_file_range` where
+    available, otherwise the file is streamed through a large buffer.
+    Either way, the source is read sequentially, in large chunks.
+
+    `bytesCopied`, if given, is called with the number of bytes
+    copied each time a chunk is copied.
+    Returns the hash (hex digest) of the file.
+    """
+    src = Path(src)
+    dst = Path(dst)
+    tmp = dst.with_name(f".{dst.name}.copying")
+
+    try:
+        with open(src, "rb", buffering=0) as fsrc, open(tmp, "wb") as fdst:
+            adviseSequential(fsrc.fileno())
+            srcHash = _copyFileRange(fsrc, fdst, bytesCopied)
+            if srcHash is None:
+                srcHash = _copyBuffered(fsrc, fdst, bytesCopied)
+
+            fdst.flush()
+            os.fsync(fdst.fileno())
+
+        if fileHash(tmp) != srcHash:
+            raise CopyVerificationError(f"The copy of {src} is not identical to it")
+
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return srcHash
+
+
+def fileHash(fp) -> str:
+    """ The hash (hex digest) of the contents of the file `fp` """
+    h = hashlib.blake2b()
+    with open(fp, "rb", buffering=0) as f:
+        adviseSequential(f.fileno())
+        for chunk in iter(lambda: f.read(_chunkSize), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _copyFileRange(fsrc, fdst, bytesCopied) -> str:
+    """
+    Copies `fsrc` to `fdst` within the kernel, then hashes `fsrc`.
+    Returns `None` (having copied nothing) if `copy_file_range`
+    can't be used for these files.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return None
+
+    first = True
+    while True:
+        try:
+            n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), _chunkSize)
+        except OSError as e:
+            if first and e.errno in _unsupportedErrors:
+                return None
+            raise
+        if n == 0:
+            break
+        first = False
+        if bytesCopied is not None:
+            bytesCopied(n)
+
+    return fileHash(fsrc.name)
+
+
+def _copyBuffered(fsrc, fdst, bytesCopied) -> str:
+    """ Copies `fsrc` to `fdst`, hashing the data on the way """
+    h = hashlib.blake2b()
+    for chunk in iter(lambda: fsrc.read(_chunkSize), b""):
+        fdst.write(chunk)
+        h.update(chunk)
+        if bytesCopied is not None:
+            bytesCopied(len(chunk))
+    return h.hexdigest()
@@ -0,0 +1,419 @@
+"""
+Reads the capture time (and other metadata) of JPEG images from their
+EXIF data. Only the segments at the start of the file are read and parsed.
+"""
+
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+# JPEG markers
+_SOS = 0xDA
+_EOI = 0xD9
+_APP1 = 0xE1
+
+# Start of frame markers (which hold the dimensions)
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Bytes read from the start of the file at once: enough for the
+# segments before the image data of most images (the APP1 segment
+# is at most 64 KB), so they are read with one request
+_headerBufferSize = 128 * 1024
+
+# EXIF tags
+_ExifIFDPointer = 0x8769
+_GPSIFDPointer = 0x8825
+_DateTimeOriginal = 0x9003
+
+# GPS tags
+_GPSLatitudeRef = 0x1
+_GPSLatitude = 0x2
+_GPSLongitudeRef = 0x3
+_GPSLongitude = 0x4
+_GPSAltitudeRef = 0x5
+_GPSAltitude = 0x6
+_GPSTags = (
+    _GPSLatitudeRef,
+    _GPSLatitude,
+    _GPSLongitudeRef,
+    _GPSLongitude,
+    _GPSAltitudeRef,
+    _GPSAltitude,
+)
+
+# EXIF types: (struct format, size) of a single value
+_BYTE = 1
+_ASCII = 2
+_SHORT = 3
+_LONG = 4
+_RATIONAL = 5
+_typeFormats = {
+    _BYTE: ("B", 1),
+    _ASCII: ("s", 1),
+    _SHORT: ("H", 2),
+    _LONG: ("I", 4),
+    _RATIONAL: ("II", 8),
+}
+
+_timeFormat = "%Y:%m:%d %H:%M:%S"
+
+
+class ImageMetadata(NamedTuple):
+    """ What is known about an image from its file and JPEG header """
+
+    # Bytes
+    size: int = None
+    capturedAt: datetime = None
+    width: int = None
+    height: int = None
+
+    # Degrees (negative south and west) and metres above sea level
+    latitude: float = None
+    longitude: float = None
+    altitude: float = None
+
+
+def readDateTimeOriginal(fp) -> datetime:
+    """
+    The time the image at `fp` was taken (EXIF DateTimeOriginal),
+    or `None` if it can't be found. Only the segments at the start of
+    the JPEG are read, up to and including the EXIF segment.
+
+    If the EXIF data can't be parsed here, Pillow is tried instead.
+    """
+    return readImageMetadata(fp).capturedAt
+
+
+def readImageMetadata(fp) -> ImageMetadata:
+    """
+    The size, capture time, dimensions and (if present) GPS position of the
+    image at `fp`. Only the segments at the start of the JPEG are read, up to
+    the start of the image data. Anything that can't be found is `None`.
+
+    If the capture time can't be parsed here, Pillow is tried instead.
+    """
+    try:
+        metadata = _readImageMetadata(fp)
+    except (OSError, struct.error, ValueError, IndexError, ZeroDivisionError):
+        metadata = None
+
+    if metadata is None:
+        try:
+            metadata = ImageMetadata(size=os.stat(fp).st_size)
+        except OSError:
+            metadata = ImageMetadata()
+
+    if metadata.capturedAt is None:
+        metadata = metadata._replace(
+            capturedAt=_parseDateTime(_readDateTimeOriginalPillow(fp))
+        )
+
+    return metadata
+
+
+def _parseDateTime(text: str) -> datetime:
+    if text is None:
+        return None
+    try:
+        return datetime.strptime(text.strip("\x00 "), _timeFormat)
+    except ValueError:
+        return None
+
+
+def _readImageMetadata(fp) -> ImageMetadata:
+    """
+    Walks the JPEG segments up to the image data, reading the EXIF
+    data from the APP1 segment and the dimensions from the SOF segment.
+    Returns `None` if `fp` is not a JPEG.
+    """
+    metadata = ImageMetadata()
+    with open(fp, "rb", buffering=_headerBufferSize) as f:
+        metadata = metadata._replace(size=os.fstat(f.fileno()).st_size)
+
+        if f.read(2) != b"\xff\xd8":
+            return None
+
+        for marker, length in _segments(f):
+            if marker == _APP1:
+                segment = f.read(length)
+                if segment[:6] == b"Exif\x00\x00":
+                    metadata = _parseTiff(segment[6:], metadata)
+
+            elif marker in _SOF:
+                segment = f.read(length)
+                height, width = struct.unpack(">HH", segment[1:5])
+                return metadata._replace(width=width, height=height)
+
+    return metadata
+
+
+def _segments(f):
+    """
+    Generator yielding (marker, length of its data) of each segment of the
+    JPEG file `f` up to the image data, starting after the SOI marker.
+    When a segment is yielded, `f` is at the start of its data. Data that
+    isn't read is skipped. Raises `ValueError` if a segment is malformed.
+    """
+    while True:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return
+
+        marker = header[1]
+
+        # Markers may be padded with any number of 0xFF bytes
+        while marker == 0xFF:
+            header = header[1:] + f.read(1)
+            marker = header[1]
+
+        # The image data starts here
+        if marker in (_SOS, _EOI):
+            return
+
+        # The length includes its own two bytes
+        length = struct.unpack(">H", header[2:4])[0]
+        if length < 2:
+            raise ValueError(f"Malformed JPEG segment length: {length}")
+
+        end = f.tell() + length - 2
+        yield marker, length - 2
+        f.seek(end)
+
+
+def _parseTiff(tiff: bytes, metadata: ImageMetadata) -> ImageMetadata:
+    """
+    Reads the capture time from the EXIF sub-IFD and the position
+    from the GPS sub-IFD of the TIFF structure `tiff`.
+    """
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return metadata
+
+    if struct.unpack(endian + "H", tiff[2:4])[0] != 42:
+        return metadata
+
+    ifd0 = struct.unpack(endian + "I", tiff[4:8])[0]
+    ifd = _readIFD(tiff, endian, ifd0, (_ExifIFDPointer, _GPSIFDPointer))
+
+    if _ExifIFDPointer in ifd:
+        exif = _readIFD(tiff, endian, ifd[_ExifIFDPointer][0], (_DateTimeOriginal,))
+        if _DateTimeOriginal in exif:
+            metadata = metadata._replace(
+                capturedAt=_parseDateTime(exif[_DateTimeOriginal])
+            )
+
+    if _GPSIFDPointer in ifd:
+        gps = _readIFD(tiff, endian, ifd[_GPSIFDPointer][0], _GPSTags)
+        metadata = metadata._replace(**_position(gps))
+
+    return metadata
+
+
+def _readIFD(tiff: bytes, endian: str, offset: int, tags) -> dict:
+    """
+    The values of the `tags` that are in the IFD at `offset`.
+    ASCII values are `str`, other values are a list of numbers.
+    """
+    values = {}
+    numEntries = struct.unpack(endian + "H", tiff[offset : offset + 2])[0]
+    for i in range(numEntries):
+        start = offset + 2 + i * 12
+        tag, valueType, count = struct.unpack(endian + "HHI", tiff[start : start + 8])
+        if tag in tags and valueType in _typeFormats:
+            values[tag] = _readValue(
+                tiff, endian, valueType, count, tiff[start + 8 : start + 12]
+            )
+    return values
+
+
+def _readValue(tiff: bytes, endian: str, valueType: int, count: int, value: bytes):
+    fmt, size = _typeFormats[valueType]
+
+    # Values of more than 4 bytes are stored at an offset
+    if count * size <= 4:
+        data = value[: count * size]
+    else:
+        offset = struct.unpack(endian + "I", value)[0]
+        data = tiff[offset : offset + count * size]
+
+    if valueType == _ASCII:
+        return data.decode("ascii")
+
+    numbers = struct.unpack(endian + fmt * count, data)
+    if valueType == _RATIONAL:
+        return [n / d for n, d in zip(numbers[::2], numbers[1::2])]
+    return list(numbers)
+
+
+def _position(gps: dict) -> dict:
+    """ The latitude, longitude and altitude in the GPS IFD values `gps` """
+    position = {}
+    for name, refTag, tag, negative in (
+        ("latitude", _GPSLatitudeRef, _GPSLatitude, "S"),
+        ("longitude", _GPSLongitudeRef, _GPSLongitude, "W"),
+    ):
+        if tag in gps and len(gps[tag]) == 3:
+            degrees, minutes, seconds = gps[tag]
+            angle = degrees + minutes / 60 + seconds / 3600
+            if gps.get(refTag, "").strip("\x00 ") == negative:
+                angle = -angle
+            position[name] = angle
+
+    if _GPSAltitude in gps and gps[_GPSAltitude]:
+        altitude = gps[_GPSAltitude][0]
+        if gps.get(_GPSAltitudeRef, [0])[0] == 1:
+            altitude = -altitude
+        position["altitude"] = altitude
+
+    return position
+
+
+def _readDateTimeOriginalPillow(fp) -> str:
+    """ Reads DateTimeOriginal with Pillow, which is slower but thorough """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(fp) as img:
+            return img._getexif()[36867]
+    except Exception:
+        return None
+
+
+def readDateTimesOriginal(files, maxWorkers=None, progress=None) -> list:
+    """
+    Reads the capture time of each of the `files` on a pool of threads.
+    `files` may be any iterable (such as a generator still discovering files):
+    each file is read as soon as it is given.
+
+    Returns a list of (file, `datetime` or `None`), in the same order as `files`.
+
+    If `progress` is passed in, it is emitted as the files are read.
+    Until all the files are known, progress is estimated from the files
+    found so far, and kept below 90%.
+    """
+    return readImagesMetadata(
+        files, maxWorkers=maxWorkers, progress=progress, read=readDateTimeOriginal
+    )
+
+
+def readImagesMetadata(
+    files,
+    maxWorkers=None,
+    progress=None,
+    read=readImageMetadata,
+    onResult=None,
+    cancellation=None,
+) -> list:
+    """
+    Like `readDateTimesOriginal`, but returns a list of (file, `ImageMetadata`).
+    Each file is read with `read`.
+
+    If `onResult` is given, it is called with each (file, result) as soon as
+    that file and every file before it have been read, in the order of `files`.
+    It is called on the calling thread.
+
+    If `cancellation` (a `CancellationToken`) is given, reading stops
+    as soon as it is cancelled: files not yet read are dropped,
+    and `Cancelled` is raised.
+    """
+    if maxWorkers is None:
+        maxWorkers = min(32, (os.cpu_count() or 1) * 4)
+
+    tracker = _ProgressTracker(progress)
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = []
+
+        # Index of the first future not yet passed to `onResult`
+        reported = 0
+
+        try:
+            for fp in files:
+                _checkCancelled(cancellation)
+                future = executor.submit(read, fp)
+                future.add_done_callback(tracker.fileDone)
+                futures.append((fp, future))
+                tracker.fileFound()
+
+                if onResult is not None:
+                    reported = _reportDone(futures, reported, onResult)
+            tracker.allFound()
+
+            results = []
+            for i, (fp, future) in enumerate(futures):
+                _checkCancelled(cancellation)
+                results.append((fp, future.result()))
+                if onResult is not None and i >= reported:
+                    onResult(fp, results[-1][1])
+        except BaseException:
+            for _, future in futures:
+                future.cancel()
+            raise
+
+        return results
+
+
+def _checkCancelled(cancellation):
+    if cancellation is not None:
+        cancellation.raiseIfCancelled()
+
+
+def _reportDone(futures, reported, onResult) -> int:
+    """
+    Passes the (file, result) of each of the `futures` from index `reported`
+    on that is done to `onResult`, stopping at the first that isn't.
+    Returns the index of the first future not yet passed to `onResult`.
+    """
+    while reported < len(futures) and futures[reported][1].done():
+        fp, future = futures[reported]
+        onResult(fp, future.result())
+        reported += 1
+    return reported
+
+
+class _ProgressTracker:
+    """ Estimates progress while the total number of files is still growing """
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.found = 0
+        self.done = 0
+        self.complete = False
+        self.lastPercent = 0
+        self.lock = threading.Lock()
+
+    def fileFound(self):
+        with self.lock:
+            self.found += 1
+
+    def fileDone(self, future):
+        with self.lock:
+            self.done += 1
+            self._emit()
+
+    def allFound(self):
+        with self.lock:
+            self.complete = True
+            self._emit()
+
+    def _emit(self):
+        if self.progress is None or self.found == 0:
+            return
+        fraction = self.done / self.found
+        if not self.complete:
+            fraction *= 0.9
+
+        # Never go backwards
+        percent = max(self.lastPercent, int(fraction * 100))
+        if percent != self.lastPercent:
+            self.lastPercent = percent
+            self.progress.emit(percent)
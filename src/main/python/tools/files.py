@@ -48,6 +48,54 @@ def showInFolder(path, select=True):
     QtGui.QDesktopServices.openUrl(QtCore.QUrl(dirPath))
 
 
+def hasVisibleEntries(folder) -> bool:
+    """
+    Whether `folder` holds any file or folder that is not hidden
+    (i.e. whose name doesn't start with a "."). Stops at the first one found,
+    so this is cheap no matter how much the folder holds.
+    """
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.name.startswith("."):
+                    return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def walkFiles(folder, extensions=None):
+    """
+    Generator yielding the `os.DirEntry` of every file in `folder` and
+    its subfolders, in a single pass. Entries of each folder are yielded
+    in name order. If `extensions` (a tuple) is given, only files ending
+    in one of them are yielded. Hidden files and folders (whose names
+    start with ".", such as .marked/) are skipped.
+
+    Only the information returned by listing each folder is used,
+    so (on most platforms) no file is `stat`-ed.
+    """
+    folders = [folder]
+    while folders:
+        try:
+            with os.scandir(folders.pop()) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except (FileNotFoundError, PermissionError):
+            continue
+
+        subfolders = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                subfolders.append(entry.path)
+            elif extensions is None or entry.name.endswith(extensions):
+                yield entry
+
+        # Depth first, in name order
+        folders.extend(reversed(subfolders))
+
+
 class DirectoryValidator(QtGui.QValidator):
     def validate(self, userInput: str, pos: int):
 
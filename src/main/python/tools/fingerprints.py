@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from base import config
+
+from .files import walkFiles
+
+# Bytes hashed at each end of a file
+_fingerprintChunk = 64 * 1024
+
+
+def fileFingerprint(fp) -> str:
+    """
+    A quick fingerprint of the file `fp`: its size and a hash of its first
+    and last 64 KB. Images of the same size with the same start and end
+    are (in practice) the same image.
+    """
+    with open(fp, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        h = hashlib.blake2b(f.read(_fingerprintChunk), digest_size=16)
+        if size > 2 * _fingerprintChunk:
+            f.seek(-_fingerprintChunk, os.SEEK_END)
+        h.update(f.read(_fingerprintChunk))
+    return f"{size}:{h.hexdigest()}"
+
+
+def fileFingerprints(files, maxWorkers=None) -> dict:
+    """ The fingerprint of each of the `files`, read on a pool of threads """
+    if maxWorkers is None:
+        maxWorkers = min(32, (os.cpu_count() or 1) * 4)
+    files = list(files)
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        return dict(zip(files, executor.map(fileFingerprint, files)))
+
+
+class FingerprintIndex:
+    """
+    The fingerprints of the images in a flight folder, kept in
+    .flight/fingerprints.json, to find out whether an image being
+    imported is already in the flight.
+
+    Each image (keyed by its path relative to the flight) records
+    the size, mtime and fingerprint it had when it was fingerprinted.
+    `refresh` only fingerprints images that are new or changed.
+    """
+
+    _version = 1
+
+    def __init__(self, flightFolder):
+        self.flightFolder = Path(flightFolder)
+        self.indexFile = config.flightFingerprintsFile(self.flightFolder)
+        self.lock = threading.Lock()
+
+        # {relative path: [size, mtime, fingerprint]}
+        self._images = {}
+
+        # {fingerprint: relative path}
+        self._fingerprints = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.indexFile, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return
+
+        if data.get("version") == self._version:
+            self._images = data["images"]
+            self._fingerprints = {entry[2]: rel for rel, entry in self._images.items()}
+
+    def save(self):
+        """
+        Writes the index to disk.
+        """
+        with self.lock:
+            text = json.dumps({"version": self._version, "images": self._images})
+
+        tmp = self.indexFile.with_name(f".{self.indexFile.name}.saving")
+        try:
+            with open(tmp, "w") as f:
+                f.write(text)
+            os.replace(tmp, self.indexFile)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _relative(self, fp) -> str:
+        return Path(fp).relative_to(self.flightFolder).as_posix()
+
+    def refresh(self, maxWorkers=None):
+        """
+        Brings the index up to date with the images in the flight folder.
+        """
+        current = {}
+        changed = []
+        for entry in walkFiles(self.flightFolder, config.supportedImageExtensions):
+            stat = entry.stat()
+            rel = self._relative(entry.path)
+            indexed = self._images.get(rel)
+            if indexed is not None and indexed[:2] == [stat.st_size, stat.st_mtime]:
+                current[rel] = indexed
+            else:
+                changed.append((rel, Path(entry.path), stat))
+
+        fingerprints = fileFingerprints(
+            [fp for _, fp, _ in changed], maxWorkers=maxWorkers
+        )
+        for rel, fp, stat in changed:
+            current[rel] = [stat.st_size, stat.st_mtime, fingerprints[fp]]
+
+        with self.lock:
+            self._images = current
+            self._fingerprints = {entry[2]: rel for rel, entry in current.items()}
+
+    def contains(self, fingerprint) -> bool:
+        """ Whether an image with this fingerprint is in the flight """
+        with self.lock:
+            return fingerprint in self._fingerprints
+
+    def pathOf(self, fingerprint) -> Path:
+        """ The path of an image in the flight with this fingerprint, if any """
+        with self.lock:
+            rel = self._fingerprints.get(fingerprint)
+        if rel is None:
+            return None
+        return self.flightFolder / rel
+
+    def add(self, fp, fingerprint):
+        """ Records that the image `fp` (in the flight) has this fingerprint """
+        stat = os.stat(fp)
+        with self.lock:
+            self._images[self._relative(fp)] = [
+                stat.st_size,
+                stat.st_mtime,
+                fingerprint,
+            ]
+            self._fingerprints[fingerprint] = self._relative(fp)
@@ -0,0 +1,234 @@
+import csv
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+from base import config
+
+from .exif import ImageMetadata, readImageMetadata, readImagesMetadata
+
+_schema = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    captured_at TEXT,
+    width INTEGER,
+    height INTEGER,
+    latitude REAL,
+    longitude REAL,
+    altitude REAL
+);
+"""
+
+_columns = (
+    "size",
+    "captured_at",
+    "width",
+    "height",
+    "latitude",
+    "longitude",
+    "altitude",
+)
+
+# How capture times are stored in the table
+_timeFormat = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class ImageMetadataCache:
+    """
+    A table of the metadata of images that were imported (or are being
+    imported), kept in the .imagewao folder so an import folder only has
+    to be read once. Entries are keyed by path, and are only used while
+    the file's size and mtime are unchanged.
+
+    Use `load` for the folder being read, read each image with `read`
+    (from any thread), then `save` the new entries.
+    """
+
+    def __init__(self, cacheFile=None):
+        if cacheFile is None:
+            cacheFile = config.imageMetadataFile()
+        self.cacheFile = Path(cacheFile)
+
+        self._folder = None
+        self._cached = {}
+        self._read = {}
+        self._lock = threading.Lock()
+
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.executescript(_schema)
+
+    def _connect(self):
+        return sqlite3.connect(str(self.cacheFile), timeout=30)
+
+    @staticmethod
+    def _prefixPattern(folder) -> str:
+        """ A LIKE pattern matching every path in `folder` """
+        prefix = os.path.join(os.path.abspath(folder), "")
+        for c in ("\\", "%", "_"):
+            prefix = prefix.replace(c, "\\" + c)
+        return prefix + "%"
+
+    def load(self, folder):
+        """
+        Loads the entries of the images in `folder` (and its subfolders).
+        """
+        self._folder = folder
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path, mtime, " + ", ".join(_columns) + " FROM images"
+                " WHERE path LIKE ? ESCAPE '\\'",
+                (self._prefixPattern(folder),),
+            ).fetchall()
+
+        self._cached = {}
+        for path, mtime, *values in rows:
+            try:
+                metadata = _toMetadata(values)
+            except ValueError:
+                # The image is read again and its entry replaced
+                continue
+            self._cached[path] = (mtime, metadata)
+        self._read = {}
+
+    def read(self, fp) -> ImageMetadata:
+        """
+        The metadata of the image at `fp`, from the table if its
+        entry is up to date, otherwise from the image itself.
+        """
+        path = os.path.abspath(fp)
+        stat = os.stat(path)
+
+        entry = self._cached.get(path)
+        if entry is not None:
+            mtime, metadata = entry
+            if mtime == stat.st_mtime and metadata.size == stat.st_size:
+                with self._lock:
+                    self._read[path] = None
+                return metadata
+
+        metadata = readImageMetadata(path)
+        with self._lock:
+            self._read[path] = (stat.st_mtime, metadata)
+        return metadata
+
+    def readMany(
+        self, files, maxWorkers=None, progress=None, onResult=None, cancellation=None
+    ) -> list:
+        """
+        Reads the metadata of each of the `files` on a pool of threads.
+        See `readImagesMetadata`.
+        """
+        return readImagesMetadata(
+            files,
+            maxWorkers=maxWorkers,
+            progress=progress,
+            read=self.read,
+            onResult=onResult,
+            cancellation=cancellation,
+        )
+
+    def save(self, complete=True):
+        """
+        Writes the entries of the images that were read since the folder was
+        loaded, and removes those of the images in it that are gone.
+
+        If the folder was not `complete`ly read (e.g. the read was cancelled),
+        the images that weren't read may still be there, so none are removed.
+        """
+        if self._folder is None:
+            return
+
+        with self._lock:
+            updated = []
+            for path, entry in self._read.items():
+                if entry is not None:
+                    mtime, metadata = entry
+                    updated.append((path, mtime) + _toRow(metadata))
+            gone = []
+            if complete:
+                gone = [(path,) for path in self._cached if path not in self._read]
+
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.executemany("DELETE FROM images WHERE path = ?", gone)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO images (path, mtime, "
+                    + ", ".join(_columns)
+                    + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    updated,
+                )
+
+
+def _toRow(metadata: ImageMetadata) -> tuple:
+    capturedAt = metadata.capturedAt
+    return (
+        metadata.size,
+        capturedAt.strftime(_timeFormat) if capturedAt is not None else None,
+        metadata.width,
+        metadata.height,
+        metadata.latitude,
+        metadata.longitude,
+        metadata.altitude,
+    )
+
+
+def _toMetadata(values) -> ImageMetadata:
+    """ Raises `ValueError` if the capture time isn't in `_timeFormat` """
+    size, capturedAt, width, height, latitude, longitude, altitude = values
+    return ImageMetadata(
+        size=size,
+        capturedAt=datetime.strptime(capturedAt, _timeFormat) if capturedAt else None,
+        width=width,
+        height=height,
+        latitude=latitude,
+        longitude=longitude,
+        altitude=altitude,
+    )
+
+
+imageMetadataColumns = [
+    "Transect",
+    "Image",
+    "Original",
+    "Captured",
+    "Size",
+    "Width",
+    "Height",
+    "Latitude",
+    "Longitude",
+    "Altitude",
+]
+
+
+def writeImageMetadata(fp, rows, append=False):
+    """
+    Writes a table of imported images to the CSV file `fp`.
+    `rows` is an iterable of (transectName, imageName, originalPath, `ImageMetadata`).
+    If `append` is set, the rows are added to the end of the table (if it exists).
+    """
+    append = append and os.path.exists(fp)
+    with open(fp, "a" if append else "w", newline="") as f:
+        writer = csv.writer(f)
+        if not append:
+            writer.writerow(imageMetadataColumns)
+        for transectName, imageName, original, metadata in rows:
+            capturedAt = metadata.capturedAt
+            values = [
+                transectName,
+                imageName,
+                str(original),
+                capturedAt.isoformat() if capturedAt is not None else None,
+                metadata.size,
+                metadata.width,
+                metadata.height,
+                metadata.latitude,
+                metadata.longitude,
+                metadata.altitude,
+            ]
+            writer.writerow(["" if value is None else value for value in values])
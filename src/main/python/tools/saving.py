@@ -1,9 +1,222 @@
-def saveManyImages(saveObjects: list):
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from PySide2 import QtGui
+
+from base import config
+from transectdata import TransectData, GetSaveFiles
+
+# Every save target gets a new version number each time it is queued.
+# Only the newest version of a target is ever written, so an older
+# save that finishes late cannot overwrite a newer one. Version numbers
+# are never reused, so a target can be forgotten once its newest version
+# has been written (or has failed to be).
+_versionNumbers = itertools.count(1)
+_targetVersions = {}
+_targetVersionsLock = threading.Lock()
+
+
+def _queueVersion(target: str) -> int:
+    """ Registers a new version of `target` and returns its number. """
+    with _targetVersionsLock:
+        version = next(_versionNumbers)
+        _targetVersions[target] = version
+        return version
+
+
+def _isLatestVersion(target: str, version: int) -> bool:
+    return _targetVersions.get(target) == version
+
+
+def _forgetVersion(target: str, version: int):
+    """ Forgets `target` if `version` is its newest version. """
+    with _targetVersionsLock:
+        if _isLatestVersion(target, version):
+            del _targetVersions[target]
+
+
+def saveImageAtomic(image, target, quality=-1, version=None) -> bool:
     """
-    Saves many images in a multiprocessed fashion.
-    `saveObjects`: list of tuples (object, [args]) where the
-    object implements a `save` method, accepting `*[args]`
-    as the parameter.
+    Saves `image` to `target` by writing to a temporary file
+    next to it and renaming it into place, so `target` is never
+    left half written.
+
+    If a `version` from `_queueVersion` is given, the image is only
+    written if that version is still the newest one queued for `target`.
+    Returns `True` if the image was written.
     """
+    target = Path(target)
+    key = str(target)
+
+    if version is not None and not _isLatestVersion(key, version):
+        return False
+
+    # The temporary file has to be unique for each version,
+    # since multiple versions might be encoding at the same time.
+    tmp = target.with_name(f".{target.name}.{version or 0}.saving")
+    fmt = target.suffix.lstrip(".").upper()
+    try:
+        if not image.save(str(tmp), fmt, quality):
+            raise IOError(f"Could not save image: {target}")
+
+        # Check again right before renaming. The lock ensures no newer version
+        # can be renamed in between the check and the rename.
+        with _targetVersionsLock:
+            if version is not None and not _isLatestVersion(key, version):
+                os.remove(tmp)
+                return False
+            os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        if version is not None:
+            _forgetVersion(key, version)
+
+    return True
+
+
+def saveManyImages(saveObjects: list, quality=None, maxWorkers=None, progress=None):
+    """
+    Saves many images in parallel on a pool of threads.
+    `saveObjects`: list of tuples (image, [path]) where the
+    image implements a QImage-like `save(path, format, quality)` method.
+
+    If the same path is given more than once, only the last image
+    is written. The same is true across calls: an image queued for a
+    path that has since been queued again is skipped.
+
+    `quality` is the JPEG quality, defaulting to `config.markedImageQuality`.
+    If `progress` is passed in, it is emitted after each file.
+    Returns the number of images written.
+    """
+    if quality is None:
+        quality = config.markedImageQuality
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+
+    # Coalesce repeated targets, later entries win
+    latest = {}
     for img, args in saveObjects:
-        img.save(*args)
+        target = str(args[0])
+        latest[target] = (img, _queueVersion(target))
+
+    count = len(latest)
+    written = 0
+    if count == 0:
+        return written
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = [
+            executor.submit(saveImageAtomic, img, target, quality, version)
+            for target, (img, version) in latest.items()
+        ]
+        for i, future in enumerate(as_completed(futures)):
+            if future.result():
+                written += 1
+            if progress is not None:
+                progress.emit(int(((i + 1) / count) * 100))
+
+    return written
+
+
+def transectFoldersIn(folder) -> list:
+    """
+    Finds the transect folders with save data in `folder`.
+    `folder` may be a transect folder itself, or any folder
+    containing transect folders (e.g. a flight or the library).
+    """
+    folder = Path(folder)
+
+    if config.markedDataFile(transectFolder=folder).exists():
+        return [folder]
+
+    # data.transect files live in transect/.marked/data.transect
+    return [saveFile.parent.parent for _, saveFile in GetSaveFiles(folder)]
+
+
+def _renderMarkedImage(originalPath, markedPath, drawings, quality) -> bool:
+    """
+    Paints `drawings` onto the image at `originalPath` and saves it to `markedPath`.
+    """
+
+    # Drawings are saved in the coordinates of the full
+    # resolution image, so they can be painted straight on.
+    image = QtGui.QImage(str(originalPath))
+    if image.isNull():
+        print(f"Warning: could not read {originalPath}, marked image skipped.")
+        return False
+
+    image = image.convertToFormat(QtGui.QImage.Format_RGB32)
+    drawings.paintToDevice(image)
+    return saveImageAtomic(image, markedPath, quality, _queueVersion(str(markedPath)))
+
+
+def exportMarkedImages(transectFolders: list, maxWorkers=None, progress=None):
+    """
+    Renders the marked up images of each transect folder from the
+    drawings in its save data. Images without drawings have their
+    marked image removed.
+
+    This is the batch counterpart of saving with
+    `config.renderMarkedImages` turned off.
+    Returns the number of marked images written.
+    """
+    quality = config.markedImageQuality
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+
+    # Gather every image that needs rendering up front so
+    # that the progress is meaningful
+    renderables = _markedImagesToRender(transectFolders)
+
+    count = len(renderables)
+    written = 0
+
+    # Each image is loaded, painted and encoded on a worker so only
+    # a handful of full resolution images are in memory at once.
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = [
+            executor.submit(_renderMarkedImage, *renderable, quality)
+            for renderable in renderables
+        ]
+        for i, future in enumerate(as_completed(futures)):
+            if future.result():
+                written += 1
+            if progress is not None:
+                progress.emit(int(((i + 1) / count) * 100))
+
+    if progress is not None:
+        progress.emit(100)
+
+    return written
+
+
+def _markedImagesToRender(transectFolders: list) -> list:
+    """
+    The (originalPath, markedPath, drawings) of each image with drawings
+    in the `transectFolders`. The marked images of images without
+    drawings are removed.
+    """
+    renderables = []
+    for transectFolder in transectFolders:
+        transectFolder = Path(transectFolder)
+        markedFolder = config.markedFolder(transectFolder=transectFolder)
+        saveData = TransectData.load(config.markedDataFile(transectFolder))
+
+        for imageName, drawings in saveData.drawings():
+            markedPath = markedFolder / imageName
+            if drawings.isEmpty():
+                try:
+                    markedPath.unlink()
+                except FileNotFoundError:
+                    pass
+            else:
+                renderables.append((transectFolder / imageName, markedPath, drawings))
+    return renderables
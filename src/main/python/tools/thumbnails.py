@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+from PySide2 import QtCore, QtGui
+
+from base import config
+
+from .saving import saveImageAtomic
+
+
+def thumbnailPath(fp) -> Path:
+    """ Where the thumbnail of the image `fp` is kept """
+    fp = Path(fp)
+    return config.thumbnailFolder(transectFolder=fp.parent) / fp.name
+
+
+def hasThumbnail(fp) -> bool:
+    """ Whether the image `fp` has a thumbnail at least as new as it is """
+    try:
+        return os.stat(thumbnailPath(fp)).st_mtime >= os.stat(fp).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def createThumbnail(fp, width=None) -> bool:
+    """
+    Saves a copy of the image `fp`, scaled down to `width`
+    (by default, `config.thumbnailWidth`), as its thumbnail.
+
+    The image is scaled as it is decoded, which (for JPEGs) is much
+    faster than decoding the full resolution image and scaling it.
+    Returns `True` if the thumbnail was written.
+    """
+    if width is None:
+        width = config.thumbnailWidth
+
+    reader = QtGui.QImageReader(str(fp))
+    size = reader.size()
+    if not size.isValid():
+        return False
+
+    if size.width() > width:
+        reader.setScaledSize(
+            size.scaled(width, size.height(), QtCore.Qt.KeepAspectRatio)
+        )
+
+    image = reader.read()
+    if image.isNull():
+        return False
+
+    target = thumbnailPath(fp)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return saveImageAtomic(image, target, config.thumbnailQuality)
+
+
+def readThumbnail(fp) -> QtGui.QImage:
+    """
+    The thumbnail of the image `fp`, or `None` if
+    it has none (or the image changed since it was made).
+    """
+    if not hasThumbnail(fp):
+        return None
+
+    image = QtGui.QImage(str(thumbnailPath(fp)))
+    if image.isNull():
+        return None
+    return image
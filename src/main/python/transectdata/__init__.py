@@ -1,5 +1,13 @@
 from .transectdata import TransectData
+from .transectdatagroup import TransectDataGroup
 from .transectdatagrouplist import TransectDataGroupList
 from .tools import GetSaveFiles
+from .manifest import LibraryManifest
 
-__all__ = [TransectData, TransectDataGroupList, GetSaveFiles]
+__all__ = [
+    TransectData,
+    TransectDataGroup,
+    TransectDataGroupList,
+    GetSaveFiles,
+    LibraryManifest,
+]
@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from base import config
+
+# Seconds
+_mtimeResolution = 2
+
+
+class LibraryManifest:
+    """
+    A listing of the folders in the library, kept in .imagewao/manifest.json,
+    so the library doesn't have to be walked to find the save files.
+
+    For each folder (keyed by its path relative to the library) it records:
+        mtime: the folder's mtime when it was listed
+        subdirs: the names of its (non-hidden) subfolders
+        files: the names of its (non-hidden) files
+        images: the number of images in it
+        marked: `None`, or the state of its .marked/ folder
+            {"mtime": ..., "saveFile": mtime of data.transect or None}
+
+    Adding, removing or renaming an entry changes the mtime of the folder that
+    holds it. So the manifest is revalidated with a single `stat` per folder,
+    and only folders whose mtime changed are listed again.
+
+    Use `LibraryManifest.instance()` to share the manifest between threads.
+    """
+
+    _version = 2
+
+    _instance = None
+    _instanceLock = threading.Lock()
+
+    def __init__(self, libraryDirectory, manifestFile):
+        self.libraryDirectory = Path(libraryDirectory)
+        self.manifestFile = Path(manifestFile)
+        self.lock = threading.RLock()
+        self._saveLock = threading.Lock()
+        self._dirs: Dict[str, dict] = {}
+        self._load()
+
+    @classmethod
+    def instance(cls):
+        """
+        The manifest of the current library.
+        """
+        libraryDirectory = Path(config.libraryDirectory)
+        with cls._instanceLock:
+            if (
+                cls._instance is None
+                or cls._instance.libraryDirectory != libraryDirectory
+            ):
+                cls._instance = LibraryManifest(
+                    libraryDirectory, config.libraryManifestFile()
+                )
+            return cls._instance
+
+    def _load(self):
+        try:
+            with open(self.manifestFile, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return
+
+        if data.get("version") == self._version:
+            self._dirs = data["dirs"]
+
+    def save(self):
+        """
+        Writes the manifest to disk.
+
+        Saves from different threads are written one at a time, each
+        with the manifest as it is when its turn comes, so the newest
+        manifest is always the one left on disk.
+        """
+        with self._saveLock:
+            with self.lock:
+                text = json.dumps({"version": self._version, "dirs": self._dirs})
+
+            tmp = self.manifestFile.with_name(f".{self.manifestFile.name}.saving")
+            try:
+                with open(tmp, "w") as f:
+                    f.write(text)
+                os.replace(tmp, self.manifestFile)
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+
+    def contains(self, folder) -> bool:
+        """ Whether `folder` is in the library """
+        try:
+            Path(folder).relative_to(self.libraryDirectory)
+        except ValueError:
+            return False
+        return True
+
+    def _relative(self, folder) -> str:
+        rel = Path(folder).relative_to(self.libraryDirectory).as_posix()
+        return "" if rel == "." else rel
+
+    def revalidate(self, folder=None):
+        """
+        Brings the manifest up to date with the folder (and every folder
+        inside it), then saves the manifest if anything changed.
+        `folder` defaults to the library.
+        """
+        if folder is None:
+            folder = self.libraryDirectory
+
+        with self.lock:
+            changed = self._validate(self._relative(folder), Path(folder))
+
+        if changed:
+            self.save()
+
+    def _validate(self, rel: str, path: Path) -> bool:
+        """
+        Revalidates the folder `rel` and the folders inside it.
+        Returns `True` if anything changed.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self._forget(rel)
+            return True
+
+        changed = False
+
+        entry = self._dirs.get(rel)
+        if entry is None or entry["mtime"] != mtime:
+            entry = self._scan(rel, path, mtime)
+            changed = True
+
+        marked = entry["marked"]
+        if marked is not None:
+            changed |= self._validateMarked(marked, path)
+
+        for name in entry["subdirs"]:
+            changed |= self._validate(_join(rel, name), path / name)
+
+        return changed
+
+    def _validateMarked(self, marked: dict, path: Path) -> bool:
+        """
+        Revalidates the .marked/ folder of the folder at `path`.
+        """
+        try:
+            mtime = os.stat(config.markedFolder(transectFolder=path)).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if marked["mtime"] == mtime:
+            return False
+
+        marked["mtime"] = _settled(mtime)
+        try:
+            saveFile = config.markedDataFile(transectFolder=path)
+            marked["saveFile"] = os.stat(saveFile).st_mtime
+        except FileNotFoundError:
+            marked["saveFile"] = None
+        return True
+
+    def _scan(self, rel: str, path: Path, mtime: float) -> dict:
+        """
+        Lists the folder `rel`, replacing its entry.
+        """
+        subdirs = []
+        files = []
+        hasMarked = False
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if entry.name == config.markedImageFolderName:
+                        hasMarked = True
+                    elif not entry.name.startswith("."):
+                        subdirs.append(entry.name)
+                elif not entry.name.startswith("."):
+                    files.append(entry.name)
+        subdirs.sort()
+        files.sort()
+        images = sum(
+            1 for name in files if name.endswith(config.supportedImageExtensions)
+        )
+
+        # Forget the subfolders that are gone
+        oldEntry = self._dirs.get(rel)
+        if oldEntry is not None:
+            for name in set(oldEntry["subdirs"]) - set(subdirs):
+                self._forget(_join(rel, name))
+
+        entry = {
+            "mtime": _settled(mtime),
+            "subdirs": subdirs,
+            "files": files,
+            "images": images,
+            "marked": {"mtime": None, "saveFile": None} if hasMarked else None,
+        }
+        self._dirs[rel] = entry
+        return entry
+
+    def _forget(self, rel: str):
+        """ Removes the folder `rel` and the folders inside it """
+        entry = self._dirs.pop(rel, None)
+        if entry is not None:
+            for name in entry["subdirs"]:
+                self._forget(_join(rel, name))
+
+    def _descendants(self, rel: str):
+        """
+        Generator yielding the relative path and entry of the
+        folder `rel` and every folder inside it.
+        """
+        entry = self._dirs.get(rel)
+        if entry is None:
+            return
+        yield rel, entry
+        for name in entry["subdirs"]:
+            yield from self._descendants(_join(rel, name))
+
+    def saveFiles(self, folder) -> List[Tuple[str, Path]]:
+        """
+        The save files in the subfolders of `folder`, grouped by the
+        subfolder they are in. See `GetSaveFiles`.
+        """
+        folder = Path(folder)
+        self.revalidate(folder)
+
+        saveFiles = []
+        with self.lock:
+            rel = self._relative(folder)
+            if rel not in self._dirs:
+                return saveFiles
+
+            for name in self._dirs[rel]["subdirs"]:
+                for subRel, entry in self._descendants(_join(rel, name)):
+                    marked = entry["marked"]
+                    if marked is not None and marked["saveFile"] is not None:
+                        transectFolder = self.libraryDirectory / subRel
+                        saveFiles.append(
+                            (name, config.markedDataFile(transectFolder=transectFolder))
+                        )
+        return saveFiles
+
+    def listing(self, folder) -> Tuple[List[str], List[str]]:
+        """
+        The (subfolder names, file names) of `folder`, as of the last
+        time it was revalidated. Both are empty if it isn't known.
+        """
+        with self.lock:
+            entry = self._dirs.get(self._relative(folder))
+            if entry is None:
+                return [], []
+            return list(entry["subdirs"]), list(entry["files"])
+
+    def summary(self, folder) -> Tuple[int, int, int]:
+        """
+        Summarizes `folder` and every folder inside it, as of the last time
+        it was revalidated. Returns (numImages, numTransects, numAnnotated),
+        where transects are folders holding images, and annotated
+        transects are the ones with a save file.
+        """
+        numImages = numTransects = numAnnotated = 0
+        with self.lock:
+            for _, entry in self._descendants(self._relative(folder)):
+                if entry["images"] > 0:
+                    numImages += entry["images"]
+                    numTransects += 1
+                    marked = entry["marked"]
+                    if marked is not None and marked["saveFile"] is not None:
+                        numAnnotated += 1
+        return numImages, numTransects, numAnnotated
+
+    def transects(self, folder=None) -> List[Tuple[Path, int, bool]]:
+        """
+        Lists the transects (folders that hold images) in `folder`.
+        Returns a list of (transectFolder, numImages, hasSaveFile).
+        """
+        if folder is None:
+            folder = self.libraryDirectory
+        folder = Path(folder)
+        self.revalidate(folder)
+
+        transects = []
+        with self.lock:
+            for rel, entry in self._descendants(self._relative(folder)):
+                if entry["images"] > 0:
+                    marked = entry["marked"]
+                    hasSaveFile = marked is not None and marked["saveFile"] is not None
+                    transects.append(
+                        (self.libraryDirectory / rel, entry["images"], hasSaveFile)
+                    )
+        return transects
+
+
+def _settled(mtime):
+    """
+    Returns `mtime`, or `None` if it is so recent that the folder could
+    still change without its mtime changing (some file systems only
+    store mtimes to the nearest 2 seconds). A `None` mtime never
+    matches, so the folder is listed again next time.
+    """
+    if mtime is not None and time.time() - mtime < _mtimeResolution:
+        return None
+    return mtime
+
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
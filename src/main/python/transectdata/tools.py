@@ -4,6 +4,8 @@ from pathlib import Path
 
 from base import config
 
+from .manifest import LibraryManifest
+
 
 def fast_scandir(dirname) -> List[os.DirEntry]:
     """
@@ -30,6 +32,12 @@ def GetSaveFiles(folder: Path) -> List[Tuple[str, Path]]:
             (subfolder2name, path/to/save/file/2/in/sub/2)
         ]
     """
+    # Folders in the library are listed by the manifest,
+    # rather than walked every time.
+    manifest = LibraryManifest.instance()
+    if manifest.contains(folder):
+        return manifest.saveFiles(folder)
+
     markedFolderMatchString = config.markedImageFolderName
     subfolders = [f for f in os.scandir(folder) if f.is_dir()]
     saveFiles = []
@@ -1,6 +1,9 @@
+import hashlib
 import json
+import os
+from collections import Counter
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 from countdata import CountData
 from drawingdata import DrawingDataList
@@ -32,30 +35,80 @@ class TransectData:
         self._transectData: Dict[str, Dict[str, list]] = transectData
         self.fp = fp
 
+        # Content hashes of the drawings of each image, computed as needed
+        self._drawingHashes: Dict[str, str] = {}
+
+        # Hash of the serialized data as it is on disk (if known),
+        # so that unchanged data is not written again.
+        self._fileHash: str = None
+
+        # Aggregate index of the counts, kept up to date as drawings
+        # are added and removed so that summaries don't re-parse the data.
+        # Counts of each image, in the same order as the images
+        self._imageCounts: Dict[str, List[CountData]] = {}
+        # Number of (non-duplicate) animals of each species
+        self._speciesTotals: Counter = Counter()
+        # Number of count entries of each species, duplicates included
+        self._speciesEntries: Counter = Counter()
+        # Number of images that have at least one count
+        self._numCountedImages = 0
+
+        for imageName in self._transectData.keys():
+            self._indexImage(imageName)
+
     @staticmethod
     def load(fp):
         """
         Loads a serialized file. If the data cannot be decoded,
         The save data is initialized with a blank dict.
         """
+        with open(fp, "r") as f:
+            text = f.read()
+
         try:
-            with open(fp, "r") as f:
-                data = json.load(f)
+            data = json.loads(text)
         except json.decoder.JSONDecodeError:
             print(
                 f"Badly formed JSON file. Data will be overwritten when file is saved: {fp}"
             )
-            data = {}
+            return TransectData({}, fp)
 
-        return TransectData(data, fp)
+        transectData = TransectData(data, fp)
+        transectData._fileHash = contentHash(text)
+        return transectData
 
-    def dump(self, fp):
+    def dumps(self) -> str:
+        """
+        Serialize save data to a string
+        """
+        return json.dumps(self._transectData, indent=4)
+
+    def dump(self, fp) -> bool:
         """
         Serialize save data and save to specified path.
         Writes this data on top of already existing data.
+
+        The file is only written if its content would change. It is
+        written to a temporary file first and then renamed into place,
+        so the save file is never left half written.
+        Returns `True` if the file was written.
         """
-        with open(fp, "w") as f:
-            json.dump(self._transectData, f, indent=4)
+        fp = Path(fp)
+        text = self.dumps()
+        textHash = contentHash(text)
+
+        # Nothing to do if this is exactly what is already on disk
+        if textHash == self._fileHash and fp == Path(self.fp) and fp.exists():
+            return False
+
+        tmp = fp.with_name(f".{fp.name}.saving")
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, fp)
+
+        self.fp = fp
+        self._fileHash = textHash
+        return True
 
     def addImage(self, imageName):
         """
@@ -64,6 +117,7 @@ class TransectData:
         """
         if imageName not in self._transectData.keys():
             self._transectData[imageName] = {}
+            self._imageCounts[imageName] = []
 
     def addDrawings(self, imageName, drawings: DrawingDataList):
         """
@@ -77,13 +131,19 @@ class TransectData:
         self.addImage(imageName)
 
         # Add these drawings the image dict
-        self._transectData[imageName]["drawings"] = drawings.toDict()
+        drawingsDict = drawings.toDict()
+        self._unindexImage(imageName)
+        self._transectData[imageName]["drawings"] = drawingsDict
+        self._drawingHashes[imageName] = contentHash(drawingsDict)
+        self._indexImage(imageName)
 
     def removeDrawings(self, imageName: str):
         """
         Remove the drawings associated with an image.
         """
+        self._drawingHashes.pop(imageName, None)
         if imageName in self._transectData.keys():
+            self._unindexImage(imageName)
             try:
                 self._transectData[imageName].pop("drawings")
 
@@ -91,6 +151,24 @@ class TransectData:
             except KeyError:
                 pass
 
+    def drawingsHash(self, imageName: str) -> str:
+        """
+        A stable hash of the content of the drawings associated with
+        `imageName`, or `None` if the image has no drawings.
+        """
+        try:
+            return self._drawingHashes[imageName]
+        except KeyError:
+            pass
+
+        try:
+            drawings = self._transectData[imageName]["drawings"]
+        except KeyError:
+            return None
+
+        self._drawingHashes[imageName] = contentHash(drawings)
+        return self._drawingHashes[imageName]
+
     def imageHasDrawings(self, imageName: str, otherDrawings: DrawingDataList):
         """
         Compares the drawings associated with `imageName`,
@@ -98,19 +176,12 @@ class TransectData:
         """
 
         # Check if image has no drawings or data
-        if imageName not in self._transectData.keys():
-            return False
-
-        # Check if image has no drawings
-        if "drawings" not in self._transectData[imageName].keys():
+        savedHash = self.drawingsHash(imageName)
+        if savedHash is None:
             return False
 
         # Check if image drawings are the same as the input
-        # also lol TODO stop this maddness
-        drawings = DrawingDataList.loads(
-            json.dumps(self._transectData[imageName]["drawings"])
-        )
-        return drawings == otherDrawings
+        return savedHash == contentHash(otherDrawings.toDict())
 
     def drawings(self):
         """
@@ -122,57 +193,146 @@ class TransectData:
             if "drawings" in imageData.keys():
                 yield imageName, DrawingDataList.load(imageData["drawings"])
 
+    def _indexImage(self, imageName: str):
+        """
+        Adds the counts of `imageName` to the aggregate index.
+        """
+        counts = []
+        for drawing in self._transectData[imageName].get("drawings", []):
+            countData = CountData.fromDict(drawing["CountData"])
+            if not countData.isEmpty():
+                counts.append(countData)
+
+        self._imageCounts[imageName] = counts
+        if counts:
+            self._numCountedImages += 1
+        for countData in counts:
+            self._speciesEntries[countData.species] += 1
+            if not countData.isDuplicate:
+                self._speciesTotals[countData.species] += countData.number
+
+    def _unindexImage(self, imageName: str):
+        """
+        Removes the counts of `imageName` from the aggregate index.
+        The image keeps its place in the index, without any counts.
+        """
+        counts = self._imageCounts.get(imageName, [])
+        if counts:
+            self._numCountedImages -= 1
+        for countData in counts:
+            self._speciesEntries[countData.species] -= 1
+            if not countData.isDuplicate:
+                self._speciesTotals[countData.species] -= countData.number
+        self._imageCounts[imageName] = []
+
     def imageCounts(self):
         """
         Generator yielding tuple of images
         and their counts.
         (imageName:str, counts:CountData)
         """
-        for imageName, imageData in self._transectData.items():
-            if "drawings" in imageData.keys():
-                drawings = imageData["drawings"]
-                for drawing in drawings:
-                    countData = CountData.fromDict(drawing["CountData"])
-                    if not countData.isEmpty():
-                        yield imageName, countData
+        for imageName, counts in self._imageCounts.items():
+            for countData in counts:
+                yield imageName, countData
+
+    def countsOfImage(self, imageName: str) -> List[CountData]:
+        """
+        The counts of a single image. Empty if the image has none.
+        """
+        return self._imageCounts.get(imageName, [])
+
+    def speciesTotals(self) -> Dict[str, int]:
+        """
+        The number of animals of each species, excluding those
+        marked as "duplicates".
+        """
+        return {
+            species: self._speciesTotals[species] for species in self.uniqueSpecies()
+        }
 
     def uniqueSpecies(self):
         """
         Returns a list of all the different species in this save file
         """
-        species = []
-        for _, countData in self.imageCounts():
-            if countData.species not in species:
-                species.append(countData.species)
-        return species
+        return [species for species, n in self._speciesEntries.items() if n > 0]
+
+    def numSpecies(self) -> int:
+        """
+        The number of different species in this save file
+        """
+        return len(self.uniqueSpecies())
 
     def uniqueAnimals(self):
         """
         Returns a list of the animals in this data set, excluding those
         marked as "duplicates". The length of this list is the total number of animals counted
-        in this data set.
+        in this data set. Use `numUniqueAnimals` if only the length is needed.
         """
-        animals = []
-        for _, countData in self.imageCounts():
-            if not countData.isDuplicate:
-                animals.extend([countData.species] * countData.number)
-        return animals
+        return list(self._speciesTotals.elements())
+
+    def numUniqueAnimals(self) -> int:
+        """
+        The total number of animals counted in this data set,
+        excluding those marked as "duplicates".
+        """
+        return sum(self._speciesTotals.values())
 
     def uniqueImages(self):
         """
         Returns a list of unique images in this data set.
         """
-        imageNames = []
-        for imageName, _ in self.imageCounts():
-            if imageName not in imageNames:
-                imageNames.append(imageName)
-        return imageNames
+        return [imageName for imageName, counts in self._imageCounts.items() if counts]
+
+    def numImages(self) -> int:
+        """
+        The number of images in this data set with at least one count.
+        """
+        return self._numCountedImages
 
     def __repr__(self):
         return f"TransectData({super().__repr__()})"
 
     def sorted(self):
-        """Sort by key values (image names)"""
-        return TransectData(
-            dict(sorted(self._transectData.items(), key=lambda t: t[0])), self.fp
-        )
+        """
+        A copy of this save data, sorted by key values (image names).
+        """
+        return self._copy(sorted(self._transectData.keys()))
+
+    def copy(self):
+        """
+        A copy of this save data that can be changed
+        without changing this one.
+        """
+        data = self._copy(self._transectData.keys())
+        data._fileHash = self._fileHash
+        return data
+
+    def _copy(self, imageNames):
+        """
+        A copy of this save data with its images in the order of `imageNames`.
+        Each image's data is copied, so either one can be changed without
+        changing the other. The counts are already indexed, so the index is
+        copied rather than re-parsed.
+        """
+        data = TransectData({}, self.fp)
+        data._transectData = {
+            imageName: dict(self._transectData[imageName]) for imageName in imageNames
+        }
+        data._imageCounts = {
+            imageName: self._imageCounts[imageName] for imageName in imageNames
+        }
+        data._speciesTotals = self._speciesTotals.copy()
+        data._speciesEntries = self._speciesEntries.copy()
+        data._numCountedImages = self._numCountedImages
+        data._drawingHashes = self._drawingHashes.copy()
+        return data
+
+
+def contentHash(data) -> str:
+    """
+    A stable hash of `data`. Strings are hashed as they are,
+    anything else is hashed by its canonical JSON representation.
+    """
+    if not isinstance(data, str):
+        data = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
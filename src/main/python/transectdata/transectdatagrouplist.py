@@ -1,6 +1,7 @@
+import csv
 from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 from base import config
 from flightinfo import FlightInfo
@@ -18,11 +19,29 @@ class TransectDataGroupList:
     `dataGroups` is a list of `TransectData`
     """
 
-    def __init__(self, dataGroups: List[TransectDataGroup] = []):
+    def __init__(self, dataGroups: List[TransectDataGroup] = None):
+        if dataGroups is None:
+            dataGroups = []
         self.dataGroups: List[TransectDataGroup] = dataGroups
 
-        # Used for internal optimization
+        # Used for internal optimization. These are computed once
+        # and cleared by `invalidate` whenever the data groups change.
         self._groupedDict = None
+        self._imageSummaries = None
+        self._groupSummaries = None
+        self._imageIndexes = None
+        self._groupIndexes = None
+
+    def invalidate(self):
+        """
+        Clears the cached summaries. Call this after changing
+        the data groups or their save data.
+        """
+        self._groupedDict = None
+        self._imageSummaries = None
+        self._groupSummaries = None
+        self._imageIndexes = None
+        self._groupIndexes = None
 
     def load(self, transectDataFile, groupName=None):
         """
@@ -33,51 +52,102 @@ class TransectDataGroupList:
         self.dataGroups.append(
             TransectDataGroup(groupName, TransectData.load(transectDataFile))
         )
-
-    def clipboardText(self):
+        self.invalidate()
+
+    # Columns of the exported count data
+    exportColumns = [
+        "Flight",
+        "Aircraft",
+        "FlightDate",
+        "FlightTime",
+        "Transect",
+        "Image",
+        "Species",
+        "Count",
+        "IsDuplicate",
+        "CountNotes",
+        "User",
+        "FlightNotes",
+    ]
+
+    def exportRows(self, progress=None):
         """
-        Returns a string that can be copied and pasted into excel/notepad
+        Generator yielding a row (list of str) for each count,
+        in the order of `exportColumns`. Rows are produced one at a time,
+        so exporting a large library does not build the whole table in memory.
+
+        If `progress` is passed in, it is emitted after each save group.
         """
-        s = "Flight\tAircraft\tFlightDate\tFlightTime\tTransect\tImage\tSpecies\tCount\tIsDuplicate\tCountNotes\tUser\tFlightNotes"
 
-        for saveGroup in self.dataGroups:
-            datafp = saveGroup.saveData.fp  # data.transect file path
+        # Read the settings once, rather than for every row
+        libraryDirectory = Path(config.libraryDirectory)
+        username = config.username
+
+        # Flight metadata is shared by all the transects of a flight
+        flightInfos: Dict[str, FlightInfo] = {}
+
+        numGroups = len(self.dataGroups)
+        for i, saveGroup in enumerate(self.dataGroups):
+            datafp = Path(saveGroup.saveData.fp)  # data.transect file path
 
             # Extract flight folder and transect folder
-            rel = datafp.relative_to(config.libraryDirectory)
+            rel = datafp.relative_to(libraryDirectory)
             flight = rel.parts[0]
             transect = rel.parts[1]
 
             # Extract metadata info
-            metadataFile: Path = config.flightMetaFile(
-                Path(config.libraryDirectory) / flight
-            )
-            if metadataFile.exists():
-                flightInfo = FlightInfo.readInfoFile(metadataFile)
-            else:
-                flightInfo = FlightInfo("", "", "", "")
-
-            # Remove invalid characters from strings
-            invalidCharacters = ["\t", "\n", "\r"]
+            try:
+                flightInfo = flightInfos[flight]
+            except KeyError:
+                flightInfo = readFlightInfo(libraryDirectory / flight)
+                flightInfos[flight] = flightInfo
 
-            # Combine into string
+            flightInfoNotes = removeInvalidCharacters(flightInfo.notes)
             for imageName, countData in saveGroup.saveData.imageCounts():
-                isDuplicate = 1 if countData.isDuplicate else 0
-
-                countDataNotes: str = countData.notes
-                flightInfoNotes: str = flightInfo.notes
+                yield [
+                    flight,
+                    flightInfo.airframe,
+                    flightInfo.date,
+                    flightInfo.time,
+                    transect,
+                    imageName,
+                    countData.species,
+                    str(countData.number),
+                    "1" if countData.isDuplicate else "0",
+                    removeInvalidCharacters(countData.notes),
+                    username,
+                    flightInfoNotes,
+                ]
+
+            if progress is not None:
+                progress.emit(int(((i + 1) / numGroups) * 100))
 
-                # remove line feeds and tabs and stuff
-                for char in invalidCharacters:
-                    countDataNotes = countDataNotes.replace(char, "")
-                    flightInfoNotes = flightInfoNotes.replace(char, "")
+    def clipboardText(self):
+        """
+        Returns a string that can be copied and pasted into excel/notepad
+        """
+        lines = ["\t".join(self.exportColumns)]
+        lines.extend("\t".join(row) for row in self.exportRows())
+        return "\n".join(lines)
 
-                s += (
-                    f"\n{flight}\t{flightInfo.airframe}\t{flightInfo.date}\t{flightInfo.time}"
-                    f"\t{transect}\t{imageName}\t{countData.species}\t{countData.number}"
-                    f"\t{isDuplicate}\t{countDataNotes}\t{config.username}\t{flightInfoNotes}"
-                )
-        return s
+    def writeExport(self, fp, progress=None) -> int:
+        """
+        Writes the count data to the file `fp`, one row at a time.
+        Files ending in .csv are comma separated, anything
+        else is tab separated.
+        Returns the number of counts written.
+        """
+        fp = Path(fp)
+        delimiter = "," if fp.suffix.lower() == ".csv" else "\t"
+
+        numRows = 0
+        with open(fp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(self.exportColumns)
+            for row in self.exportRows(progress=progress):
+                writer.writerow(row)
+                numRows += 1
+        return numRows
 
     def allImages(self) -> list:
         """
@@ -88,52 +158,77 @@ class TransectDataGroupList:
             imageNames.extend(dataGroup.saveData.uniqueImages())
         return imageNames
 
+    def imageSummaries(self) -> List[Tuple[str, str]]:
+        """
+        Returns a list of (imageName, description) for each of the image names
+        in `allImages`. The description lists ALL the animals found in
+        the image with that name.
+        Computed once, in a single pass over the counts.
+        """
+        if self._imageSummaries is not None:
+            return self._imageSummaries
+
+        descriptions = {}
+        for dataGroup in self.dataGroups:
+            for imageName, countData in dataGroup.saveData.imageCounts():
+                s = f"\n   - {countData.number} {countData.species}"
+                if countData.isDuplicate:
+                    s += " (already counted)"
+                try:
+                    descriptions[imageName].append(s)
+                except KeyError:
+                    descriptions[imageName] = [f"{imageName}:", s]
+
+        self._imageSummaries = [
+            (imageName, "".join(descriptions[imageName]))
+            for imageName in self.allImages()
+        ]
+        return self._imageSummaries
+
+    def groupSummaries(self) -> List[Tuple[str, str]]:
+        """
+        Returns a list of (groupName, summary) for each
+        item in the `groupedDict()`
+        """
+        if self._groupSummaries is not None:
+            return self._groupSummaries
+
+        self._groupSummaries = []
+        for groupName, saveDatas in self.groupedDict().items():
+            s = f"{groupName}:"
+            s += f"\n   - {saveDatas.numSpecies()} species"
+            s += f"\n   - {saveDatas.numUniqueAnimals()} unique animals"
+            s += f"\n   - {saveDatas.numImages()} images with animals"
+            self._groupSummaries.append((groupName, s))
+        return self._groupSummaries
+
     def animalsAt(self, idx: int) -> str:
         """
         Returns a string describing ALL the animals found in
         each image at the particular index.
         """
-        imageNames = self.allImages()
-
         try:
-            targetImage = imageNames[idx]
+            return self.imageSummaries()[idx][1]
         except IndexError:
             return f"Error: Image at index {idx} could not be found"
 
-        s = f"{targetImage}:"
-
-        for dataGroup in self.dataGroups:
-            for imageName, countData in dataGroup.saveData.imageCounts():
-                if imageName == targetImage:
-                    # This is the image, make the string to display!
-                    s += f"\n   - {countData.number} {countData.species}"
-                    if countData.isDuplicate:
-                        s += " (already counted)"
-
-        return s
-
     def summaryAt(self, idx: int) -> str:
         """
         Returns a summary of the animals found at a particular item
         in the `groupedDict()`
         """
-        groupName, saveDatas = list(self.groupedDict().items())[idx]
-        s = f"{groupName}:"
-        s += f"\n   - {saveDatas.numSpecies()} species"
-        s += f"\n   - {saveDatas.numUniqueAnimals()} unique animals"
-        s += f"\n   - {len(saveDatas.allImages())} images with animals"
-        return s
+        return self.groupSummaries()[idx][1]
 
     def numSpecies(self):
         num = 0
         for dataGroup in self.dataGroups:
-            num += len(dataGroup.saveData.uniqueSpecies())
+            num += dataGroup.saveData.numSpecies()
         return num
 
     def numUniqueAnimals(self):
         num = 0
         for dataGroup in self.dataGroups:
-            num += len(dataGroup.saveData.uniqueAnimals())
+            num += dataGroup.saveData.numUniqueAnimals()
         return num
 
     def sorted(self):
@@ -148,7 +243,7 @@ class TransectDataGroupList:
         """ The number of images in the save data """
         num = 0
         for dataGroup in self.dataGroups:
-            num += len(dataGroup.saveData.uniqueImages())
+            num += dataGroup.saveData.numImages()
         return num
 
     def groupedDict(self):
@@ -168,7 +263,7 @@ class TransectDataGroupList:
 
             # Only include save files that have at least one count,
             # not just a drawing.
-            if len(dataGroup.saveData.uniqueImages()) == 0:
+            if dataGroup.saveData.numImages() == 0:
                 continue
 
             # Create a dictionary of `TransectDataGroupList` that
@@ -179,6 +274,8 @@ class TransectDataGroupList:
                 d[dataGroup.name] = TransectDataGroupList([dataGroup])
             else:
                 d[dataGroup.name].append(dataGroup)
+
+        self._groupedDict = d
         return d
 
     def isGrouped(self):
@@ -199,22 +296,49 @@ class TransectDataGroupList:
         The index of the first TransectDataGroup with a matching `name`.
         If the name cannot be found, `None` is returned.
         """
-        for i, groupName in enumerate(self.groupedDict().keys()):
-            if groupName == name:
-                return i
-        return None
+        if self._groupIndexes is None:
+            self._groupIndexes = firstIndexes(self.groupSummaries())
+        return self._groupIndexes.get(name)
 
     def indexOfImageName(self, name):
         """
         The index of the first image with a matching `name`.
         """
-        try:
-            return self.allImages().index(name)
-        except ValueError:
-            return None
+        if self._imageIndexes is None:
+            self._imageIndexes = firstIndexes(self.imageSummaries())
+        return self._imageIndexes.get(name)
 
     def append(self, other: object):
         if not isinstance(other, TransectDataGroup):
             raise NotImplementedError()
         else:
             self.dataGroups.append(other)
+            self.invalidate()
+
+
+def firstIndexes(rows: List[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    Maps the name of each (name, description) row
+    to the index of the first row with that name.
+    """
+    indexes = {}
+    for i, (name, _) in enumerate(rows):
+        indexes.setdefault(name, i)
+    return indexes
+
+
+def readFlightInfo(flightFolder: Path) -> FlightInfo:
+    """
+    Reads the flight metadata of the flight in `flightFolder`,
+    or returns blank metadata if there is none.
+    """
+    metadataFile: Path = config.flightMetaFile(flightFolder)
+    if metadataFile.exists():
+        return FlightInfo.readInfoFile(metadataFile)
+    else:
+        return FlightInfo("", "", "", "")
+
+
+def removeInvalidCharacters(s: str) -> str:
+    """ Removes line feeds and tabs and stuff """
+    return s.replace("\t", "").replace("\n", "").replace("\r", "")
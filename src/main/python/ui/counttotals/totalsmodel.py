@@ -1,10 +1,17 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
 from PySide2 import QtCore, QtWidgets
 
-from transectdata import TransectDataGroupList, GetSaveFiles
-from base import config
+from transectdata import (
+    TransectData,
+    TransectDataGroup,
+    TransectDataGroupList,
+    GetSaveFiles,
+)
+from base import QWorker, config
 
 from .enums import UserRoles
 
@@ -14,6 +21,8 @@ class TotalsModel(QtCore.QAbstractListModel):
     loadStarted = QtCore.Signal()
     loadProgress = QtCore.Signal(int)
     loadFinished = QtCore.Signal()
+    exportProgress = QtCore.Signal(int)
+    exportFinished = QtCore.Signal()
 
     def __init__(self):
         super().__init__()
@@ -22,15 +31,33 @@ class TotalsModel(QtCore.QAbstractListModel):
         self._parentDir = None
         self.inTransect = False
 
+        # (name, display text) of each row, computed when the data is reset
+        self._rows: List[Tuple[str, str]] = []
+
+        # The directory of the most recent `readDirectory`. `_parentDir`
+        # only changes once that directory has finished loading.
+        self._requestedDir = None
+        self._loadGeneration = 0
+        self._updatesDuringLoad: List[TransectData] = []
+        self._loading = False
         self._loadWorker = None
+        self._exportWorker = None
         self._threadpool = QtCore.QThreadPool()
 
+        # Watch the loaded save files for changes made outside of this
+        # model. Changes are collected and handled together after a short
+        # delay, and only files whose (mtime, size) changed are re-read.
+        self._fileStats: Dict[str, Tuple[float, int]] = {}
+        self._changedFiles = set()
+        self._watcher = QtCore.QFileSystemWatcher()
+        self._watcher.fileChanged.connect(self._saveFileChanged)
+        self._watchTimer = QtCore.QTimer(singleShot=True)
+        self._watchTimer.setInterval(config.totalsWatchDelay)
+        self._watchTimer.timeout.connect(self._reloadChangedFiles)
+
     def rowCount(self, index=QtCore.QModelIndex()):
         """ Returns the number of rows the model holds. """
-        if self.inTransect:
-            return self._data.numImages()
-        else:
-            return len(self._data.groupedDict())
+        return len(self._rows)
 
     def data(self, index, role=QtCore.Qt.DisplayRole):
         """
@@ -40,22 +67,17 @@ class TotalsModel(QtCore.QAbstractListModel):
         if not index.isValid():
             return None
 
-        if index.row() < 0:
+        if index.row() < 0 or index.row() >= len(self._rows):
             return None
 
+        name, text = self._rows[index.row()]
+
         if role == QtCore.Qt.DisplayRole:
-            if self.inTransect:
-                return self._data.animalsAt(index.row())
-            else:
-                return self._data.summaryAt(index.row())
+            return text
 
         if role == UserRoles.AbsolutePath:
-            if self.inTransect:
-                _folderName = self._data.allImages()[index.row()]
-            else:
-                _folderName = list(self._data.groupedDict().keys())[index.row()]
+            return str(Path(self._parentDir) / name)
 
-            return str(Path(self._parentDir) / _folderName)
         return None
 
     def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
@@ -77,11 +99,15 @@ class TotalsModel(QtCore.QAbstractListModel):
         )
 
     def refresh(self):
-        self.readDirectory(self._parentDir)
+        self.readDirectory(self._requestedDir)
 
     def readDirectory(self, fp):
-        """ Populates model from directory. `fp`: any Path()-able type"""
-        self._parentDir = str(fp)
+        """
+        Populates model from directory. `fp`: any Path()-able type
+
+        The save files are found and parsed on a worker. The current
+        data stays visible until the new data is ready.
+        """
         fp = Path(fp)
 
         # Error checks
@@ -90,56 +116,268 @@ class TotalsModel(QtCore.QAbstractListModel):
         if not fp.is_dir():
             raise ValueError(f"Can only read from dir, not file: {fp}")
 
-        # If the .marked/ folder exists, this is a single transect
-        if config.markedFolder(transectFolder=fp).exists():
+        self._requestedDir = str(fp)
+        self._updatesDuringLoad = []
+
+        # Each load gets a new generation, so a slow load of a folder
+        # the user has already navigated away from is discarded.
+        self._loadGeneration += 1
+        generation = self._loadGeneration
+
+        worker = QWorker(readTransectDataGroups, [fp])
+        worker.includeProgress()
+        worker.signals.progress.connect(self._loadProgressed(generation))
+        worker.signals.result.connect(self._loadResult(generation, str(fp)))
+        worker.signals.finished.connect(self._loadEnded(generation))
+        self._loadWorker = worker
+        self._loading = True
+
+        self.loadStarted.emit()
+        self._threadpool.start(worker)
+
+    def _loadProgressed(self, generation):
+        def emitProgress(value):
+            if generation == self._loadGeneration:
+                self.loadProgress.emit(value)
+
+        return emitProgress
+
+    def _loadResult(self, generation, fp):
+        def setResult(result):
+            if generation == self._loadGeneration:
+                self._loading = False
+                self._parentDir = fp
+                self.inTransect, data, fileStats = result
+                self._resetData(data)
+                self._watchFiles(fileStats)
+
+                # Data that changed while loading may be newer
+                # than what was read from disk
+                updates, self._updatesDuringLoad = self._updatesDuringLoad, []
+                for update in updates:
+                    self.updateTransectData(update)
+
+        return setResult
+
+    def _loadEnded(self, generation):
+        def finish():
+            if generation == self._loadGeneration:
+                self._loading = False
+                self._loadWorker = None
+                self.loadFinished.emit()
+
+        return finish
+
+    def updateTransectData(self, data: TransectData):
+        """
+        Replaces the save data of a single transect with `data`, without
+        reading anything from disk. Data of transects outside of the
+        directory being shown is ignored.
+        """
+        if self._loading:
+            self._updatesDuringLoad.append(data)
 
-            self.inTransect = True
+        if self._parentDir is None or data.fp is None:
+            return
 
-            # If the save file exists, read it
-            saveFile = config.markedDataFile(transectFolder=fp)
-            if saveFile.exists():
-                saveDatas = TransectDataGroupList([])
-                saveDatas.load(saveFile)
-                self._resetData(saveDatas)
-            else:
-                self._resetData(TransectDataGroupList())
+        saveFile = Path(data.fp)
+        transectFolder = saveFile.parent.parent
+        parentDir = Path(self._parentDir)
 
-        # Otherwise, try to find all .marked/ folders within this dir
+        if self.inTransect:
+            if transectFolder != parentDir:
+                return
+            groupName = None
+        else:
+            # Groups are named after the top level folder they are in
+            try:
+                groupName = transectFolder.relative_to(parentDir).parts[0]
+            except (ValueError, IndexError):
+                return
+
+        # Replace the data of this transect, or add it if it is new
+        dataGroups = self._data.dataGroups
+        for dataGroup in dataGroups:
+            if Path(dataGroup.saveData.fp) == saveFile:
+                dataGroup.saveData = data.sorted()
+                break
         else:
+            dataGroups.append(TransectDataGroup(groupName, data.sorted()))
+            if not self.inTransect:
+                dataGroups.sort(key=lambda dg: dg.name)
+
+        self._data.invalidate()
+        self._updateRows()
 
-            self.inTransect = False
+    def _updateRows(self):
+        """
+        Recomputes the rows after the data changed. If the same rows
+        are still there only their text is updated, so the view
+        keeps its selection and scroll position.
+        """
+        rows = self._computeRows()
+        if [name for name, _ in rows] != [name for name, _ in self._rows]:
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+        elif rows:
+            self._rows = rows
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._rows) - 1, 0),
+                [QtCore.Qt.DisplayRole],
+            )
+
+    def _removeSaveFile(self, saveFile: Path):
+        """
+        Removes the data that was read from `saveFile`.
+        """
+        dataGroups = self._data.dataGroups
+        for dataGroup in dataGroups:
+            if Path(dataGroup.saveData.fp) == saveFile:
+                dataGroups.remove(dataGroup)
+                self._data.invalidate()
+                self._updateRows()
+                return
+
+    def _watchFiles(self, fileStats: Dict[str, Tuple[float, int]]):
+        """
+        Watches the save files in `fileStats`, which maps each
+        save file to its (mtime, size) when it was read.
+        Any previously watched files are no longer watched.
+        """
+        self._watchTimer.stop()
+        self._changedFiles = set()
+        files = self._watcher.files()
+        if files:
+            self._watcher.removePaths(files)
 
-            filesToLoad: List[Tuple[str, Path]] = GetSaveFiles(fp)
-            if filesToLoad:
-                newTransectDataGroupList = self._loadFiles(filesToLoad)
-            else:
-                newTransectDataGroupList = TransectDataGroupList([])
-            self._resetData(newTransectDataGroupList)
+        self._fileStats = dict(fileStats)
+        if self._fileStats:
+            self._watcher.addPaths(list(self._fileStats.keys()))
 
-    def _loadFiles(self, filesToLoad: List[Tuple[str, Path]]):
+    def recordSave(self, fp):
+        """
+        Notes that the save file `fp` was just written by this app,
+        and its data is already known. The next change notification
+        for it will not cause it to be read again.
         """
-        Loads files from `filesToLoad` list of (topLevelGroup, fp)
+        key = str(fp)
+        if key not in self._fileStats:
+            return
+        stat = fileStat(key)
+        if stat is not None:
+            self._fileStats[key] = stat
+
+    @QtCore.Slot(str)
+    def _saveFileChanged(self, fp):
+        self._changedFiles.add(fp)
+        self._watchTimer.start()
+
+    @QtCore.Slot()
+    def _reloadChangedFiles(self):
         """
-        saveDatas = TransectDataGroupList([])
-        for topLevel, saveFile in filesToLoad:
-            saveDatas.load(saveFile, groupName=topLevel)
-        return saveDatas
+        Reads the watched save files that changed on disk
+        and merges them into the loaded data.
+        """
+        changedFiles, self._changedFiles = self._changedFiles, set()
+
+        filesToLoad = []
+        for fp in changedFiles:
+
+            # Files that are replaced (rather than written in place)
+            # are no longer watched, so watch them again.
+            stat = fileStat(fp)
+            if stat is None:
+                self._fileStats.pop(fp, None)
+                self._removeSaveFile(Path(fp))
+                continue
+            if fp not in self._watcher.files():
+                self._watcher.addPath(fp)
+
+            if stat != self._fileStats.get(fp):
+                filesToLoad.append(fp)
+
+        if not filesToLoad:
+            return
+
+        worker = QWorker(readSaveFiles, [filesToLoad])
+        worker.signals.result.connect(self._mergeSaveFiles(self._loadGeneration))
+        self._threadpool.start(worker)
+
+    def _mergeSaveFiles(self, generation):
+        def merge(result):
+            # The files were read for a folder that is no longer shown
+            if generation != self._loadGeneration:
+                return
+            for fp, stat, data in result:
+                self._fileStats[fp] = stat
+                self.updateTransectData(data)
+
+        return merge
 
     def _resetData(self, data: TransectDataGroupList):
+        """ `data` should already be sorted """
         self.beginResetModel()
-        self._data = data.sorted()
+        self._data = data
+        self._rows = self._computeRows()
         self.endResetModel()
 
+    def _computeRows(self):
+        """
+        Computes the row table, so that rows are not re-computed
+        from the data each time they are displayed.
+        """
+        if self.inTransect:
+            return self._data.imageSummaries()
+        else:
+            return self._data.groupSummaries()
+
     def export(self):
-        """ Exports all data. Rn just copies data to clipboard. """
-        clipboard = QtWidgets.QApplication.instance().clipboard()
-        txt = self._data.clipboardText()
-        clipboard.setText(txt)
+        """
+        Exports all data to a tab or comma separated file
+        chosen by the user. The file is written in the background.
+        """
+        fp, _ = QtWidgets.QFileDialog.getSaveFileName(
+            None,
+            "Export Counts",
+            str(Path(config.libraryDirectory) / "counts.txt"),
+            "Tab separated (*.txt *.tsv);;Comma separated (*.csv)",
+        )
+        if not fp:
+            return
+
+        # Export the counts as they are shown, including those that aren't
+        # saved yet. The data groups are copied, so the model can change
+        # while the file is written.
+        data = TransectDataGroupList(
+            [TransectDataGroup(dg.name, dg.saveData) for dg in self._data.dataGroups]
+        )
+        worker = QWorker(data.writeExport, [fp])
+
+        worker.includeProgress()
+        worker.signals.progress.connect(self.exportProgress.emit)
+        worker.signals.result.connect(lambda n: self._exportSucceeded(fp, n))
+        worker.signals.error.connect(self._exportFailed)
+        worker.signals.finished.connect(self.exportFinished.emit)
+        worker.signals.finished.connect(self._resetExportWorker)
+        self._exportWorker = worker
+        self._threadpool.start(worker)
+
+    def _resetExportWorker(self):
+        self._exportWorker = None
+
+    def _exportSucceeded(self, fp, numRows):
         QtWidgets.QMessageBox.information(
             self.parent(),
-            "Copied!",
-            "Count information copied to the clipboard!"
-            "\nPaste into Excel or a notepad to view it.",
+            "Exported!",
+            f"{numRows} counts exported to:\n{fp}"
+            "\nOpen it in Excel or a notepad to view it.",
+        )
+
+    def _exportFailed(self, error):
+        QtWidgets.QMessageBox.warning(
+            self.parent(), "Export failed", f"Counts could not be exported: {error[1]}"
         )
 
     def indexOfName(self, name):
@@ -152,3 +390,92 @@ class TotalsModel(QtCore.QAbstractListModel):
         if row is not None:
             return self.index(row, 0)
         return None
+
+
+def readTransectDataGroups(fp: Path, maxWorkers=None, progress=None):
+    """
+    Finds and parses all the save data in the folder `fp`,
+    reading the save files in parallel.
+
+    Returns a tuple (inTransect, data, fileStats) where `inTransect` is
+    `True` if `fp` is a single transect, `data` is the sorted
+    `TransectDataGroupList`, with its summaries computed, and `fileStats`
+    maps each save file read to its (mtime, size).
+    """
+    fp = Path(fp)
+    if maxWorkers is None:
+        maxWorkers = min(8, os.cpu_count() or 1)
+
+    # If the .marked/ folder exists, this is a single transect
+    inTransect = config.markedFolder(transectFolder=fp).exists()
+    if inTransect:
+        saveFile = config.markedDataFile(transectFolder=fp)
+        filesToLoad = [(None, saveFile)] if saveFile.exists() else []
+
+    # Otherwise, try to find all .marked/ folders within this dir
+    else:
+        filesToLoad: List[Tuple[str, Path]] = GetSaveFiles(fp)
+
+    # Finding the files is counted as the first 10%
+    if progress is not None:
+        progress.emit(10)
+
+    dataGroups = [None] * len(filesToLoad)
+    fileStats = {}
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = {
+            executor.submit(_statAndLoad, saveFile): i
+            for i, (_, saveFile) in enumerate(filesToLoad)
+        }
+        for n, future in enumerate(as_completed(futures)):
+            i = futures[future]
+            groupName, saveFile = filesToLoad[i]
+            stat, saveData = future.result()
+            dataGroups[i] = TransectDataGroup(groupName, saveData)
+            fileStats[str(saveFile)] = stat
+            if progress is not None:
+                progress.emit(10 + int(((n + 1) / len(filesToLoad)) * 90))
+
+    data = TransectDataGroupList(dataGroups).sorted()
+
+    # Compute the rows here rather than on the GUI thread
+    if inTransect:
+        data.imageSummaries()
+    else:
+        data.groupSummaries()
+
+    return inTransect, data, fileStats
+
+
+def readSaveFiles(files: List[str]):
+    """
+    Reads each save file in `files`.
+    Returns a list of (fp, (mtime, size), TransectData).
+    Files that no longer exist are left out.
+    """
+    result = []
+    for fp in files:
+        try:
+            stat, saveData = _statAndLoad(fp)
+        except FileNotFoundError:
+            continue
+        result.append((fp, stat, saveData))
+    return result
+
+
+def fileStat(fp) -> Tuple[float, int]:
+    """ The (mtime, size) of `fp`, or `None` if it does not exist """
+    try:
+        stat = os.stat(fp)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def _statAndLoad(fp):
+    """
+    The file is stat-ed before it is read, so a change made while
+    reading it is seen as a change later.
+    """
+    stat = os.stat(fp)
+    return (stat.st_mtime, stat.st_size), TransectData.load(fp)
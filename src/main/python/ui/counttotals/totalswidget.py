@@ -5,6 +5,7 @@ from PySide2 import QtCore, QtWidgets
 from base import ctx, config
 from transectdata import TransectData
 
+from ..progressbar import QAbsoluteProgressBar
 from .totalsview import TotalsView
 
 
@@ -22,6 +23,18 @@ class CountTotals(QtWidgets.QWidget):
         self.totalsView.fileActivated.connect(self.fileActivated.emit)
         self.totalsView.selectedFilesChanged.connect(self.selectedFilesChanged.emit)
 
+        # Totals are loaded in the background, show the progress over the view
+        self.progressBar = QAbsoluteProgressBar(self.totalsView)
+        model = self.totalsView.model()
+        model.loadProgress.connect(self.progressBar.setValue)
+        model.loadFinished.connect(self._loadFinished)
+        model.exportProgress.connect(self.progressBar.setValue)
+        model.exportFinished.connect(lambda: self.progressBar.setValue(0))
+
+        # The file last selected, so it can be selected again
+        # once the totals have loaded
+        self._selectedFile = None
+
         # Export Action
         self.exportAction = QtWidgets.QAction(
             ctx.icon("icons/excel.png"), "Export", self
@@ -31,7 +44,7 @@ class CountTotals(QtWidgets.QWidget):
         exportButton.setIconSize(QtCore.QSize(*config.toolbuttonSize))
         exportButton.setDefaultAction(self.exportAction)
         exportButton.setToolTip(
-            "Copies data to clipboard. Paste data into Excel (or any text editor)"
+            "Exports data to a file. Open it in Excel (or any text editor)"
         )
 
         # Refresh Action
@@ -69,7 +82,15 @@ class CountTotals(QtWidgets.QWidget):
 
     @QtCore.Slot(TransectData)
     def setTransectData(self, data):
-        self.totalsView.model().refresh()
+        self.totalsView.model().updateTransectData(data)
+
+    @QtCore.Slot(TransectData)
+    def recordSave(self, data):
+        """
+        Notes that `data` was just saved, so the totals
+        do not read it back in from disk.
+        """
+        self.totalsView.model().recordSave(data.fp)
 
     @QtCore.Slot()
     def refresh(self):
@@ -80,4 +101,11 @@ class CountTotals(QtWidgets.QWidget):
 
     @QtCore.Slot(str)
     def selectFile(self, fp: str):
+        self._selectedFile = fp
         self.totalsView.selectFile(fp)
+
+    @QtCore.Slot()
+    def _loadFinished(self):
+        self.progressBar.setValue(0)
+        if self._selectedFile is not None:
+            self.totalsView.selectFile(self._selectedFile)
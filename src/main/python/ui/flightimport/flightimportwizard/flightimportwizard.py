@@ -23,6 +23,7 @@ class FlightImportWizard(QtWidgets.QWizard):
         introPage = IntroPage(self)
         parametersPage = ParametersPage(self)
         reviewPage = ReviewPage(self)
+        self._reviewPage = reviewPage
         metadataPage = MetadataPage(self)
         setLibraryPage = SetLibraryPage(self)
         conclusionPage = ConclusionPage(self)
@@ -51,6 +52,15 @@ class FlightImportWizard(QtWidgets.QWizard):
         except AttributeError:
             pass
 
+    def done(self, result):
+        """
+        Stops categorizing and copying (if they are still running)
+        when the wizard is closed.
+        """
+        self._reviewPage.model.cancelRead()
+        self._reviewPage.model.cancelCopy()
+        super().done(result)
+
     @staticmethod
     def openNew():
         """
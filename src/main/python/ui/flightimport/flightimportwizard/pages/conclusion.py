@@ -21,8 +21,10 @@ class ConclusionPage(QtWidgets.QWizardPage):
         self._model = None
         self._flightInfoForm = None
 
-        # Flag to determine when copying has completed
+        # Flags to determine when copying has completed, and whether it failed
+        # (or was cancelled)
         self._copyFinished = False
+        self._copyFailed = False
 
     @QtCore.Slot(TransectTableModel)
     def updateModel(self, model):
@@ -30,6 +32,9 @@ class ConclusionPage(QtWidgets.QWizardPage):
             self._model = model
             self._model.copyProgress.connect(self.progressBar.setValue)
             self._model.copyComplete.connect(self._copyComplete)
+            self._model.copyError.connect(self._copyError)
+            self._model.copyResult.connect(self._copyResult)
+            self._model.copyCancelled.connect(self._copyCancelled)
 
     @QtCore.Slot(FlightInfoForm)
     def updateFlightInfo(self, flightInfoForm: FlightInfoForm):
@@ -40,6 +45,9 @@ class ConclusionPage(QtWidgets.QWizardPage):
 
         # Initally the copying has not finished
         self._copyFinished = False
+        self._copyFailed = False
+        self.setTitle("Copying...")
+        self.setSubTitle("")
 
         # Ensure model is here
         model = self._model
@@ -56,7 +64,9 @@ class ConclusionPage(QtWidgets.QWizardPage):
         flightPath.mkdir(exist_ok=True)
 
         # Copy files on other thread
-        self._model.copyTransects(flightPath)
+        self._model.copyTransects(
+            flightPath, createThumbnails=self.field("createThumbnails")
+        )
 
         # Write out flight import meta data
         self._flightInfoForm.save(flightPath)
@@ -64,12 +74,55 @@ class ConclusionPage(QtWidgets.QWizardPage):
     @QtCore.Slot()
     def _copyComplete(self):
 
-        self.setTitle("Copying... Complete")
+        if not self._copyFailed:
+            self.setTitle("Copying... Complete")
 
         # Tell the page that it is complete so it can update the correct buttons.
         self._copyFinished = True
         self.completeChanged.emit()
 
+    @QtCore.Slot(tuple)
+    def _copyResult(self, result):
+        numCopied, numSkipped, mbps = result
+        subTitle = f"Copied {numCopied} images"
+        if numCopied > 0 and mbps > 0:
+            subTitle += f" at {mbps:.1f} MB/s"
+        subTitle += "."
+        if numSkipped > 0:
+            subTitle += (
+                f" {numSkipped} images were already in the flight,"
+                " so they were not copied again."
+            )
+        self.setSubTitle(subTitle)
+
+    @QtCore.Slot(tuple)
+    def _copyError(self, e):
+        self._copyFailed = True
+        self.setTitle("Copying... Error")
+
+        QtWidgets.QMessageBox.warning(
+            self.parent(),
+            "Sorry, I encountered an error while copying!",
+            f"{e[1]}\n\n"
+            "Run the import again with the same settings to resume it: "
+            "images that were copied will not be copied again.",
+        )
+
+    @QtCore.Slot()
+    def _copyCancelled(self):
+        self._copyFailed = True
+        self.setTitle("Copying... Cancelled")
+        self.setSubTitle(
+            "Run the import again with the same settings to resume it: "
+            "images that were copied will not be copied again."
+        )
+
+    def cleanupPage(self):
+        # Going back: stop copying
+        if self._model is not None:
+            self._model.cancelCopy()
+        super().cleanupPage()
+
     def isComplete(self):
         return self._copyFinished
 
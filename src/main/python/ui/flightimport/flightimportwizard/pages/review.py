@@ -93,6 +93,11 @@ class ReviewPage(QtWidgets.QWizardPage):
         self.model.clearData()
         self.model.readFolder(folder, maxDelay, minCount)
 
+    def cleanupPage(self):
+        # Going back: stop categorizing, the parameters may change
+        self.model.cancelRead()
+        super().cleanupPage()
+
     def nextId(self):
         return PageIds.Page_Metadata
 
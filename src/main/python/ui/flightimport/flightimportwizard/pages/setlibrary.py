@@ -21,6 +21,10 @@ class SetLibraryPage(QtWidgets.QWizardPage):
         )
         self.flightFolderBox = QtWidgets.QLineEdit("Flight XX")
         self.flightFolderBox.setValidator(FileNameValidator())
+        self.flightFolderBox.setToolTip(
+            "If the folder already exists, only the images\n"
+            "that aren't in it yet are added to it."
+        )
         self.registerField("flightFolder", self.flightFolderBox)
 
         # import to this path
@@ -41,12 +45,22 @@ class SetLibraryPage(QtWidgets.QWizardPage):
         self.browse.clicked.connect(self._chooseImportFolder)
         self.registerField("libFolder", self.pathEdit)
 
+        # make thumbnails while copying
+        self.thumbnailsBox = QtWidgets.QCheckBox("Make thumbnails while copying")
+        self.thumbnailsBox.setToolTip(
+            "Images open much faster the first time a transect is viewed,\n"
+            "but copying takes a little longer."
+        )
+        self.thumbnailsBox.setChecked(config.createThumbnails)
+        self.registerField("createThumbnails", self.thumbnailsBox)
+
         layout = QtWidgets.QGridLayout()
         layout.addWidget(self.flightFolderLabel, 0, 0, 1, 3)
         layout.addWidget(self.flightFolderBox, 0, 1, 1, 2)
         layout.addWidget(self.pathLabel, 1, 0)
         layout.addWidget(self.pathEdit, 1, 1)
         layout.addWidget(self.browse, 1, 2)
+        layout.addWidget(self.thumbnailsBox, 2, 0, 1, 3)
         layout.setColumnMinimumWidth(0, self.flightFolderLabel.minimumWidth())
         self.setLayout(layout)
 
@@ -68,5 +82,8 @@ class SetLibraryPage(QtWidgets.QWizardPage):
         if not folder == "":
             self.pathEdit.setText(folder)
 
+    def _saveDefaults(self):
+        config.createThumbnails = self.thumbnailsBox.isChecked()
+
     def nextId(self):
         return PageIds.Page_Conclusion
@@ -1,5 +1,12 @@
+from .segmenter import StreamingSegmenter, TransectSegmenter
 from .transect import Transect
 from .transectmodel import TransectTableModel
 from .transectview import TransectTableView
 
-__all__ = [Transect, TransectTableModel, TransectTableView]
+__all__ = [
+    Transect,
+    StreamingSegmenter,
+    TransectSegmenter,
+    TransectTableModel,
+    TransectTableView,
+]
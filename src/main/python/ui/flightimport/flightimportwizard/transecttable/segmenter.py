@@ -0,0 +1,86 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Tuple
+
+from .transect import Transect
+
+
+class TransectSegmenter:
+    """
+    Splits a set of images into transects by the time they were taken.
+
+    The images are sorted by capture time and the gaps between them are
+    computed once, so segmenting again with other parameters doesn't need
+    the images (or their EXIF data) to be read again.
+    """
+
+    def __init__(self, imageTimes: Iterable[Tuple[Path, datetime]]):
+        """
+        `imageTimes` is an iterable of (path, time the image was taken).
+        Images taken at the same time are ordered by path.
+        """
+        ordered = sorted(imageTimes, key=lambda item: (item[1], item[0]))
+        self.files: List[Path] = [fp for fp, _ in ordered]
+
+        # gaps[i] is the number of seconds between files[i] and files[i + 1]
+        times = [dt for _, dt in ordered]
+        self.gaps: List[float] = [
+            (later - earlier).total_seconds()
+            for earlier, later in zip(times, times[1:])
+        ]
+
+    def __len__(self):
+        return len(self.files)
+
+    def segment(self, maxDelay, minCount) -> List[Transect]:
+        """
+        The transects in which no two consecutive images were taken more than
+        `maxDelay` seconds apart, dropping those with fewer than `minCount` images.
+        """
+        if not self.files:
+            return []
+
+        # A transect starts at the first image and after each gap that is too long
+        starts = [0] + [i + 1 for i, gap in enumerate(self.gaps) if gap > maxDelay]
+        ends = starts[1:] + [len(self.files)]
+
+        return [
+            Transect(files=self.files[start:end])
+            for start, end in zip(starts, ends)
+            if end - start >= minCount
+        ]
+
+
+class StreamingSegmenter:
+    """
+    Splits images into transects as they are read, assuming they are read
+    in the order they were taken. Each transect is passed to `transectClosed`
+    as soon as the gap after it shows it is complete.
+
+    The transects are provisional: images read out of order can split or
+    join them differently than `TransectSegmenter`, which has the final say.
+    """
+
+    def __init__(self, maxDelay, minCount, transectClosed: Callable[[Transect], None]):
+        self.maxDelay = maxDelay
+        self.minCount = minCount
+        self.transectClosed = transectClosed
+
+        self._files: List[Path] = []
+        self._lastTime: datetime = None
+
+    def add(self, fp: Path, dt: datetime):
+        """ Adds the image `fp`, taken at `dt` """
+        if self._lastTime is not None:
+            gap = (dt - self._lastTime).total_seconds()
+            if gap > self.maxDelay or gap < 0:
+                self.close()
+        self._files.append(fp)
+        self._lastTime = dt
+
+    def close(self):
+        """ Ends the current transect. Call this after the last image. """
+        if len(self._files) >= self.minCount:
+            self.transectClosed(Transect(files=self._files))
+        self._files = []
+        self._lastTime = None
@@ -1,7 +1,7 @@
 class Transect:
-    def __init__(self, name="Transect", files=[]):
+    def __init__(self, name="Transect", files=None):
         self.name = name
-        self.files = files
+        self.files = files if files is not None else []
 
     @property
     def numFiles(self):
@@ -1,14 +1,29 @@
-import glob
-import shutil
+import os
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime
-
-from PIL import Image
 
 from PySide2 import QtCore
 
 from base import config, QWorker
-
+from tools import (
+    ImageMetadataCache,
+    FingerprintIndex,
+    ReadMeter,
+    copyFileVerified,
+    createThumbnail,
+    fileFingerprints,
+    fileHash,
+    hasThumbnail,
+    readImagesMetadata,
+    readOrder,
+    walkFiles,
+    writeImageMetadata,
+)
+
+from .segmenter import StreamingSegmenter, TransectSegmenter
 from .transect import Transect
 
 
@@ -16,11 +31,15 @@ class TransectTableModel(QtCore.QAbstractTableModel):
 
     copyProgress = QtCore.Signal(int)
     copyComplete = QtCore.Signal()
+    copyError = QtCore.Signal(tuple)
+    copyResult = QtCore.Signal(tuple)  # (numCopied, numSkipped, MB/s)
+    copyCancelled = QtCore.Signal()
 
     categorizeProgress = QtCore.Signal(int)
     categorizeComplete = QtCore.Signal()
     categorizeSuccess = QtCore.Signal()
     categorizeError = QtCore.Signal(tuple)
+    categorizeCancelled = QtCore.Signal()
 
     def __init__(self):
         super().__init__()
@@ -33,6 +52,23 @@ class TransectTableModel(QtCore.QAbstractTableModel):
         self._categorizeWorker = None
         self._threadpool = QtCore.QThreadPool()
 
+        # Copies run one at a time, so a copy that was cancelled
+        # has stopped before the next one starts
+        self._copyThreadpool = QtCore.QThreadPool()
+        self._copyThreadpool.setMaxThreadCount(1)
+
+        # The capture times of the images of the last folder read,
+        # so it can be categorized again without reading the images.
+        self._segmenter: TransectSegmenter = None
+        self._segmenterFolder: Path = None
+
+        # The `ImageMetadata` of each image of the last folder read
+        self._imageMetadata = {}
+
+        # Incremented each time a folder is read, so that
+        # results of an earlier read can be ignored
+        self._readGeneration = 0
+
     def renameByOrder(self):
         for i, t in enumerate(self.transects):
             t.name = f"Transect{str(i).zfill(2)}"
@@ -48,21 +84,66 @@ class TransectTableModel(QtCore.QAbstractTableModel):
         Reads the image files from a given `folder` into the internal model.
         This process executes on a seperate thread. Use `categorizeProgess` and
         `categorizeComplete` to monitor progress.
-        """
 
-        searchFolder = Path(folder) / "**"
+        Transects are added to the model as they are found, then replaced
+        by the final categorization (sorted by time) once every image is read.
 
-        self._categorizeWorker = QWorker(
-            categorizeFlightImages, [searchFolder, maxDelay, minCount]
-        )
+        If `folder` was the last folder read, the images are not read again:
+        they are only categorized with the new `maxDelay` and `minCount`.
+
+        A read that is still running is cancelled.
+        """
+
+        searchFolder = Path(folder)
+        self.cancelRead()
+
+        self._readGeneration += 1
+        generation = self._readGeneration
+
+        if self._segmenter is not None and self._segmenterFolder == searchFolder:
+            self.setTransects(self._segmenter.segment(maxDelay, minCount))
+            self.categorizeProgress.emit(100)
+            self.categorizeSuccess.emit()
+            self.categorizeComplete.emit()
+            return
+
+        @QtCore.Slot(object)
+        def transectRead(transect):
+            if generation == self._readGeneration:
+                self.appendTransect(transect)
+
+        @QtCore.Slot(object)
+        def segmenterRead(result):
+            if generation != self._readGeneration:
+                return
+            segmenter, self._imageMetadata = result
+            self._segmenter = segmenter
+            self._segmenterFolder = searchFolder
+            self.setTransects(segmenter.segment(maxDelay, minCount))
+
+        self._segmenter = None
+        self._categorizeWorker = QWorker(readFlightImages, [searchFolder])
+        self._categorizeWorker.kwargs.update(maxDelay=maxDelay, minCount=minCount)
         self._categorizeWorker.includeProgress()
+        self._categorizeWorker.includePartialResults()
+        self._categorizeWorker.includeCancellation()
+        self._categorizeWorker.signals.partialResult.connect(transectRead)
         self._categorizeWorker.signals.progress.connect(self.categorizeProgress.emit)
         self._categorizeWorker.signals.finished.connect(self.categorizeComplete.emit)
         self._categorizeWorker.signals.success.connect(self.categorizeSuccess.emit)
-        self._categorizeWorker.signals.result.connect(self.setTransects)
+        self._categorizeWorker.signals.result.connect(segmenterRead)
         self._categorizeWorker.signals.error.connect(self.categorizeError.emit)
+        self._categorizeWorker.signals.cancelled.connect(self.categorizeCancelled.emit)
         self._threadpool.start(self._categorizeWorker)
 
+    def cancelRead(self):
+        """
+        Stops reading the folder, if it is being read. The transects found
+        so far are kept. `categorizeCancelled` is emitted once it stops.
+        """
+        if self._categorizeWorker is not None:
+            self._categorizeWorker.cancel()
+
     @QtCore.Slot(list)
     def setTransects(self, transects):
         self.beginResetModel()
@@ -70,6 +151,16 @@ class TransectTableModel(QtCore.QAbstractTableModel):
         self.transects = transects
         self.endResetModel()
 
+    def appendTransect(self, transect):
+        """
+        Adds `transect` after the others, named by its position.
+        """
+        row = len(self.transects)
+        transect.name = config.getNatoAtPosition(row)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.transects.append(transect)
+        self.endInsertRows()
+
     def rowCount(self, index=QtCore.QModelIndex()):
         """ Returns the number of rows the model holds. """
         return len(self.transects)
@@ -187,32 +278,156 @@ class TransectTableModel(QtCore.QAbstractTableModel):
         else:
             return QtCore.QAbstractTableModel.flags(self, index)
 
-    def copyTransects(self, toFolder):
+    def copyTransects(self, toFolder, createThumbnails=False):
         """
         Copys all internal transect files to another folder, `toFolder`
         on another thread. Use `copyProgress` and `copyComplete` to observe progress.
-        """
-        self._copyWorker = QWorker(copyTransectFiles, [self.transects, toFolder])
-        self._copyWorker.includeProgress()
-        self._copyWorker.signals.progress.connect(
-            self.copyProgress.emit
-        )  # bubble up progress
-        self._copyWorker.signals.finished.connect(self.copyComplete.emit)
-        self._threadpool.start(self._copyWorker)
 
+        If `createThumbnails` is set, a thumbnail of each image
+        is made as soon as it is copied.
+
+        If a copy is still running, it is cancelled and this one starts once
+        it has stopped.
+        """
+        self.cancelCopy()
 
-def copyTransectFiles(transects, toFolder, progress=None):
+        worker = QWorker(
+            copyTransectFiles, [self.transects, toFolder, self._imageMetadata]
+        )
+        self._copyWorker = worker
+
+        def forward(signal):
+            # Drop the signals of a copy that was replaced by a newer one
+            def emit(*args):
+                if worker is self._copyWorker:
+                    signal.emit(*args)
+
+            return emit
+
+        worker.kwargs.update(createThumbnails=createThumbnails)
+        worker.includeProgress()
+        worker.includeCancellation()
+        worker.signals.progress.connect(forward(self.copyProgress))
+        worker.signals.finished.connect(forward(self.copyComplete))
+        worker.signals.error.connect(forward(self.copyError))
+        worker.signals.result.connect(forward(self.copyResult))
+        worker.signals.cancelled.connect(forward(self.copyCancelled))
+        self._copyThreadpool.start(worker)
+
+    def cancelCopy(self):
+        """
+        Stops copying, if the transects are being copied. Files being
+        copied are removed; those already copied are kept, so the
+        import can be resumed. `copyCancelled` is emitted once it stops.
+        """
+        if self._copyWorker is not None:
+            self._copyWorker.cancel()
+
+
+def copyTransectFiles(
+    transects,
+    toFolder,
+    imageMetadata=None,
+    maxWorkers=4,
+    createThumbnails=False,
+    progress=None,
+    cancellation=None,
+):
     """
-    Copies all transect files to another folder
-    If `progress` is passed in, emit progress along the way.
+    Copies all transect files to another folder, `maxWorkers` files at a time.
+    Each copy is verified, then journaled in the transect's migration log.
+
+    Images that are already in the folder (found by their fingerprint in the
+    folder's `FingerprintIndex`) are not copied again, so an interrupted import
+    picks up where it stopped, and importing more images into an existing
+    flight only copies the new ones. They are added to the end of their
+    transects. Returns (number of images copied, number skipped, MB/s copied).
+
+    The copies are started in directory order, the order the files were
+    written to the memory card, so it is read as sequentially as possible.
+
+    If `progress` is passed in, emit progress (by bytes copied) along the way.
+
+    If `imageMetadata` (a dict of `ImageMetadata` by original path) is passed
+    in, a table of the copied images is added to the flight data folder.
+
+    If `createThumbnails` is set, a thumbnail of each image is made right after
+    it is copied, while the copy is still in the operating system's cache.
+
+    If `cancellation` is passed in, copying stops once it is cancelled and
+    `Cancelled` is raised. Files being copied are removed, while the copies
+    that completed are recorded as usual, so the import can be resumed.
     """
 
     # Ensure the base folder exists
     toFolder.mkdir(exist_ok=True)
 
-    # Total number of files to copy
-    numFiles = sum([t.numFiles for t in transects])
-    numFilesCopied = 0
+    # Find the images that are already in the folder
+    index = FingerprintIndex(toFolder)
+    index.refresh()
+    _checkCancelled(cancellation)
+    fingerprints = fileFingerprints(fp for t in transects for fp in t.files)
+    _checkCancelled(cancellation)
+
+    plan = planCopies(transects, toFolder, index, fingerprints)
+    _checkCancelled(cancellation)
+    copier = FileCopier(
+        index,
+        fingerprints,
+        createThumbnails=createThumbnails,
+        progress=progress,
+        cancellation=cancellation,
+    )
+
+    try:
+        copier.run(plan, maxWorkers=maxWorkers)
+    finally:
+        index.save()
+
+        # Record the copies that completed, even if the others didn't
+        done = [(t, fp, dst) for t, fp, dst in plan.copies if dst in copier.completed]
+        recordCopies(done, plan.logs, toFolder, imageMetadata)
+
+    if progress is not None:
+        progress.emit(100)
+
+    return len(plan.copies), len(plan.skipped), copier.meter.mbps
+
+
+def _checkCancelled(cancellation):
+    if cancellation is not None:
+        cancellation.raiseIfCancelled()
+
+
+class CopyPlan:
+    """
+    What an import copies into a flight folder. See `planCopies`.
+    """
+
+    def __init__(self):
+        # (transect, copyFrom, copyTo) of every file to copy
+        self.copies = []
+
+        # Images that are skipped: those already in the folder,
+        # and those that are repeated in this import
+        self.skipped = []
+
+        # The images in the folder that skipped images were found as
+        self.alreadyImported = []
+
+        # Migration log entries {copyTo name: copyFrom name} of each transect folder
+        self.logs = {}
+
+
+def planCopies(transects, toFolder, index, fingerprints) -> CopyPlan:
+    """
+    Works out where each file of the `transects` is copied to in `toFolder`,
+    and which are skipped because they are already in its `FingerprintIndex`
+    `index` or repeated in the import. `fingerprints` maps each file to its
+    fingerprint. Creates the transect folders and reads their migration logs.
+    """
+    plan = CopyPlan()
+    duplicates = findDuplicates(transects, index, fingerprints)
 
     for t in transects:
 
@@ -223,114 +438,341 @@ def copyTransectFiles(transects, toFolder, progress=None):
         # Make .marked/ folder
         config.markedFolder(tFolder).mkdir(exist_ok=True)
 
-        # Make migration log file, init logging variable
-        log = config.transectMigrationLog(tFolder)
-        log.touch(exist_ok=True)
-        copyLog = []  # (copyFrom, copyTo)
+        plan.logs[tFolder] = readMigrationLog(config.transectMigrationLog(tFolder))
+        _planTransect(plan, t, tFolder, duplicates)
 
-        for i, fp in enumerate(t.files):
+    return plan
 
-            # Destination file name
-            name = t.name + "_" + str(i).zfill(3) + fp.suffix
-            dst = tFolder / name
 
-            # Copy files
-            shutil.copyfile(fp, dst)
-            copyLog.append((fp, dst))
-            numFilesCopied += 1
+def findDuplicates(transects, index, fingerprints, maxWorkers=4) -> dict:
+    """
+    Finds the files of the `transects` that are already in the flight of the
+    `FingerprintIndex` `index`, or repeat an earlier file of the import.
+    Returns {file: the image in the flight it is, or `None` if it is a repeat}.
 
-            # If progress exists, emit it
-            if progress is not None:
-                progress.emit(int(numFilesCopied / numFiles * 100))
+    Files are found by their fingerprint, and each match is then confirmed
+    by hashing both files, so a file is never skipped by mistake.
+    """
+    files = [fp for t in transects for fp in t.files]
+
+    # Only files that share their fingerprint need to be hashed
+    numShared = Counter(fingerprints[fp] for fp in files)
+    inFlight = {fp: index.pathOf(fingerprints[fp]) for fp in files}
+    files = [
+        fp
+        for fp in files
+        if inFlight[fp] is not None or numShared[fingerprints[fp]] > 1
+    ]
+
+    toHash = list(dict.fromkeys(files + [inFlight[fp] for fp in files]))
+    toHash = [fp for fp in toHash if fp is not None]
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        hashes = dict(zip(toHash, executor.map(_fileHashOrNone, toHash)))
+
+    duplicates = {}
+    seen = set()
+    for fp in files:
+        h = hashes[fp]
+        if h is None:
+            continue
+        if inFlight[fp] is not None and hashes[inFlight[fp]] == h:
+            duplicates[fp] = inFlight[fp]
+        elif h in seen:
+            duplicates[fp] = None
+        else:
+            seen.add(h)
+    return duplicates
 
-        # Write log
-        with open(log, "w") as f:
-            for fromPath, toPath in copyLog:
-                f.write(f"{fromPath.name}\t-->\t{toPath.name}\n")
 
+def _fileHashOrNone(fp) -> str:
+    try:
+        return fileHash(fp)
+    except OSError as e:
+        print(f"Warning: could not read {fp}: {e}")
+        return None
 
-def categorizeFlightImages(searchFolder, maxDelay, minCount, progress=None):
-    """
-    Categorizes the images in the searchFolder into transects
-    based on `maxDelay` and `minCount`.
 
-    glob.iglob is applied to str(searchFolder) to loop through image files.
-    with the recursive flag set to true.
-    """
+def _planTransect(plan, t, tFolder, duplicates):
+    existingNames = set(os.listdir(tFolder))
+    lastIndex = -1
 
-    lastdt = None
-    transects = []
-    currentTransect = Transect()
+    for i, fp in enumerate(t.files):
 
-    # necessary because otherwise python references the last
-    # transect used (odd behavior...?)
-    currentTransect.clearFiles()
+        if fp in duplicates:
+            plan.skipped.append(fp)
+            if duplicates[fp] is not None:
+                plan.alreadyImported.append(duplicates[fp])
+            continue
 
-    # Find the total number of files to go through.
-    numFiles = len([1 for f in glob.iglob(str(searchFolder), recursive=True)])
+        # Destination file name. Images keep their place in the transect
+        # unless it is taken, in which case they go after the last image.
+        j = max(i, lastIndex + 1)
+        while _transectImageName(t.name, j, fp) in existingNames:
+            j += 1
+        lastIndex = j
 
-    for i, filename in enumerate(glob.iglob(str(searchFolder), recursive=True)):
+        name = _transectImageName(t.name, j, fp)
+        existingNames.add(name)
+        plan.copies.append((t, fp, tFolder / name))
 
-        # If we have a progress indicater, use it
-        if progress is not None:
-            progress.emit(int(i / numFiles * 100))
 
-        # rule out non-image files
-        fp = Path(filename)
-        if not fp.is_file():
-            continue
+class FileCopier:
+    """
+    Copies the files of a `CopyPlan`. Each copy is verified, added to the
+    `FingerprintIndex` `index`, and journaled in the migration log of its
+    transect as soon as it completes. `completed` holds the destinations
+    of the copies that completed, even if copying stopped part way.
 
-        if fp.suffix not in config.supportedImageExtensions:
-            continue
+    See `copyTransectFiles` for `createThumbnails`, `progress`
+    and `cancellation`.
+    """
 
-        # retrieve date and time image was taken
-        img = Image.open(fp)
+    def __init__(
+        self,
+        index,
+        fingerprints,
+        createThumbnails=False,
+        progress=None,
+        cancellation=None,
+    ):
+        self.index = index
+        self.fingerprints = fingerprints
+        self.createThumbnails = createThumbnails
+        self.progress = progress
+        self.cancellation = cancellation
+
+        self.completed = set()
+        self.meter = ReadMeter()
+
+        self._lock = threading.Lock()
+        self._totalBytes = 1
+        self._bytesCopied = 0
+        self._percent = None
+
+    def run(self, plan: CopyPlan, maxWorkers=4):
+        """
+        Copies the files of `plan`, `maxWorkers` at a time, in directory order.
+        """
+        files = [fp for _, fp, _ in plan.copies]
+        self._totalBytes = max(sum(os.stat(fp).st_size for fp in files), 1)
+
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            self.meter.start()
+            futures = [
+                executor.submit(self.copy, *plan.copies[i][1:])
+                for i in readOrder(files, byInode=False)
+            ]
+
+            # Images copied by an earlier import may not have thumbnails yet
+            if self.createThumbnails:
+                for existing in plan.alreadyImported:
+                    if not hasThumbnail(existing):
+                        futures.append(executor.submit(self.thumbnail, existing))
+
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def copy(self, fp, dst):
+        _checkCancelled(self.cancellation)
+        copyFileVerified(fp, dst, bytesCopied=self._copied)
+        self.index.add(dst, self.fingerprints[fp])
+
+        # Journal the copy as soon as it is complete
+        with self._lock:
+            with open(config.transectMigrationLog(dst.parent), "a") as f:
+                f.write(_migrationLogLine(fp.name, dst.name))
+            self.completed.add(dst)
+
+        if self.createThumbnails:
+            self.thumbnail(dst)
+
+    def thumbnail(self, fp):
+        _checkCancelled(self.cancellation)
+
+        # A missing thumbnail only makes the grid slower to open,
+        # so it shouldn't stop the import
         try:
-            t = img._getexif()[36867]
-        except:
-            raise RuntimeError(
-                f"The following image has no time data and cannot be categorized: {fp.name}"
+            if not createThumbnail(fp):
+                print(f"Warning: could not make a thumbnail of {fp}")
+        except OSError as e:
+            print(f"Warning: could not make a thumbnail of {fp}: {e}")
+
+    def _copied(self, n):
+        # Stops the copy between chunks; the partial copy is then removed
+        _checkCancelled(self.cancellation)
+        self.meter.add(n)
+        with self._lock:
+            self._bytesCopied += n
+            percent = int(self._bytesCopied / self._totalBytes * 100)
+            if self.progress is not None and percent != self._percent:
+                self._percent = percent
+                self.progress.emit(percent)
+
+
+def recordCopies(copies, logs, toFolder, imageMetadata=None):
+    """
+    Rewrites the migration `logs` with the `copies` (transect, copyFrom,
+    copyTo), and adds them to the table of imported images.
+    """
+
+    # Rewrite the logs in order (the journal is in the order the copies
+    # finished), keeping entries from earlier imports
+    for _, fp, dst in copies:
+        logs[dst.parent][dst.name] = fp.name
+    for tFolder, entries in logs.items():
+        writeMigrationLog(config.transectMigrationLog(tFolder), entries)
+
+    if imageMetadata is not None:
+        copiedImages = [
+            (t.name, dst.name, fp, imageMetadata[fp])
+            for t, fp, dst in copies
+            if fp in imageMetadata
+        ]
+        if copiedImages:
+            writeImageMetadata(
+                config.flightImagesFile(toFolder), copiedImages, append=True
             )
-        else:
-            dt = datetime.strptime(t, "%Y:%m:%d %H:%M:%S")
 
-        # add the file if this is the first one in a transect
-        if lastdt is None:
-            currentTransect.addFile(fp)
 
-        else:
+def _transectImageName(transectName, i, fp) -> str:
+    return transectName + "_" + str(i).zfill(3) + fp.suffix
 
-            # compute time delta between this image and the last one
-            delta = (dt - lastdt).seconds
 
-            # if the time is small, add to the current transect
-            if delta <= maxDelay:
-                currentTransect.addFile(fp)
-                lastdt = dt
+def _migrationLogLine(fromName, toName) -> str:
+    return f"{fromName}\t-->\t{toName}\n"
 
-            # if the time is large, conclude this transect
-            # and add the file to the next one
-            else:
 
-                # only record transect if it has enough images
-                if currentTransect.numFiles >= minCount:
-                    transects.append(currentTransect)
+def readMigrationLog(log) -> dict:
+    """
+    The entries of the migration log `log`, as {copyTo name: copyFrom name}.
+    """
+    entries = {}
+    try:
+        with open(log, "r") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t-->\t")
+                if len(parts) == 2:
+                    fromName, toName = parts
+                    entries[toName] = fromName
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def writeMigrationLog(log, entries):
+    """
+    Replaces the migration log `log` with `entries` ({copyTo name: copyFrom name}),
+    in order of the copied file names.
+    """
+    tmp = log.with_name(f".{log.name}.saving")
+    with open(tmp, "w") as f:
+        for toName, fromName in sorted(entries.items()):
+            f.write(_migrationLogLine(fromName, toName))
+    os.replace(tmp, log)
+
+
+def readFlightImages(
+    searchFolder,
+    maxDelay=None,
+    minCount=None,
+    partialResult=None,
+    progress=None,
+    cancellation=None,
+):
+    """
+    Reads the metadata (including the time it was taken) of each image in the
+    searchFolder (and its subfolders). Metadata read before is taken from the
+    `ImageMetadataCache`.
+
+    If `partialResult` is passed in, each transect (based on `maxDelay` and
+    `minCount`) is emitted as soon as it is found, assuming the images are
+    found in the order they were taken.
+
+    If `cancellation` is passed in, reading stops once it is cancelled and
+    `Cancelled` is raised. Transects already emitted are kept, and so is the
+    metadata already read (in the cache), so the next read is quicker.
 
-                # make a new transect instance
-                currentTransect = Transect(files=[fp])
+    Returns (`TransectSegmenter` to categorize the images with,
+    dict of `ImageMetadata` by path).
+    """
 
-        # record time of this image
-        lastdt = dt
+    try:
+        cache = ImageMetadataCache()
+        cache.load(searchFolder)
+        readMany = cache.readMany
+    except sqlite3.Error as e:
+        print(f"Warning: image metadata cache not used: {e}")
+        cache = None
+        readMany = readImagesMetadata
+
+    # Walk the folder once, reading the metadata of each image as soon
+    # as it is found. Only the EXIF headers are read, and many files
+    # are read at once.
+    imageFiles = (
+        Path(entry.path)
+        for entry in walkFiles(searchFolder, config.supportedImageExtensions)
+    )
+
+    stream = None
+    if partialResult is not None:
+        stream = StreamingSegmenter(maxDelay, minCount, partialResult.emit)
+
+    def imageRead(fp, metadata):
+        if metadata.capturedAt is None:
+            raise RuntimeError(
+                f"The following image has no time data and cannot be categorized: {fp.name}"
+            )
+        if stream is not None:
+            stream.add(fp, metadata.capturedAt)
+
+    complete = False
+    try:
+        imageMetadata = dict(
+            readMany(
+                imageFiles,
+                progress=progress,
+                onResult=imageRead,
+                cancellation=cancellation,
+            )
+        )
+        complete = True
+    finally:
+        if cache is not None:
+            try:
+                cache.save(complete=complete)
+            except sqlite3.Error as e:
+                print(f"Warning: image metadata cache not saved: {e}")
 
-    # record the last transect if it has enough images
-    if currentTransect.numFiles >= minCount:
-        transects.append(currentTransect)
+    if stream is not None:
+        stream.close()
+
+    segmenter = TransectSegmenter(
+        (fp, metadata.capturedAt) for fp, metadata in imageMetadata.items()
+    )
 
     # If there is a progress bar, note that progress is 100%
     if progress is not None:
         progress.emit(100)
 
-    return transects
+    return segmenter, imageMetadata
+
+
+def categorizeFlightImages(
+    searchFolder, maxDelay, minCount, progress=None, cancellation=None
+):
+    """
+    Categorizes the images in the searchFolder (and its subfolders)
+    into transects based on `maxDelay` and `minCount`.
+    """
+    segmenter, _ = readFlightImages(
+        searchFolder, progress=progress, cancellation=cancellation
+    )
+    return segmenter.segment(maxDelay, minCount)
 
 
 if __name__ == "__main__":
@@ -5,11 +5,12 @@ from PySide2 import QtCore, QtGui
 from drawingdata import DrawingDataList
 from transectdata import TransectData
 from base import QWorker, config
-from tools import saveManyImages, roundToMultiple
+from tools import roundToMultiple
 
 from .merging import MergedIndexes
 from .enums import UserRoles
 from .imagedata import FullImage
+from .snapshot import TransectSnapshot
 
 
 class QImageGridModel(QtCore.QAbstractTableModel):
@@ -18,6 +19,7 @@ class QImageGridModel(QtCore.QAbstractTableModel):
     loadFinished = QtCore.Signal()
     message = QtCore.Signal(tuple)
     transectDataChanged = QtCore.Signal(TransectData)
+    transectDataSaved = QtCore.Signal(TransectData)
 
     def __init__(self):
         super().__init__()
@@ -35,10 +37,28 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         self._loadWorker = None
         self._threadpool = QtCore.QThreadPool()
 
+        # Full resolution images are read in the background when they
+        # are first needed. [(images, onLoaded), ] of each request
+        # waiting for its images, and the images being read.
+        self._readRequests = []
+        self._readingImages = set()
+        self._readWorkers = []
+
+        # Saves run one after the other, in the order they were made,
+        # so that a transect file is never written by two saves at once.
+        self._saveWorkers = []
+        self._saveThreadpool = QtCore.QThreadPool()
+        self._saveThreadpool.setMaxThreadCount(1)
+
         # Keep track of which indexes changed
         # so we know what to save
         self._changedIndexes = []
 
+        # The save data as it is in memory. It is only brought up to date
+        # with the images in `_unsyncedPaths` when `transectData` is called.
+        self._transectData: TransectData = None
+        self._unsyncedPaths = set()
+
     def displayWidth(self):
         return self._displayWidth
 
@@ -125,6 +145,9 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         self._images = []
         self._images = fullImages
         self.endResetModel()
+        self._transectData = None
+        self._unsyncedPaths = set()
+        self._readRequests = []
         self._readSaveData()
 
     def _readSaveData(self):
@@ -143,10 +166,12 @@ class QImageGridModel(QtCore.QAbstractTableModel):
 
         # If the path doesn't exist, don't try to load anything
         if not savePath.is_file():
+            self._transectData = TransectData({}, fp=savePath)
             return
 
         # Load save data
         saveData = TransectData.load(savePath)
+        self._transectData = saveData
         for imageName, drawings in saveData.drawings():
 
             # Merge indexes that compose this file, and
@@ -163,6 +188,7 @@ class QImageGridModel(QtCore.QAbstractTableModel):
                 # the indexes as a part of that, we should note that
                 # these indexes actually don't have to be saved again.
                 self._changedIndexes = []
+                self._unsyncedPaths = set()
 
     def matchPath(self, path):
         matches = []
@@ -180,59 +206,58 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         return self.data(self.createIndex(r, c), UserRoles.ImagePath).parent
 
     def transectData(self):
-        """ Computes the transect save data and returns it. **Unused** """
+        """
+        Returns a copy of the transect save data as it is in memory,
+        including changes that have not been saved yet. Nothing is
+        read from or written to disk.
+        Returns `None` if there are no images.
+        """
+        if self._transectData is None:
+            return None
+
+        # Bring the images that changed since the last call up to date
+        for originalPath in self._unsyncedPaths:
+            drawings = MergedIndexes(self.matchPath(originalPath)).drawnItems()
+            if drawings.isEmpty():
+                self._transectData.removeDrawings(originalPath.name)
+            elif not self._transectData.imageHasDrawings(originalPath.name, drawings):
+                self._transectData.addDrawings(originalPath.name, drawings)
+        self._unsyncedPaths = set()
+
+        return self._transectData.copy()
+
+    def _snapshot(self):
+        """
+        Captures the unsaved drawings of each changed image.
+        Returns a `TransectSnapshot`, or `None` if nothing changed.
+        """
         if len(self._changedIndexes) == 0:
-            return
+            return None
 
-        # If the save file doesn't exist, initialize empty.
-        transectPath = config.markedDataFile(transectFolder=self._folder())
-        if transectPath.exists():
-            saveData = TransectData.load(transectPath)
-        else:
-            saveData = TransectData({}, fp=transectPath)
+        renderMarkedImages = config.renderMarkedImages
+
+        # [(originalPath, drawings), ]
+        images = []
+        visitedPaths = set()
 
-        # Only save files that have changed
         for index in self._changedIndexes:
 
-            # If this index is None, i.e., was already taken care of
-            # by a previous index (part of same overall image), continue
-            # to next index.
-            if index is None:
+            # Retreive the path of the original image. If it was already
+            # taken care of by a previous index (part of same overall image),
+            # continue to the next index.
+            originalPath: Path = self.data(index, role=UserRoles.ImagePath)
+            if originalPath in visitedPaths:
                 continue
+            visitedPaths.add(originalPath)
 
-            # Retreive the path of the original image, and find
-            # the indexes of the images that also correspond
-            # to that path.
-            originalPath: Path = self.data(index, role=UserRoles.ImagePath)
-            indexes = self.matchPath(originalPath)
-
-            # Now that we have all the indexes associated with this
-            # path, we no longer need them in "changedIndexes"
-            for idx in indexes:
-                try:
-                    num = self._changedIndexes.index(idx)
-                except ValueError:
-                    pass
-                else:
-                    self._changedIndexes[num] = None
-
-            # Merge the indexes togther, create a preview image
-            mergedIndexes = MergedIndexes(indexes)
-            _ = mergedIndexes.resultantImage()
-
-            # Merge drawn items and draw them onto the image
-            drawings = mergedIndexes.drawnItems()
-            if drawings is not None:
-
-                # We should only save these drawings if they aren't already saved.
-                if not saveData.imageHasDrawings(originalPath.name, drawings):
-                    saveData.addDrawings(originalPath.name, drawings)
+            # Find the indexes of the images that also correspond
+            # to that path, and merge their drawings together.
+            mergedIndexes = MergedIndexes(self.matchPath(originalPath))
+            drawings: DrawingDataList = mergedIndexes.drawnItems()
 
-            else:
-                saveData.removeDrawings(originalPath.name)
+            images.append((originalPath, drawings))
 
-        # Return the transect data
-        return saveData
+        return TransectSnapshot(self._folder(), images, renderMarkedImages)
 
     @QtCore.Slot()
     def save(self):
@@ -240,114 +265,107 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         Save changes made to the images. This involves:
         * Writing drawing data to a file
         * Saving the marked up image to a file
-        """
 
-        if len(self._changedIndexes) == 0:
+        Only a snapshot of the changes is taken on this thread,
+        the saving itself happens in the background.
+        """
+        snapshot = self._snapshot()
+        if snapshot is None:
             return
 
-        # Setup save directory files and folders
-        markedFolder = config.markedFolder(transectFolder=self._folder())
-        markedFolder.mkdir(exist_ok=True)
-
-        transectPath = config.markedDataFile(transectFolder=self._folder())
-        transectPath.parent.mkdir(exist_ok=True)
+        # Clear the changed index list
+        self._changedIndexes = []
 
-        if transectPath.exists():
-            # Initialize save data from old data path
-            saveData = TransectData.load(transectPath)
-        else:
-            transectPath.touch()
-            saveData = TransectData({}, fp=transectPath)
+        msg = snapshot.describe()
+        self.message.emit((msg,))
 
-        # List of images to be saved and the `save` arguments
-        # [(image, ['C:/Photos/myFavoriteImage.jpg']), ]
-        markedImages = []
+        worker = QWorker(snapshot.save, [])
+        worker.includeProgress()
+        worker.signals.progress.connect(
+            lambda percent: self.message.emit((f"{msg} {percent}%",))
+        )
+        worker.signals.result.connect(self.transectDataSaved.emit)
+        worker.signals.success.connect(self.emitTransectData)
+        worker.signals.success.connect(self._saveWorkerSucceeded)
+        worker.signals.error.connect(self._saveWorkerFailed)
+        worker.signals.finished.connect(lambda: self._saveWorkers.remove(worker))
+        self._saveWorkers.append(worker)
+        self._saveThreadpool.start(worker)
+
+    def emitTransectData(self):
+        """
+        Emits the in memory save data. This is used rather than the
+        data a save returns, which may be older than what is in memory.
+        """
+        data = self.transectData()
+        if data is not None:
+            self.transectDataChanged.emit(data)
 
-        # Only save files that have changed
-        for index in self._changedIndexes:
+    def _saveWorkerSucceeded(self):
+        self.message.emit(("Save complete", 5000))
 
-            # If this index is None, i.e., was already taken care of
-            # by a previous index (part of same overall image), continue
-            # to next index.
-            if index is None:
-                continue
+    def _saveWorkerFailed(self, error):
+        self.message.emit((f"Save failed: {error[1]}",))
 
-            # Retreive the path of the original image, and find
-            # the indexes of the images that also correspond
-            # to that path.
-            originalPath: Path = self.data(index, role=UserRoles.ImagePath)
-            indexes = self.matchPath(originalPath)
-
-            # Now that we have all the indexes associated with this
-            # path, we no longer need them in "changedIndexes".
-            # Setting them to None will cause them to be skipped higher
-            # in the loop
-            for idx in indexes:
-                try:
-                    num = self._changedIndexes.index(idx)
-                except ValueError:
-                    pass
-                else:
-                    self._changedIndexes[num] = None
-
-            # Merge the indexes togther, create a preview image
-            mergedIndexes = MergedIndexes(indexes)
-            preview = mergedIndexes.resultantImage()
-
-            # Form the new path (./.marked/Alpha_001.JPG)
-            markedPath = markedFolder / originalPath.name
-
-            # Merge drawn items and draw them onto the image
-            drawings: DrawingDataList = mergedIndexes.drawnItems()
-            if not drawings.isEmpty():
+    def startAfterSaving(self, worker: QWorker):
+        """
+        Starts `worker` once all pending saves have finished.
+        """
+        self._saveThreadpool.start(worker)
 
-                # We should only save these drawings if they aren't
-                # already saved.
-                if not saveData.imageHasDrawings(originalPath.name, drawings):
+    def waitForSaves(self):
+        """
+        Blocks until all pending saves have finished.
+        """
+        self._saveThreadpool.waitForDone()
 
-                    # Add this image to the list of images
-                    # to save and add the drawn item string to the save data
-                    drawings.paintToDevice(preview)
-                    markedImages.append((preview, [str(markedPath)]))
-                    saveData.addDrawings(originalPath.name, drawings)
+    def isFullResolutionLoaded(self, indexes) -> bool:
+        """ Whether the full resolution images of the `indexes` have been read """
+        return all(self._imageOf(index).isLoaded() for index in indexes)
 
-            # If there are no drawings, we should delete the image
-            # from the marked folder. (If applicable.)
-            else:
-                try:
-                    markedPath.unlink()
-                except FileNotFoundError:
-                    pass
-                finally:
-                    # Ensure that there are no drawings saved alongside
-                    # this image (in particular, if the drawings already
-                    # existed, we need to delete them)
-                    saveData.removeDrawings(originalPath.name)
-
-        # Save & emit the transect data
-        saveData.dump(transectPath)
-        self.transectDataChanged.emit(saveData)
+    def loadFullResolution(self, indexes, onLoaded):
+        """
+        Reads the full resolution images of the `indexes` on another
+        thread (unless they already are), then calls `onLoaded`.
+        """
+        images = {self._imageOf(index) for index in indexes}
+        images = {image for image in images if not image.isLoaded()}
+        if not images:
+            onLoaded()
+            return
 
-        # Clear the changed index list
-        self._changedIndexes = []
+        self._readRequests.append((images, onLoaded))
 
-        # On another thread, do the heavily-lifing of
-        # saving the images.
-        if len(markedImages) != 1:
-            msg = f"Saving {len(markedImages)} images..."
-        else:
-            msg = f"Saving {Path(*markedImages[0][1]).name}..."
-        self.message.emit((msg,))
-        self._saveWorker = QWorker(saveManyImages, [markedImages])
-        self._saveWorker.signals.finished.connect(self._resetSaveWorker)
-        self._saveWorker.signals.finished.connect(self._saveWorkerFinished)
-        self._threadpool.start(self._saveWorker)
+        toRead = [image for image in images if image not in self._readingImages]
+        if not toRead:
+            return
+        self._readingImages.update(toRead)
 
-    def _saveWorkerFinished(self):
-        self.message.emit(("Save complete", 5000))
+        worker = QWorker(_readImages, [toRead])
+        worker.signals.result.connect(
+            lambda fullImages: self._fullResolutionRead(toRead, fullImages)
+        )
+        worker.signals.finished.connect(lambda: self._readWorkers.remove(worker))
+        self._readWorkers.append(worker)
+        self._threadpool.start(worker)
+
+    def _fullResolutionRead(self, images, fullImages):
+        for image, fullImage in zip(images, fullImages):
+            image.setImage(fullImage)
+            self._readingImages.discard(image)
+
+        # Call back the requests whose images have all been read
+        waiting = []
+        for request in self._readRequests:
+            requestImages, onLoaded = request
+            if all(image.isLoaded() for image in requestImages):
+                onLoaded()
+            else:
+                waiting.append(request)
+        self._readRequests = waiting
 
-    def _resetSaveWorker(self):
-        self._saveWorker = None
+    def _imageOf(self, index) -> FullImage:
+        return self._images[int(index.row() / self._imageRows)]
 
     def setDrawings(self, index, drawings):
         """ Sets the drawn items at this index """
@@ -361,6 +379,7 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         # Mark this index as "changed"
         if not index in self._changedIndexes:
             self._changedIndexes.append(index)
+        self._unsyncedPaths.add(image.path)
 
         # Note that the data for this index changed
         # so the view can update accordingly
@@ -399,6 +418,9 @@ class QImageGridModel(QtCore.QAbstractTableModel):
         if role == UserRoles.FullResImage:
             return image.part(r, c, None)
 
+        if role == UserRoles.FullResSize:
+            return image.partSize()
+
         if role == UserRoles.EntireImage:
             return image.image
 
@@ -461,3 +483,8 @@ class QImageGridModel(QtCore.QAbstractTableModel):
             return True
         else:
             return False
+
+
+def _readImages(images) -> list:
+    """ Reads the full resolution image of each `FullImage` """
+    return [image.readImage() for image in images]
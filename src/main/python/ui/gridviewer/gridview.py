@@ -21,6 +21,7 @@ class QImageGridView(QtWidgets.QTableView):
     loadProgress = QtCore.Signal(int)  # loading progress notification
     loadFinished = QtCore.Signal()  # loading finished notification
     countDataChanged = QtCore.Signal(TransectData)
+    countDataSaved = QtCore.Signal(TransectData)
 
     def __init__(self):
         super().__init__()
@@ -57,6 +58,7 @@ class QImageGridView(QtWidgets.QTableView):
         self.model().loadFinished.connect(self.loadFinished.emit)
         self.model().message.connect(self.statusMessage.emit)
         self.model().transectDataChanged.connect(self.countDataChanged.emit)
+        self.model().transectDataSaved.connect(self.countDataSaved.emit)
 
         # Keep track of when we last sent out a previewed image
         # (generated by the index merger)
@@ -113,18 +115,40 @@ class QImageGridView(QtWidgets.QTableView):
         # Emit the first of the selected indexes
         index = indexes[0]
         if index.isValid():
-
-            # Get the image to be displayed, and the items drawn on it
-            img = index.data(role=UserRoles.FullResImage)
-            items = index.data(role=UserRoles.DrawnItems)
-
-            # Note: items will be "None" if there are none set.
-            self.selectedImageChanged.emit(img, items)
+            self._whenLoaded([index], lambda: self._emitSelectedImage(index))
 
         # Emit the files that are currently selected
         files = [idx.data(role=UserRoles.ImagePath) for idx in indexes]
         self.selectedFilesChanged.emit(files)
 
+    def _whenLoaded(self, indexes, fn):
+        """
+        Calls `fn` once the full resolution images of the `indexes` are read.
+        If they haven't been, they are read on another thread, and `fn` is
+        only called if the selection hasn't changed in the meantime.
+        """
+        model = self.model()
+        if model.isFullResolutionLoaded(indexes):
+            fn()
+            return
+
+        selection = self.selectionModel().selectedIndexes()
+
+        def loaded():
+            if self.selectionModel().selectedIndexes() == selection:
+                fn()
+
+        model.loadFullResolution(indexes, loaded)
+
+    def _emitSelectedImage(self, index):
+
+        # Get the image to be displayed, and the items drawn on it
+        img = index.data(role=UserRoles.FullResImage)
+        items = index.data(role=UserRoles.DrawnItems)
+
+        # Note: items will be "None" if there are none set.
+        self.selectedImageChanged.emit(img, items)
+
     @QtCore.Slot()
     def _handlePreviewRequest(self):
         """
@@ -140,6 +164,10 @@ class QImageGridView(QtWidgets.QTableView):
         if len(indexes) == 0:
             return
 
+        self._whenLoaded(indexes, lambda: self._emitPreview(indexes))
+
+    def _emitPreview(self, indexes):
+
         # Merge the indexes togther, create a preview image
         self._mergedIndexes = MergedIndexes(indexes)
         preview = self._mergedIndexes.resultantImage()
@@ -203,6 +231,9 @@ class QImageGridView(QtWidgets.QTableView):
             # Account for coordinate transformations
             self._mergedIndexes.setModelDrawings(self.model(), drawings)
 
+        # Keep the counts up to date while counting
+        self.computeTransectData()
+
     @QtCore.Slot()
     def save(self):
         """
@@ -210,11 +241,24 @@ class QImageGridView(QtWidgets.QTableView):
         """
         self.model().save()
 
+    def startAfterSaving(self, worker):
+        """
+        Start a worker once all pending saves have finished.
+        """
+        self.model().startAfterSaving(worker)
+
+    def waitForSaves(self):
+        """
+        Block until all pending saves have finished.
+        """
+        self.model().waitForSaves()
+
     @QtCore.Slot()
     def computeTransectData(self):
-        data = self.model().transectData()
-        if data is not None:
-            self.model().transectDataChanged.emit(data)
+        """
+        Emits the counts as they are in memory, without saving.
+        """
+        self.model().emitTransectData()
 
     def resizeEvent(self, event: QtGui.QResizeEvent):
         self.model().setDisplayWidth(event.size().width())
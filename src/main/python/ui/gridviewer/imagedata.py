@@ -3,6 +3,7 @@ from pathlib import Path
 from PySide2 import QtCore, QtGui
 
 from drawingdata import DrawingDataList
+from tools import bulkRead, hasThumbnail, thumbnailPath
 
 
 class FullImage:
@@ -11,22 +12,82 @@ class FullImage:
     as a full resolution image. Caches the gridded images so
     the computation only happens once.
     Provides convenient access to the images.
+
+    If a `thumbnail` is given, the grid is drawn from it (as long as it is
+    large enough) and `image` may be `None`: the full resolution image
+    is only read from `path` once it is needed. `size` is then
+    the size of the full resolution image.
     """
 
-    def __init__(self, image, path=Path(), rows=2, cols=2, initialWidths=[200]):
-        self.image = image
+    def __init__(
+        self,
+        image,
+        path=Path(),
+        rows=2,
+        cols=2,
+        initialWidths=[200],
+        thumbnail=None,
+        size=None,
+    ):
+        self._image = image
         self.path = path
         self.rows = rows
         self.cols = cols
 
-        self.parts = []
+        self.size = image.size() if image is not None else size
+
+        self._parts = None
+        self._thumbnail = thumbnail
+        self._thumbnailParts = None
         self.scaledParts = {}
-        self._drawnItems = []
+        self._drawnItems = [[None] * cols for _ in range(rows)]
 
-        self.breakUpImage()
         for w in initialWidths:
             self.computeScalings(w)
 
+    @property
+    def image(self):
+        """ The full resolution image, read from `path` if it hasn't been """
+        if self._image is None:
+            self._image = self.readImage()
+        return self._image
+
+    def isLoaded(self) -> bool:
+        """ Whether the full resolution image has been read """
+        return self._image is not None
+
+    def readImage(self) -> QtGui.QImage:
+        """
+        Reads the full resolution image from `path`, without keeping it.
+        Safe to call from any thread; pass the result to `setImage`.
+        """
+        return QtGui.QImage(str(self.path))
+
+    def setImage(self, image: QtGui.QImage):
+        """ Sets the full resolution image, unless it was already read """
+        if self._image is None:
+            self._image = image
+
+    @property
+    def parts(self):
+        """ The full resolution parts of the image """
+        if self._parts is None:
+            self._parts = self.breakUpImage(self.image)
+        return self._parts
+
+    def partSize(self) -> QtCore.QSize:
+        """
+        The size of a full resolution part of the image.
+        It is known without reading the full resolution image.
+        """
+        return QtCore.QSize(
+            int(self.size.width() / self.cols), int(self.size.height() / self.rows)
+        )
+
+    def partWidth(self) -> int:
+        """ The width of a full resolution part of the image """
+        return self.partSize().width()
+
     def part(self, r, c, scaledWidth=None):
         """
         Returns a portions of this image.
@@ -61,7 +122,7 @@ class FullImage:
 
             # Since we are drawing on a scaled part of the image,
             # we need to use the scale factor
-            sf = scaledWidth / self.part(r, c, None).width()
+            sf = scaledWidth / self.partWidth()
             items.paintToDevice(img, sf)
 
         return img
@@ -88,10 +149,13 @@ class FullImage:
 
     def computeScalings(self, width: int):
         """
-        Compute and populate the `scaldWidth` object
+        Compute and populate the `scaldWidth` object.
+        The parts are scaled from the thumbnail if it is large enough.
         """
         width = int(width)
 
+        sourceParts = self._sourceParts(width)
+
         scaledParts = []
         self.scaledParts[str(width)] = scaledParts
 
@@ -99,29 +163,36 @@ class FullImage:
             scaledParts.append([])
 
             for col in range(self.cols):
-                scaledParts[-1].append(self.parts[row][col].scaledToWidth(width))
-
-    def breakUpImage(self):
+                scaledParts[-1].append(sourceParts[row][col].scaledToWidth(width))
+
+    def _sourceParts(self, width: int):
+        """ The parts to scale down to `width` """
+        if self._thumbnail is not None:
+            if self._thumbnailParts is None:
+                self._thumbnailParts = self.breakUpImage(self._thumbnail)
+            if self._thumbnailParts[0][0].width() >= width:
+                return self._thumbnailParts
+        return self.parts
+
+    def breakUpImage(self, image):
         """
-        Computes the rects of the image,
+        Computes the rects of the `image`,
         divided into a grid self.rows by self.cols.
         Uses those rects to generate tables of the
         parts of this pixmap.
         """
 
-        self.parts = []
-        self._drawnItems = []
+        parts = []
 
-        w = self.image.width()
-        h = self.image.height()
+        w = image.width()
+        h = image.height()
 
         segmentWidth = w / self.cols
         segmentHeight = h / self.rows
 
         for row in range(self.rows):
 
-            self.parts.append([])
-            self._drawnItems.append([])
+            parts.append([])
 
             for col in range(self.cols):
 
@@ -130,19 +201,50 @@ class FullImage:
 
                 rect = QtCore.QRect(x, y, segmentWidth, segmentHeight)
 
-                self.parts[-1].append(self.image.copy(rect))
-                self._drawnItems[-1].append(None)
+                parts[-1].append(image.copy(rect))
+
+        return parts
 
     @staticmethod
     def CreateFromFiles(files, *args, progress=None):
+        """
+        Creates a `FullImage` for each of the image `files`. Images
+        with a thumbnail are drawn from it, and the full resolution
+        image is not read until it is needed.
 
-        images = []
+        The files are read ahead on other threads (see `bulkRead`),
+        so the images are decoded while the next ones are being read.
+        Images that can't be read are null images.
+        """
+
+        files = [Path(fp) for fp in files]
         count = len(files)
+        images = [None] * count
+
+        # Read the thumbnail of each image, if it has one
+        thumbnailed = [hasThumbnail(fp) for fp in files]
+        sources = [
+            thumbnailPath(fp) if thumbnailed[i] else fp for i, fp in enumerate(files)
+        ]
 
-        for i, fp in enumerate(files):
+        for n, (i, _, data) in enumerate(bulkRead(sources)):
             if progress is not None:
-                progress.emit(int((i / count) * 100))
-            images.append(FullImage(QtGui.QImage(str(fp)), Path(fp), *args))
+                progress.emit(int((n / count) * 100))
+
+            fp = files[i]
+            image = QtGui.QImage() if data is None else QtGui.QImage.fromData(data)
+            if thumbnailed[i]:
+                # Only the header of the full resolution image is read for its size
+                thumbnail = image
+                size = QtGui.QImageReader(str(fp)).size()
+                if not thumbnail.isNull() and size.isValid():
+                    images[i] = FullImage(
+                        None, fp, *args, thumbnail=thumbnail, size=size
+                    )
+                    continue
+                image = QtGui.QImage(str(fp))
+
+            images[i] = FullImage(image, fp, *args)
 
         if progress is not None:
             progress.emit(100)
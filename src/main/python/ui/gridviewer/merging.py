@@ -169,9 +169,8 @@ class PositionedIndexes:
         The index under a given point
         """
 
-        # Safety check: these must be lists containing at least a [0]
-        if not self.tops or self.lefts:
-            self.resultantTopLefts(UserRoles.FullResImage)
+        # The tops and lefts are only computed the first time
+        self.resultantTopLefts(UserRoles.FullResSize)
 
         # If the point is in negative space, we don't
         # have any indexes that would use negative space
@@ -344,6 +343,9 @@ class MergedIndexes:
         # of drawn items.
         reps = []
 
+        # The top and left coordinates of each row and column
+        tops, lefts = self.positions.resultantTopLefts(UserRoles.FullResSize)
+
         for idx, r, c in self.positions.positionData():
 
             # If this is a null position, there is no data
@@ -359,8 +361,8 @@ class MergedIndexes:
                 continue
 
             # Find the top and left coordinates of this index
-            top = self.positions.tops[r]
-            left = self.positions.lefts[c]
+            top = tops[r]
+            left = lefts[c]
 
             # Offset each item to it's proper location within
             # the merged image.
@@ -0,0 +1,129 @@
+from pathlib import Path
+from typing import List, Tuple
+
+from PySide2 import QtGui
+
+from base import config
+from drawingdata import DrawingDataList
+from transectdata import TransectData
+from tools import saveManyImages
+
+
+class TransectSnapshot:
+    """
+    A copy of the unsaved drawings of a transect, taken on the GUI thread.
+
+    Taking the snapshot is cheap: it only holds the path and the drawings of
+    each changed image. All the expensive work of saving (including reading
+    the images to render marked images from) happens in `save`, which is safe
+    to run on another thread.
+    """
+
+    def __init__(
+        self,
+        transectFolder: Path,
+        images: List[Tuple[Path, DrawingDataList]],
+        renderMarkedImages: bool,
+    ):
+        """
+        `images` is a list of (originalPath, drawings) for each image that changed.
+        """
+        self.transectFolder = Path(transectFolder)
+        self.images = images
+        self.renderMarkedImages = renderMarkedImages
+
+    def __len__(self):
+        return len(self.images)
+
+    def describe(self) -> str:
+        """ A short description of what is being saved, for status messages """
+        if len(self.images) == 1:
+            return f"Saving {self.images[0][0].name}..."
+        else:
+            return f"Saving {len(self.images)} images..."
+
+    def save(self, progress=None) -> TransectData:
+        """
+        Save the drawings in this snapshot. This involves:
+        * Writing drawing data to the transect file
+        * Saving the marked up images to the .marked/ folder
+
+        Returns the `TransectData` that was written.
+        """
+
+        # Setup save directory files and folders
+        markedFolder = config.markedFolder(transectFolder=self.transectFolder)
+        markedFolder.mkdir(exist_ok=True)
+
+        transectPath = config.markedDataFile(transectFolder=self.transectFolder)
+        if transectPath.exists():
+            # Initialize save data from old data path
+            saveData = TransectData.load(transectPath)
+        else:
+            transectPath.touch()
+            saveData = TransectData({}, fp=transectPath)
+
+        # List of images to be saved and the `save` arguments
+        # [(image, ['C:/Photos/myFavoriteImage.jpg']), ]
+        markedImages = []
+
+        for originalPath, drawings in self.images:
+
+            # Form the new path (./.marked/Alpha_001.JPG)
+            markedPath = markedFolder / originalPath.name
+
+            if not drawings.isEmpty():
+
+                # We should only save these drawings if they aren't
+                # already saved.
+                if saveData.imageHasDrawings(originalPath.name, drawings):
+                    continue
+
+                # Add the drawn item string to the save data
+                saveData.addDrawings(originalPath.name, drawings)
+
+                # Paint the drawings on a copy of the image and add it
+                # to the list of images to save.
+                if self.renderMarkedImages:
+                    marked = QtGui.QImage(str(originalPath))
+                    if marked.isNull():
+                        # Still save the drawings; the marked image can be
+                        # made again by exporting once the original is back
+                        print(
+                            f"Warning: could not read {originalPath},"
+                            " marked image skipped."
+                        )
+                        _unlink(markedPath)
+                        continue
+                    marked = marked.convertToFormat(QtGui.QImage.Format_RGB32)
+                    drawings.paintToDevice(marked)
+                    markedImages.append((marked, [str(markedPath)]))
+
+                # Otherwise any previously rendered marked image
+                # is out of date
+                else:
+                    _unlink(markedPath)
+
+            # If there are no drawings, we should delete the image
+            # from the marked folder. (If applicable.)
+            else:
+                _unlink(markedPath)
+
+                # Ensure that there are no drawings saved alongside
+                # this image (in particular, if the drawings already
+                # existed, we need to delete them)
+                saveData.removeDrawings(originalPath.name)
+
+        # Save the transect data, then do the heavy lifting
+        # of encoding the images.
+        saveData.dump(transectPath)
+        saveManyImages(markedImages, progress=progress)
+
+        return saveData
+
+
+def _unlink(fp: Path):
+    try:
+        fp.unlink()
+    except FileNotFoundError:
+        pass
@@ -3,11 +3,13 @@ from pathlib import Path
 from PySide2 import QtCore, QtWidgets
 
 from base import config
+from tools import hasVisibleEntries
 
 from .address import AddressBar
 from .popup import LibraryMenu
 from .events import DirectoryChangeEvent, EventTypes
 from .sortfilterproxymodel import SortFilterProxyModel
+from .manifestmodel import ManifestFileSystemModel, createLibraryModel
 
 
 class Library(QtWidgets.QWidget):
@@ -19,6 +21,7 @@ class Library(QtWidgets.QWidget):
     showFlightInfoRequested = QtCore.Signal(str)
     showMigrationLogRequested = QtCore.Signal(str)
     showDistributionFormRequested = QtCore.Signal(str)
+    exportMarkedImagesRequested = QtCore.Signal(str)
 
     # Events
     Events = EventTypes()
@@ -26,7 +29,7 @@ class Library(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
 
-        self.sourceModel = QtWidgets.QFileSystemModel()
+        self.sourceModel = createLibraryModel()
         self.watcher = QtCore.QFileSystemWatcher()
         self.proxyModel = SortFilterProxyModel()
         self.proxyView = QtWidgets.QListView()
@@ -42,9 +45,18 @@ class Library(QtWidgets.QWidget):
         # When the root path changes, we'll need to update the file watcher
         self.sourceModel.rootPathChanged.connect(self._changeWatchedPath)
 
-        # When the file watcher has the directory change, we'll want to *maybe* update the layout
-        self.watcher.directoryChanged.connect(self.setConditionalLayout)
-        self.watcher.fileChanged.connect(self.setConditionalLayout)
+        # When the file watcher has the directory change, we'll want to *maybe* update the layout.
+        # Bursts of changes (e.g. copying a flight) are handled together
+        # once the changes have settled.
+        self._layoutTimer = QtCore.QTimer(singleShot=True)
+        self._layoutTimer.setInterval(config.libraryWatchDelay)
+        self._layoutTimer.timeout.connect(self.setConditionalLayout)
+        self.watcher.directoryChanged.connect(self._layoutTimer.start)
+        self.watcher.fileChanged.connect(self._layoutTimer.start)
+
+        # The manifest backed model doesn't watch the file system itself
+        if isinstance(self.sourceModel, ManifestFileSystemModel):
+            self._layoutTimer.timeout.connect(self.sourceModel.refresh)
 
         # Context menu policy must be CustomContextMenu for us to implement
         # our own context menu. Connect the context menu request to our internal slot.
@@ -54,6 +66,9 @@ class Library(QtWidgets.QWidget):
         self.menu.showDistributionFormRequested.connect(
             self.showDistributionFormRequested.emit
         )
+        self.menu.exportMarkedImagesRequested.connect(
+            self.exportMarkedImagesRequested.emit
+        )
         self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._customMenuRequested)
 
@@ -165,6 +180,7 @@ class Library(QtWidgets.QWidget):
         # Set layout
         self.setConditionalLayout()
 
+    @QtCore.Slot()
     @QtCore.Slot(str)
     def setConditionalLayout(self, path: str = None):
         """
@@ -176,17 +192,7 @@ class Library(QtWidgets.QWidget):
             return
 
         # If things in root dir
-        rootPath = Path(self.rootPath)
-        rootDirBlank = (
-            len(
-                [
-                    1
-                    for fp in rootPath.glob("**/*")
-                    if not fp.relative_to(rootPath).parts[0][0] == "."
-                ]
-            )
-            == 0
-        )
+        rootDirBlank = not hasVisibleEntries(self.rootPath)
 
         # If this is the same situation as last time we checked, nothing to do
         # (for optimization)
@@ -215,15 +221,11 @@ class Library(QtWidgets.QWidget):
         0 is root index. 1 in one folder down, etc.
         """
         actualRoot = Path(
-            self.sourceModel.filePath(
-                self.proxyModel.mapToSource(self._rootProxyIndex())
-            )
+            self._folderPath(self.proxyModel.mapToSource(self._rootProxyIndex()))
         )
 
         currentRoot = Path(
-            self.sourceModel.filePath(
-                self.proxyModel.mapToSource(self.proxyView.rootIndex())
-            )
+            self._folderPath(self.proxyModel.mapToSource(self.proxyView.rootIndex()))
         )
 
         compareRoot = currentRoot
@@ -232,10 +234,19 @@ class Library(QtWidgets.QWidget):
 
         return actualRoot == compareRoot
 
+    def _folderPath(self, sourceIndex) -> str:
+        """
+        The path of a folder the view can be rooted at. The manifest backed
+        model uses the invalid index for the root path.
+        """
+        if not sourceIndex.isValid():
+            return self.rootPath
+        return self.sourceModel.filePath(sourceIndex)
+
     @QtCore.Slot()
     def viewActivated(self, index):
         sourceIndex = self.proxyModel.mapToSource(index)
-        if self.sourceModel.fileInfo(sourceIndex).isDir():
+        if self.sourceModel.isDir(sourceIndex):
             QtCore.QCoreApplication.postEvent(
                 self, DirectoryChangeEvent(index, sourceIndex)
             )
@@ -258,8 +269,13 @@ class Library(QtWidgets.QWidget):
             index = event.proxyIndex
             sourceIndex = event.sourceIndex
             self.proxyView.setRootIndex(index)
-            self.address.path = QtCore.QDir(self.sourceModel.filePath(sourceIndex))
-            self.directoryChanged.emit(self.sourceModel.filePath(sourceIndex))
+            path = self._folderPath(sourceIndex)
+            self.address.path = QtCore.QDir(path)
+            self.directoryChanged.emit(path)
+
+            # Pick up anything that changed in this folder since it was listed
+            if isinstance(self.sourceModel, ManifestFileSystemModel):
+                self.sourceModel.refresh(path)
 
     @QtCore.Slot(list)
     def selectFiles(self, files):
@@ -312,9 +328,11 @@ class Library(QtWidgets.QWidget):
             if self._inRootIndex():
                 self.menu.enableShowFlightInfo()
                 self.menu.enableShowDistributionForm()
+                self.menu.enableExportMarkedImages()
 
             if self._inFolderLevel(1):
                 self.menu.enableShowMigrationLog()
+                self.menu.enableExportMarkedImages()
 
         # Show the menu
         self.menu.popup(self.mapToGlobal(pos))
@@ -0,0 +1,353 @@
+from pathlib import Path
+
+from PySide2 import QtCore, QtWidgets
+
+from base import QWorker, config
+from transectdata import LibraryManifest
+
+
+class _Node:
+    """ A file or folder in the `ManifestFileSystemModel` """
+
+    __slots__ = ("name", "path", "isDir", "parent", "row", "children", "summary")
+
+    def __init__(self, name: str, path: Path, isDir: bool, parent=None, row=0):
+        self.name = name
+        self.path = path
+        self.isDir = isDir
+        self.parent = parent
+
+        # The node's row in its parent's children,
+        # kept up to date as rows are inserted and removed
+        self.row = row
+
+        # `None` until the children are fetched
+        self.children = None
+
+        # (numImages, numTransects, numAnnotated) of folders, computed as needed
+        self.summary = None
+
+
+def _renumber(children, start):
+    """ Updates the rows of `children`, from `start` on """
+    for row in range(start, len(children)):
+        children[row].row = row
+
+
+class ManifestFileSystemModel(QtCore.QAbstractItemModel):
+    """
+    A light weight alternative to `QFileSystemModel` for browsing the library.
+    Folders are listed from the `LibraryManifest` rather than from the file
+    system, and their children are only listed when they are expanded.
+    Nothing is watched: a folder is revalidated against the manifest (one
+    `stat` per folder) in the background when `refresh` is called with it.
+
+    The tool tip of a folder gives the number of images it holds and
+    how many of its transects have been annotated.
+
+    Provides the parts of the `QFileSystemModel` interface
+    that the `Library` uses.
+    """
+
+    rootPathChanged = QtCore.Signal(str)
+
+    _headers = ["Name"]
+
+    def __init__(self):
+        super().__init__()
+        self._manifest: LibraryManifest = None
+        self._root: _Node = None
+        self._iconProvider = QtWidgets.QFileIconProvider()
+
+        # Folders are revalidated one at a time, in the background
+        self._refreshWorkers = []
+        self._threadpool = QtCore.QThreadPool()
+        self._threadpool.setMaxThreadCount(1)
+
+    def setRootPath(self, rootPath: str) -> QtCore.QModelIndex:
+        """
+        Shows the folders in `rootPath` as the manifest last listed
+        them, and brings them up to date in the background.
+        """
+        rootPath = Path(rootPath)
+
+        self.beginResetModel()
+        self._manifest = LibraryManifest.instance()
+        self._root = _Node(rootPath.name, rootPath, True)
+        self.endResetModel()
+
+        self.refresh()
+
+        self.rootPathChanged.emit(str(rootPath))
+        return self.index(str(rootPath))
+
+    def rootPath(self) -> str:
+        return str(self._root.path) if self._root is not None else ""
+
+    def rootDirectory(self) -> QtCore.QDir:
+        return QtCore.QDir(self.rootPath())
+
+    def _node(self, index: QtCore.QModelIndex) -> _Node:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _indexOf(self, node: _Node, column=0) -> QtCore.QModelIndex:
+        """ The index of `node`. The root node has an invalid index. """
+        if node is None or node.parent is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def index(self, *args) -> QtCore.QModelIndex:
+        """
+        `index(row, column, parent=QModelIndex())`, or like
+        `QFileSystemModel`, `index(path, column=0)`.
+        """
+        if isinstance(args[0], str):
+            return self._indexOfPath(*args)
+
+        row, column = args[:2]
+        parent = args[2] if len(args) > 2 else QtCore.QModelIndex()
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        node = self._node(parent)
+        return self.createIndex(row, column, node.children[row])
+
+    def _indexOfPath(self, path: str, column=0) -> QtCore.QModelIndex:
+        """
+        The index of the file or folder at `path`,
+        fetching the folders on the way to it.
+        """
+        if self._root is None:
+            return QtCore.QModelIndex()
+
+        try:
+            parts = Path(path).relative_to(self._root.path).parts
+        except ValueError:
+            return QtCore.QModelIndex()
+
+        node = self._root
+        for name in parts:
+            self._fetch(node)
+            for child in node.children:
+                if child.name == name:
+                    node = child
+                    break
+            else:
+                return QtCore.QModelIndex()
+
+        # The root path itself has no parent to be a row of. As with
+        # `QFileSystemModel`, it is the invalid index's child.
+        return self._indexOf(node, column)
+
+    def parent(self, index) -> QtCore.QModelIndex:
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self._indexOf(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        node = self._node(parent)
+        if node is None or node.children is None:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return len(self._headers)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()) -> bool:
+        node = self._node(parent)
+        if node is None or not node.isDir:
+            return False
+        if node.children is None:
+            return True
+        return len(node.children) > 0
+
+    def canFetchMore(self, parent) -> bool:
+        node = self._node(parent)
+        return node is not None and node.isDir and node.children is None
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node is None or node.children is not None:
+            return
+
+        specs = self._childSpecs(node)
+        if specs:
+            self.beginInsertRows(parent, 0, len(specs) - 1)
+            self._setChildren(node, specs)
+            self.endInsertRows()
+        else:
+            node.children = []
+
+    def _fetch(self, node: _Node):
+        """ Fetches the children of `node` if they haven't been """
+        if node.isDir and node.children is None:
+            self.fetchMore(self._indexOf(node))
+
+    def _childSpecs(self, node: _Node):
+        """ The sorted (name, isDir) of each child of `node`. Folders first. """
+        subdirs, files = self._manifest.listing(node.path)
+        return [(name, True) for name in subdirs] + [(name, False) for name in files]
+
+    def _setChildren(self, node: _Node, specs):
+        node.children = [
+            _Node(name, node.path / name, isDir, node, row)
+            for row, (name, isDir) in enumerate(specs)
+        ]
+
+    def refresh(self, path: str = None):
+        """
+        Revalidates the folder at `path` (by default, the root) and
+        everything inside it in the background, then updates any
+        rows that changed.
+        """
+        if self._root is None:
+            return
+
+        node = self._root
+        if path is not None:
+            index = self._indexOfPath(path)
+            if index.isValid():
+                node = index.internalPointer()
+
+        root = self._root
+        worker = QWorker(self._manifest.revalidate, [node.path])
+        worker.signals.success.connect(lambda: self._revalidated(root, node))
+        worker.signals.finished.connect(lambda: self._refreshWorkers.remove(worker))
+        self._refreshWorkers.append(worker)
+        self._threadpool.start(worker)
+
+    def waitForRefreshes(self, msecs=-1) -> bool:
+        """
+        Blocks until the folders being revalidated are done. The rows
+        are updated once the events that follow are processed.
+        """
+        return self._threadpool.waitForDone(msecs)
+
+    def _revalidated(self, root: _Node, node: _Node):
+        # The root may have changed, or the folder been
+        # removed, while the folder was revalidated
+        if root is self._root and self._inTree(node):
+            self._sync(node)
+
+    def _inTree(self, node: _Node) -> bool:
+        """ Whether `node` is still in the tree of the root """
+        while node.parent is not None:
+            siblings = node.parent.children or []
+            if node.row >= len(siblings) or siblings[node.row] is not node:
+                return False
+            node = node.parent
+        return node is self._root
+
+    def _sync(self, node: _Node):
+        """
+        Brings the fetched children of `node` up to date
+        with the manifest, and recurses into them.
+        """
+        if not node.isDir or node.children is None:
+            return
+
+        parent = self._indexOf(node)
+        specs = self._childSpecs(node)
+
+        # Remove the children that are gone
+        names = set(specs)
+        for row in reversed(range(len(node.children))):
+            child = node.children[row]
+            if (child.name, child.isDir) not in names:
+                self.beginRemoveRows(parent, row, row)
+                node.children.pop(row)
+                _renumber(node.children, row)
+                self.endRemoveRows()
+
+        # Insert the new ones. Both lists are in the same order.
+        for row, (name, isDir) in enumerate(specs):
+            children = node.children
+            if row < len(children) and children[row].name == name:
+                continue
+            self.beginInsertRows(parent, row, row)
+            children.insert(row, _Node(name, node.path / name, isDir, node))
+            _renumber(children, row)
+            self.endInsertRows()
+
+        # The counts may have changed
+        for child in node.children:
+            child.summary = None
+        if node.children:
+            self.dataChanged.emit(
+                self.index(0, 0, parent),
+                self.index(len(node.children) - 1, 0, parent),
+                [QtCore.Qt.ToolTipRole],
+            )
+
+        for child in node.children:
+            self._sync(child)
+
+    def _summary(self, node: _Node):
+        if node.summary is None:
+            node.summary = self._manifest.summary(node.path)
+        return node.summary
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node: _Node = index.internalPointer()
+
+        if role == QtCore.Qt.DisplayRole:
+            return node.name
+
+        if role == QtCore.Qt.ToolTipRole and node.isDir:
+            numImages, numTransects, numAnnotated = self._summary(node)
+            if numTransects == 0:
+                return None
+            return (
+                f"{numImages} images\n{numAnnotated}/{numTransects} transects annotated"
+            )
+
+        if role == QtCore.Qt.DecorationRole:
+            if node.isDir:
+                return self._iconProvider.icon(QtWidgets.QFileIconProvider.Folder)
+            return self._iconProvider.icon(QtWidgets.QFileIconProvider.File)
+
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def filePath(self, index) -> str:
+        if not index.isValid():
+            return ""
+        return str(index.internalPointer().path)
+
+    def fileName(self, index) -> str:
+        if not index.isValid():
+            return ""
+        return index.internalPointer().name
+
+    def isDir(self, index) -> bool:
+        node = self._node(index)
+        return node is not None and node.isDir
+
+    def fileInfo(self, index) -> QtCore.QFileInfo:
+        return QtCore.QFileInfo(self.filePath(index))
+
+
+def createLibraryModel():
+    """
+    The model the `Library` browses: the manifest backed model if
+    `config.lightweightLibrary` is set, otherwise a `QFileSystemModel`.
+    """
+    if config.lightweightLibrary:
+        return ManifestFileSystemModel()
+    return QtWidgets.QFileSystemModel()
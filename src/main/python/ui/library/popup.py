@@ -19,6 +19,7 @@ class LibraryMenu(QtWidgets.QMenu):
     showFlightInfoRequested = QtCore.Signal(str)  # flight folder
     showMigrationLogRequested = QtCore.Signal(str)  # transect folder
     showDistributionFormRequested = QtCore.Signal(str)  # flight folder
+    exportMarkedImagesRequested = QtCore.Signal(str)  # flight or transect folder
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -28,6 +29,7 @@ class LibraryMenu(QtWidgets.QMenu):
         self.showFlightInfoAction = None
         self.showMigrationLogAction = None
         self.showDistributionFormAction = None
+        self.exportMarkedImagesAction = None
 
         self._targetPath = ""
 
@@ -37,6 +39,7 @@ class LibraryMenu(QtWidgets.QMenu):
         self.showFlightInfoAction = None
         self.showMigrationLogAction = None
         self.showDistributionFormAction = None
+        self.exportMarkedImagesAction = None
 
     def setTargetPath(self, path: str):
         """
@@ -96,6 +99,18 @@ class LibraryMenu(QtWidgets.QMenu):
             lambda: self.showDistributionFormRequested.emit(self._targetPath)
         )
 
+    def enableExportMarkedImages(self):
+        """
+        Creates the action to render the marked images of a flight or transect.
+        Will be added to the menu during popup()
+        """
+        self.exportMarkedImagesAction = QtWidgets.QAction(
+            "Export marked images", self.parent()
+        )
+        self.exportMarkedImagesAction.triggered.connect(
+            lambda: self.exportMarkedImagesRequested.emit(self._targetPath)
+        )
+
     def popup(self, *args):
         """
         Re-implemented to show popup menu.
@@ -121,5 +136,9 @@ class LibraryMenu(QtWidgets.QMenu):
         if self.showMigrationLogAction is not None:
             self.addAction(self.showMigrationLogAction)
 
+        if self.exportMarkedImagesAction is not None:
+            self.addSeparator()
+            self.addAction(self.exportMarkedImagesAction)
+
         self.reset()
         return super().popup(*args)
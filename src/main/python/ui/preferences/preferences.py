@@ -20,8 +20,47 @@ class PreferencesDialog(QtWidgets.QDialog):
         self.usernameBox.setPlaceholderText("Enter your name")
         self.usernameBox.setToolTip(usernameToolTip)
 
+        renderToolTip = (
+            "Render marked up copies of the images every time drawings are saved."
+            "\nTurn off for faster saving. Marked images can then be exported"
+            "\nfrom the flight explorer when they are needed."
+        )
+        renderLabel = QtWidgets.QLabel()
+        renderLabel.setText("Save marked images")
+        renderLabel.setToolTip(renderToolTip)
+        self.renderMarkedImagesBox = QtWidgets.QCheckBox()
+        self.renderMarkedImagesBox.setChecked(config.renderMarkedImages)
+        self.renderMarkedImagesBox.setToolTip(renderToolTip)
+
+        qualityToolTip = (
+            "JPEG quality of the marked images. Lower is faster and smaller."
+        )
+        qualityLabel = QtWidgets.QLabel()
+        qualityLabel.setText("Marked image quality")
+        qualityLabel.setToolTip(qualityToolTip)
+        self.qualityBox = QtWidgets.QSpinBox()
+        self.qualityBox.setRange(-1, 100)
+        self.qualityBox.setSpecialValueText("Default")
+        self.qualityBox.setValue(config.markedImageQuality)
+        self.qualityBox.setToolTip(qualityToolTip)
+
+        lightweightToolTip = (
+            "Browse the flight explorer from a cached listing of the library"
+            "\ninstead of watching every folder. Faster on network drives."
+            "\nTakes effect when ImageWAO is restarted."
+        )
+        lightweightLabel = QtWidgets.QLabel()
+        lightweightLabel.setText("Lightweight flight explorer")
+        lightweightLabel.setToolTip(lightweightToolTip)
+        self.lightweightLibraryBox = QtWidgets.QCheckBox()
+        self.lightweightLibraryBox.setChecked(config.lightweightLibrary)
+        self.lightweightLibraryBox.setToolTip(lightweightToolTip)
+
         form = QtWidgets.QFormLayout()
         form.addRow(usernameLabel, self.usernameBox)
+        form.addRow(renderLabel, self.renderMarkedImagesBox)
+        form.addRow(qualityLabel, self.qualityBox)
+        form.addRow(lightweightLabel, self.lightweightLibraryBox)
 
         buttonBox = QtWidgets.QDialogButtonBox()
         buttonBox.addButton(QtWidgets.QDialogButtonBox.Ok)
@@ -38,4 +77,7 @@ class PreferencesDialog(QtWidgets.QDialog):
     @QtCore.Slot()
     def _okPressed(self):
         config.username = self.usernameBox.text()
+        config.renderMarkedImages = self.renderMarkedImagesBox.isChecked()
+        config.markedImageQuality = self.qualityBox.value()
+        config.lightweightLibrary = self.lightweightLibraryBox.isChecked()
         self.close()
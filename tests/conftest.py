@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "main" / "python"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtCore  # noqa: E402
+
+# Keep the settings written by the tests away from the user's settings
+QtCore.QSettings.setDefaultFormat(QtCore.QSettings.IniFormat)
+QtCore.QSettings.setPath(
+    QtCore.QSettings.IniFormat, QtCore.QSettings.UserScope, tempfile.mkdtemp()
+)
+
+
+@pytest.fixture
+def library(tmp_path):
+    """ An empty library folder, set as the library directory """
+    from base import config
+
+    folder = tmp_path / "library"
+    folder.mkdir()
+    config.libraryDirectory = str(folder)
+    return folder
@@ -0,0 +1,79 @@
+import os
+
+from tools import bulkread
+from tools.bulkread import ReadMeter, bulkRead, readFile, readOrder
+
+
+def writeFiles(folder, sizes):
+    files = []
+    for name, size in sizes:
+        fp = folder / name
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_bytes(os.urandom(size))
+        files.append(fp)
+    return files
+
+
+def test_read_order_is_directory_order(tmp_path):
+    files = [
+        tmp_path / "101CANON" / "IMG_0002.JPG",
+        tmp_path / "100CANON" / "IMG_0009.JPG",
+        tmp_path / "101CANON" / "IMG_0001.JPG",
+        tmp_path / "100CANON" / "IMG_0010.JPG",
+    ]
+    assert readOrder(files) == [1, 3, 2, 0]
+
+
+def test_read_order_by_inode(tmp_path):
+    files = writeFiles(tmp_path, [("b", 1), ("a", 1), ("c", 1)])
+    order = readOrder(files, byInode=True)
+    inodes = [os.stat(files[i]).st_ino for i in order]
+    assert sorted(order) == [0, 1, 2]
+    assert inodes == sorted(inodes)
+
+
+def test_read_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulkread, "readChunkSize", 1000)
+    (fp,) = writeFiles(tmp_path, [("a", 4500)])
+    meter = ReadMeter()
+    assert readFile(fp, meter) == fp.read_bytes()
+    assert meter.bytes == 4500
+
+
+def test_bulk_read_yields_every_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulkread, "maxInFlightBytes", 2500)
+    files = writeFiles(tmp_path, [(f"{i}.JPG", 1000 + i) for i in range(10)])
+    meter = ReadMeter()
+
+    read = {}
+    for i, fp, data in bulkRead(files, maxWorkers=3, meter=meter):
+        assert fp == files[i]
+        read[i] = data
+
+    assert read == {i: fp.read_bytes() for i, fp in enumerate(files)}
+    assert meter.bytes == sum(1000 + i for i in range(10))
+    assert meter.mbps > 0
+
+
+def test_bulk_read_limits_data_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulkread, "maxInFlightBytes", 2500)
+    files = writeFiles(tmp_path, [(f"{i}.JPG", 1000) for i in range(6)])
+
+    # Reads are only started once there is room for them,
+    # so the consumer never has more than two files waiting
+    started = []
+    read = bulkread.readFile
+    monkeypatch.setattr(
+        bulkread, "readFile", lambda fp, meter: started.append(fp) or read(fp, meter)
+    )
+
+    for n, _ in enumerate(bulkRead(files, maxWorkers=6)):
+        assert len(started) <= n + 3
+
+
+def test_bulk_read_skips_unreadable_files(tmp_path):
+    files = writeFiles(tmp_path, [("a.JPG", 10), ("c.JPG", 10)])
+    files.insert(1, tmp_path / "b.JPG")
+
+    read = {i: data for i, _, data in bulkRead(files)}
+    assert read == {0: files[0].read_bytes(), 1: None, 2: files[2].read_bytes()}
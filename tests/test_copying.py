@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from base import Cancelled
+from tools import copying
+from tools.copying import CopyVerificationError, copyFileVerified, fileHash
+
+
+@pytest.fixture(params=["copy_file_range", "buffered"])
+def copyMethod(request, monkeypatch):
+    """ Copies in small chunks, with and without `copy_file_range` """
+    monkeypatch.setattr(copying, "_chunkSize", 1000)
+    if request.param == "buffered":
+        monkeypatch.delattr(copying.os, "copy_file_range", raising=False)
+    elif not hasattr(os, "copy_file_range"):
+        pytest.skip("copy_file_range is not available")
+    return request.param
+
+
+def source(tmp_path, size=4500):
+    fp = tmp_path / "src" / "Alfa_000.JPG"
+    fp.parent.mkdir()
+    fp.write_bytes(bytes(i % 251 for i in range(size)))
+    return fp
+
+
+def test_copies_and_returns_the_hash(tmp_path, copyMethod):
+    src = source(tmp_path)
+    dst = tmp_path / "Alfa_000.JPG"
+    copied = []
+
+    assert copyFileVerified(src, dst, copied.append) == fileHash(src)
+    assert dst.read_bytes() == src.read_bytes()
+    assert sum(copied) == 4500
+    assert len(copied) == 5
+    assert sorted(tmp_path.iterdir()) == [dst, src.parent]
+
+
+def test_copies_an_empty_file(tmp_path, copyMethod):
+    src = source(tmp_path, size=0)
+    dst = tmp_path / "Alfa_000.JPG"
+
+    assert copyFileVerified(src, dst) == fileHash(src)
+    assert dst.read_bytes() == b""
+
+
+def test_a_copy_that_does_not_match_is_removed(tmp_path, monkeypatch):
+    src = source(tmp_path)
+    dst = tmp_path / "Alfa_000.JPG"
+    monkeypatch.delattr(copying.os, "copy_file_range", raising=False)
+    monkeypatch.setattr(copying, "fileHash", lambda fp: "mismatch")
+
+    with pytest.raises(CopyVerificationError):
+        copyFileVerified(src, dst)
+    assert list(tmp_path.iterdir()) == [src.parent]
+
+
+def test_a_cancelled_copy_is_removed(tmp_path, copyMethod):
+    src = source(tmp_path)
+    dst = tmp_path / "Alfa_000.JPG"
+    dst.write_bytes(b"before")
+
+    def bytesCopied(n):
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        copyFileVerified(src, dst, bytesCopied)
+    assert sorted(tmp_path.iterdir()) == [dst, src.parent]
+    assert dst.read_bytes() == b"before"
@@ -0,0 +1,164 @@
+import struct
+from datetime import datetime
+
+import pytest
+
+from base import CancellationToken, Cancelled
+from tools import exif
+from tools.exif import ImageMetadata, readImageMetadata, readImagesMetadata
+
+
+def ifd(entries, offset, endian):
+    """ An IFD at `offset` with the `entries` (tag, type, count, value bytes) """
+    data = struct.pack(endian + "H", len(entries))
+    extra = b""
+    extraOffset = offset + 2 + 12 * len(entries) + 4
+    for tag, valueType, count, value in entries:
+        if len(value) <= 4:
+            data += struct.pack(endian + "HHI", tag, valueType, count)
+            data += value.ljust(4, b"\x00")
+        else:
+            offset = extraOffset + len(extra)
+            data += struct.pack(endian + "HHII", tag, valueType, count, offset)
+            extra += value
+    return data + b"\x00" * 4 + extra
+
+
+def rationals(endian, *values):
+    return b"".join(struct.pack(endian + "II", int(v * 100), 100) for v in values)
+
+
+def tiff(endian="<", gps=True):
+    ifd0Offset = 8
+    exifOffset = ifd0Offset + 2 + 12 * 2 + 4
+    exifIFD = ifd([(0x9003, 2, 20, b"2021:03:04 05:06:07\x00")], exifOffset, endian)
+    gpsOffset = exifOffset + len(exifIFD)
+    gpsIFD = ifd(
+        [
+            (0x1, 2, 2, b"S\x00"),
+            (0x2, 5, 3, rationals(endian, 10, 30, 0)),
+            (0x3, 2, 2, b"E\x00"),
+            (0x4, 5, 3, rationals(endian, 20, 15, 0)),
+            (0x5, 1, 1, b"\x00"),
+            (0x6, 5, 1, rationals(endian, 123.5)),
+        ],
+        gpsOffset,
+        endian,
+    )
+    pointers = [(0x8769, 4, 1, struct.pack(endian + "I", exifOffset))]
+    if gps:
+        pointers.append((0x8825, 4, 1, struct.pack(endian + "I", gpsOffset)))
+    else:
+        pointers.append((0x0, 4, 1, b"\x00" * 4))
+    ifd0 = ifd(pointers, ifd0Offset, endian)
+
+    byteOrder = b"II" if endian == "<" else b"MM"
+    header = byteOrder + struct.pack(endian + "HI", 42, ifd0Offset)
+    return header + ifd0 + exifIFD + gpsIFD
+
+
+def segment(marker, data, length=None):
+    if length is None:
+        length = len(data) + 2
+    return bytes([0xFF, marker]) + struct.pack(">H", length) + data
+
+
+def jpeg(*segments):
+    sof = b"\x08" + struct.pack(">HH", 3000, 4000) + b"\x03" + b"\x00" * 9
+    return (
+        b"\xff\xd8"
+        + b"".join(segments)
+        + segment(0xC0, sof)
+        + segment(0xDA, b"")
+        + b"image data"
+    )
+
+
+def write(tmp_path, data, name="Alfa_000.JPG"):
+    fp = tmp_path / name
+    fp.write_bytes(data)
+    return fp
+
+
+@pytest.fixture
+def noPillow(monkeypatch):
+    """ Records the files Pillow is asked for, without reading them """
+    files = []
+
+    def readPillow(fp):
+        files.append(fp)
+        return None
+
+    monkeypatch.setattr(exif, "_readDateTimeOriginalPillow", readPillow)
+    return files
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+def test_reads_exif_and_dimensions(tmp_path, noPillow, endian):
+    data = jpeg(segment(0xE1, b"Exif\x00\x00" + tiff(endian)))
+    metadata = readImageMetadata(write(tmp_path, data))
+
+    assert metadata.size == len(data)
+    assert metadata.capturedAt == datetime(2021, 3, 4, 5, 6, 7)
+    assert (metadata.width, metadata.height) == (4000, 3000)
+    assert metadata.latitude == pytest.approx(-10.5)
+    assert metadata.longitude == pytest.approx(20.25)
+    assert metadata.altitude == pytest.approx(123.5)
+    assert noPillow == []
+
+
+def test_skips_other_segments_and_marker_padding(tmp_path, noPillow):
+    app0 = segment(0xE0, b"JFIF\x00" + b"\x00" * 9)
+    app1 = b"\xff" + segment(0xE1, b"Exif\x00\x00" + tiff(gps=False))
+    metadata = readImageMetadata(write(tmp_path, jpeg(app0, app1)))
+
+    assert metadata.capturedAt == datetime(2021, 3, 4, 5, 6, 7)
+    assert (metadata.width, metadata.height) == (4000, 3000)
+    assert metadata.latitude is None
+
+
+def test_malformed_segment_length_falls_back_to_pillow(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        exif, "_readDateTimeOriginalPillow", lambda fp: "2020:01:02 03:04:05"
+    )
+    # A length of less than 2 (the length's own bytes) is malformed:
+    # nothing after it can be trusted
+    for length in (0, 1):
+        data = jpeg(segment(0xE1, b"Exif\x00\x00" + tiff(), length=length))
+        fp = write(tmp_path, data)
+
+        assert readImageMetadata(fp) == ImageMetadata(
+            size=len(data), capturedAt=datetime(2020, 1, 2, 3, 4, 5)
+        )
+
+
+def test_not_a_jpeg(tmp_path, noPillow):
+    fp = write(tmp_path, b"not a jpeg", name="notes.JPG")
+    assert readImageMetadata(fp) == ImageMetadata(size=10)
+    assert noPillow == [fp]
+
+
+def test_results_are_reported_in_order(tmp_path, noPillow):
+    files = [write(tmp_path, jpeg(), name=f"Alfa_{i:03}.JPG") for i in range(20)]
+    reported = []
+    results = readImagesMetadata(
+        iter(files), maxWorkers=4, onResult=lambda fp, metadata: reported.append(fp),
+    )
+
+    assert [fp for fp, _ in results] == files
+    assert reported == files
+    assert all(metadata.width == 4000 for _, metadata in results)
+
+
+def test_reading_stops_when_cancelled(tmp_path, noPillow):
+    files = [write(tmp_path, jpeg(), name=f"Alfa_{i:03}.JPG") for i in range(5)]
+    cancellation = CancellationToken()
+
+    def found():
+        for i, fp in enumerate(files):
+            if i == 2:
+                cancellation.cancel()
+            yield fp
+
+    with pytest.raises(Cancelled):
+        readImagesMetadata(found(), cancellation=cancellation)
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from base import config
+from tools import FingerprintIndex, fileFingerprint
+
+
+def makeImage(fp, content: bytes):
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_bytes(content)
+    return fp
+
+
+def test_fingerprint_depends_on_size_start_and_end(tmp_path):
+    chunk = 64 * 1024
+    a = makeImage(tmp_path / "A.JPG", b"a" * chunk + b"m" * 10 + b"z" * chunk)
+    b = makeImage(tmp_path / "B.JPG", b"a" * chunk + b"n" * 10 + b"z" * chunk)
+    c = makeImage(tmp_path / "C.JPG", b"a" * chunk + b"m" * 11 + b"z" * chunk)
+    d = makeImage(tmp_path / "D.JPG", b"small")
+
+    assert fileFingerprint(a) == fileFingerprint(b)
+    assert fileFingerprint(a) != fileFingerprint(c)
+    assert fileFingerprint(d).startswith("5:")
+
+
+def test_index_finds_images_in_the_flight(tmp_path):
+    flight = tmp_path / "flight"
+    alfa = makeImage(flight / "Alfa" / "Alfa_000.JPG", b"alfa")
+    makeImage(flight / "Alfa" / "notes.txt", b"bravo")
+
+    index = FingerprintIndex(flight)
+    index.refresh()
+    assert index.contains(fileFingerprint(alfa))
+    assert index.pathOf(fileFingerprint(alfa)) == alfa
+    assert index.pathOf(fileFingerprint(flight / "Alfa" / "notes.txt")) is None
+
+    bravo = makeImage(flight / "Alfa" / "Alfa_001.JPG", b"bravo")
+    index.add(bravo, fileFingerprint(bravo))
+    assert index.pathOf(fileFingerprint(bravo)) == bravo
+
+
+def test_index_is_saved_and_only_changed_images_are_fingerprinted(
+    tmp_path, monkeypatch
+):
+    flight = tmp_path / "flight"
+    alfa = makeImage(flight / "Alfa" / "Alfa_000.JPG", b"alfa")
+    bravo = makeImage(flight / "Alfa" / "Alfa_001.JPG", b"bravo")
+    config.flightDataFolder(flight).mkdir(exist_ok=True)
+
+    index = FingerprintIndex(flight)
+    index.refresh()
+    index.save()
+
+    fingerprinted = []
+
+    def fingerprints(files, maxWorkers=None):
+        files = list(files)
+        fingerprinted.extend(files)
+        return {fp: fileFingerprint(fp) for fp in files}
+
+    monkeypatch.setattr("tools.fingerprints.fileFingerprints", fingerprints)
+
+    makeImage(bravo, b"bravo, changed")
+    alfa.unlink()
+    index = FingerprintIndex(flight)
+    index.refresh()
+
+    assert fingerprinted == [bravo]
+    assert index.pathOf(fileFingerprint(bravo)) == bravo
+    assert not index.contains("4:" + fileFingerprint(bravo).split(":")[1])
+    assert [p.name for p in flight.rglob("*.JPG")] == ["Alfa_001.JPG"]
+
+
+def test_failed_save_leaves_no_temporary_file(tmp_path, monkeypatch):
+    flight = tmp_path / "flight"
+    makeImage(flight / "Alfa" / "Alfa_000.JPG", b"alfa")
+    dataFolder = config.flightDataFolder(flight)
+    dataFolder.mkdir(exist_ok=True)
+
+    index = FingerprintIndex(flight)
+    index.refresh()
+
+    def failingReplace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failingReplace)
+    with pytest.raises(OSError):
+        index.save()
+    assert list(dataFolder.iterdir()) == []
@@ -0,0 +1,166 @@
+import time
+
+from PySide2 import QtCore, QtGui
+
+from base import config
+from countdata import CountData
+from drawingdata import DrawingData, DrawingDataList
+from drawingdata.drawingdata import internPen
+from tools import createThumbnail
+from transectdata import TransectData
+from ui.gridviewer import QImageGridView, UserRoles
+from ui.gridviewer.gridmodel import QImageGridModel
+from ui.gridviewer.imagedata import FullImage
+from ui.gridviewer.merging import MergedIndexes
+
+
+def makeTransect(folder, names, width=40, height=20):
+    transect = folder / "Alfa"
+    transect.mkdir()
+    files = []
+    for name in names:
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        image.fill(QtGui.QColor("white"))
+        fp = transect / name
+        assert image.save(str(fp))
+        files.append(fp)
+    return transect, files
+
+
+def makeModel(files):
+    model = QImageGridModel()
+    model.resetImagesFromFullImages(FullImage.CreateFromFiles(files, 2, 2, [20]))
+    return model
+
+
+def rect(x, y, species, number=1):
+    pen = internPen("#ff0000", 1)
+    return DrawingData(
+        "Rect", QtCore.QRectF(x, y, 4, 4), pen, CountData(species, number)
+    )
+
+
+def test_save_merged_grid_with_drawings(library):
+    config.renderMarkedImages = True
+    transect, files = makeTransect(library, ["Alfa_000.JPG", "Alfa_001.JPG"])
+    model = makeModel(files)
+
+    # Each image is a 2x2 grid of 20x10 parts:
+    # draw on the top left and the bottom right part of the first image
+    model.setDrawings(model.index(0, 0), DrawingDataList([rect(1, 1, "Zebra")]))
+    model.setDrawings(model.index(1, 1), DrawingDataList([rect(2, 3, "Kudu", 2)]))
+
+    model.save()
+    model.waitForSaves()
+
+    saved = TransectData.load(config.markedDataFile(transect))
+    drawings = dict(saved.drawings())
+    assert list(drawings) == ["Alfa_000.JPG"]
+
+    geometries = sorted(
+        (d.countData.species, d.geom.x(), d.geom.y()) for d in drawings["Alfa_000.JPG"]
+    )
+    assert geometries == [("Kudu", 22, 13), ("Zebra", 1, 1)]
+    assert (config.markedFolder(transect) / "Alfa_000.JPG").is_file()
+    assert not (config.markedFolder(transect) / "Alfa_001.JPG").exists()
+
+
+def test_transect_data_follows_drawing_edits(library):
+    _, files = makeTransect(library, ["Alfa_000.JPG", "Alfa_001.JPG"])
+    model = makeModel(files)
+
+    # Parts of the first image are rows 0-1, of the second image rows 2-3
+    model.setDrawings(model.index(0, 0), DrawingDataList([rect(1, 1, "Zebra", 3)]))
+    model.setDrawings(model.index(3, 1), DrawingDataList([rect(1, 1, "Kudu", 2)]))
+
+    data = model.transectData()
+    assert data.speciesTotals() == {"Zebra": 3, "Kudu": 2}
+    assert data.numImages() == 2
+
+    # Edit the drawings of one part of the first image
+    model.setDrawings(
+        model.index(0, 0),
+        DrawingDataList([rect(1, 1, "Zebra", 1), rect(8, 2, "Impala", 4)]),
+    )
+    data = model.transectData()
+    assert data.speciesTotals() == {"Zebra": 1, "Impala": 4, "Kudu": 2}
+    assert data.numUniqueAnimals() == 7
+
+    # Clear the second image
+    model.setDrawings(model.index(3, 1), DrawingDataList([]))
+    data = model.transectData()
+    assert data.speciesTotals() == {"Zebra": 1, "Impala": 4}
+    assert data.numImages() == 1
+
+    # Nothing was written
+    assert not config.markedDataFile(files[0].parent).exists()
+
+
+def test_drawings_and_saves_do_not_read_full_resolution_images(library):
+    config.renderMarkedImages = True
+    transect, files = makeTransect(library, ["Alfa_000.JPG"])
+    for fp in files:
+        assert createThumbnail(fp)
+    model = makeModel(files)
+    image = model._images[0]
+    assert image._image is None
+
+    # Drawings made on the merged image are split between its parts
+    merged = MergedIndexes(model.matchPath(files[0]))
+    merged.setModelDrawings(
+        model, DrawingDataList([rect(1, 1, "Zebra"), rect(30, 15, "Kudu")])
+    )
+    assert model.transectData().speciesTotals() == {"Zebra": 1, "Kudu": 1}
+
+    # The Kudu is on the bottom right part, in its own coordinates
+    items = model.data(model.index(1, 1), UserRoles.DrawnItems)
+    assert [d.args for d in items] == [[10, 5, 4, 4]]
+
+    snapshot = model._snapshot()
+    assert image._image is None
+
+    # The image is only read by the save itself
+    snapshot.save()
+    assert (config.markedFolder(transect) / "Alfa_000.JPG").is_file()
+
+
+def waitFor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def test_selected_image_is_read_in_the_background(library):
+    _, files = makeTransect(library, ["Alfa_000.JPG"])
+    for fp in files:
+        assert createThumbnail(fp)
+
+    view = QImageGridView()
+    view.model().resetImagesFromFullImages(FullImage.CreateFromFiles(files, 2, 2, [20]))
+
+    shown = []
+    view.selectedImageChanged.connect(
+        lambda image, items: shown.append(
+            (image.size(), QtCore.QThread.currentThread())
+        )
+    )
+    view.selectionModel().select(
+        view.model().index(1, 1), QtCore.QItemSelectionModel.Select
+    )
+
+    # Nothing is shown until the image has been read
+    assert shown == []
+    assert waitFor(lambda: shown)
+    assert shown == [(QtCore.QSize(20, 10), QtCore.QThread.currentThread())]
+
+
+def test_unreadable_images_do_not_stop_the_grid_loading(library):
+    _, files = makeTransect(library, ["Alfa_000.JPG", "Alfa_002.JPG"])
+    missing = files[0].parent / "Alfa_001.JPG"
+    files.insert(1, missing)
+
+    images = FullImage.CreateFromFiles(files, 2, 2, [20])
+    assert [image.path for image in images] == files
+    assert images[1].image.isNull()
+    assert not images[2].image.isNull()
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pytest
+
+from tools import imagemetadata
+from tools.imagemetadata import ImageMetadataCache
+from tools.exif import ImageMetadata
+
+
+@pytest.fixture
+def imagesRead(monkeypatch):
+    """ Records the images read, which are all taken at the same time """
+    files = []
+
+    def readImageMetadata(fp):
+        files.append(os.path.basename(fp))
+        return ImageMetadata(
+            size=os.path.getsize(fp),
+            capturedAt=datetime(2021, 3, 4, 5, 6, 7, 890),
+            width=4000,
+            height=3000,
+            latitude=-10.5,
+        )
+
+    monkeypatch.setattr(imagemetadata, "readImageMetadata", readImageMetadata)
+    return files
+
+
+def importFolder(tmp_path, numImages=2):
+    folder = tmp_path / "card"
+    folder.mkdir()
+    for i in range(numImages):
+        (folder / f"DSC_{i:04}.JPG").write_bytes(b"image" * (i + 1))
+    return folder
+
+
+def readFolder(cacheFile, folder):
+    cache = ImageMetadataCache(cacheFile)
+    cache.load(folder)
+    results = cache.readMany(sorted(folder.iterdir()))
+    cache.save()
+    return [metadata for _, metadata in results]
+
+
+def test_images_are_only_read_once(tmp_path, imagesRead):
+    folder = importFolder(tmp_path)
+    cacheFile = tmp_path / "images.sqlite"
+
+    first = readFolder(cacheFile, folder)
+    assert imagesRead == ["DSC_0000.JPG", "DSC_0001.JPG"]
+
+    imagesRead.clear()
+    assert readFolder(cacheFile, folder) == first
+    assert imagesRead == []
+    assert first[0].capturedAt == datetime(2021, 3, 4, 5, 6, 7, 890)
+
+    # A changed image is read again
+    (folder / "DSC_0001.JPG").write_bytes(b"changed image")
+    readFolder(cacheFile, folder)
+    assert imagesRead == ["DSC_0001.JPG"]
+
+
+def test_entries_with_unknown_capture_times_are_replaced(tmp_path, imagesRead):
+    folder = importFolder(tmp_path, numImages=1)
+    cacheFile = tmp_path / "images.sqlite"
+    readFolder(cacheFile, folder)
+
+    with closing(sqlite3.connect(str(cacheFile))) as conn:
+        with conn:
+            conn.execute("UPDATE images SET captured_at = '2021-03-04T05:06:07'")
+
+    imagesRead.clear()
+    metadata = readFolder(cacheFile, folder)
+    assert imagesRead == ["DSC_0000.JPG"]
+    assert metadata[0].capturedAt == datetime(2021, 3, 4, 5, 6, 7, 890)
+
+    imagesRead.clear()
+    readFolder(cacheFile, folder)
+    assert imagesRead == []
@@ -0,0 +1,146 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from base import config
+from transectdata import LibraryManifest
+from transectdata import manifest as manifestModule
+
+
+def makeTransect(folder, numImages, annotated=False):
+    folder.mkdir(parents=True)
+    for i in range(numImages):
+        (folder / f"{folder.name}_{i:03}.JPG").touch()
+    if annotated:
+        config.markedFolder(transectFolder=folder).mkdir()
+        config.markedDataFile(transectFolder=folder).write_text("{}")
+
+
+def settle(*folders):
+    """ Backdates folders, as if they were listed long after they changed """
+    for folder in folders:
+        os.utime(folder, (1000, 1000))
+
+
+def makeManifest(library):
+    return LibraryManifest(library, config.libraryManifestFile())
+
+
+def test_listing_and_summary(library):
+    makeTransect(library / "Flight" / "Alfa", 2, annotated=True)
+    makeTransect(library / "Flight" / "Bravo", 3)
+    (library / "Flight" / "notes.txt").touch()
+
+    manifest = makeManifest(library)
+    assert manifest.listing(library / "Flight") == ([], [])
+
+    manifest.revalidate()
+    assert manifest.listing(library) == (["Flight"], [])
+    assert manifest.listing(library / "Flight") == (["Alfa", "Bravo"], ["notes.txt"])
+    assert manifest.summary(library) == (5, 2, 1)
+    assert manifest.summary(library / "Flight" / "Bravo") == (3, 1, 0)
+
+
+def test_save_files_and_transects(library):
+    makeTransect(library / "Flight" / "Alfa", 2, annotated=True)
+    makeTransect(library / "Flight" / "Bravo", 3)
+    makeTransect(library / "Other" / "Charlie", 1, annotated=True)
+
+    manifest = makeManifest(library)
+    assert manifest.saveFiles(library) == [
+        ("Flight", config.markedDataFile(library / "Flight" / "Alfa")),
+        ("Other", config.markedDataFile(library / "Other" / "Charlie")),
+    ]
+    assert manifest.transects(library / "Flight") == [
+        (library / "Flight" / "Alfa", 2, True),
+        (library / "Flight" / "Bravo", 3, False),
+    ]
+
+
+def test_only_changed_folders_are_listed_again(library, monkeypatch):
+    makeTransect(library / "Flight" / "Alfa", 2)
+    makeTransect(library / "Flight" / "Bravo", 3)
+    manifest = makeManifest(library)
+    manifest.revalidate()
+
+    # Settle after the first save, which adds the metadata folder
+    settle(library, library / "Flight", library / "Flight" / "Alfa")
+    manifest.revalidate()
+
+    listed = []
+    scandir = os.scandir
+
+    def recordScandir(path):
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(manifestModule.os, "scandir", recordScandir)
+
+    # Bravo changed too recently to be sure it won't change again
+    # within the same mtime, so it is always listed again
+    manifest.revalidate()
+    assert listed == [library / "Flight" / "Bravo"]
+
+    settle(library / "Flight" / "Bravo")
+    listed.clear()
+    manifest.revalidate()
+    assert listed == [library / "Flight" / "Bravo"]
+
+    listed.clear()
+    manifest.revalidate()
+    assert listed == []
+
+
+def test_removed_folders_are_forgotten(library):
+    makeTransect(library / "Flight" / "Alfa", 2)
+    makeTransect(library / "Flight" / "Bravo", 3)
+
+    manifest = makeManifest(library)
+    manifest.revalidate()
+    for fp in (library / "Flight" / "Bravo").iterdir():
+        fp.unlink()
+    (library / "Flight" / "Bravo").rmdir()
+
+    manifest.revalidate(library / "Flight")
+    assert manifest.listing(library / "Flight") == (["Alfa"], [])
+    assert manifest.listing(library / "Flight" / "Bravo") == ([], [])
+    assert manifest.summary(library) == (2, 1, 0)
+
+
+def test_manifest_is_saved(library):
+    makeTransect(library / "Flight" / "Alfa", 2, annotated=True)
+    makeManifest(library).revalidate()
+
+    manifest = makeManifest(library)
+    assert manifest.listing(library / "Flight") == (["Alfa"], [])
+    assert manifest.summary(library) == (2, 1, 1)
+
+
+def test_saves_from_several_threads(library):
+    makeTransect(library / "Flight" / "Alfa", 2)
+    manifest = makeManifest(library)
+    manifest.revalidate()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(manifest.save) for _ in range(50)]:
+            future.result()
+
+    metaFolder = config.libraryManifestFile().parent
+    assert [p.name for p in metaFolder.glob("*manifest*")] == ["manifest.json"]
+    assert makeManifest(library).listing(library / "Flight") == (["Alfa"], [])
+
+
+def test_failed_save_leaves_no_temporary_file(library, monkeypatch):
+    makeTransect(library / "Flight" / "Alfa", 2)
+    manifest = makeManifest(library)
+
+    def replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(manifestModule.os, "replace", replace)
+    with pytest.raises(OSError):
+        manifest.revalidate()
+
+    metaFolder = config.libraryManifestFile().parent
+    assert list(metaFolder.glob("*manifest*")) == []
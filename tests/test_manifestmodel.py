@@ -0,0 +1,120 @@
+import time
+
+from PySide2 import QtCore
+
+from base import config
+from transectdata import LibraryManifest
+from ui.library.manifestmodel import ManifestFileSystemModel
+
+
+def waitFor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def names(model, parent=QtCore.QModelIndex()):
+    model.fetchMore(parent)
+    return [model.index(row, 0, parent).data() for row in range(model.rowCount(parent))]
+
+
+def makeTransect(folder, numImages, annotated=False):
+    folder.mkdir(parents=True)
+    for i in range(numImages):
+        (folder / f"{folder.name}_{i:03}.JPG").touch()
+    if annotated:
+        config.markedFolder(transectFolder=folder).mkdir()
+        config.markedDataFile(transectFolder=folder).write_text("{}")
+
+
+def test_root_is_revalidated_in_the_background(library, monkeypatch):
+    makeTransect(library / "Flight" / "Alfa", 2, annotated=True)
+    makeTransect(library / "Flight" / "Bravo", 3)
+
+    manifest = LibraryManifest.instance()
+    revalidated = []
+    revalidate = manifest.revalidate
+
+    def slowRevalidate(folder=None):
+        time.sleep(0.2)
+        revalidate(folder)
+        revalidated.append(folder)
+
+    monkeypatch.setattr(manifest, "revalidate", slowRevalidate)
+
+    model = ManifestFileSystemModel()
+    model.setRootPath(str(library))
+
+    # Nothing is listed until the manifest has been revalidated
+    assert revalidated == []
+    assert names(model) == []
+
+    assert waitFor(lambda: names(model) == ["Flight"])
+    assert revalidated == [library]
+
+    flight = model.index(str(library / "Flight"))
+    assert names(model, flight) == ["Alfa", "Bravo"]
+    assert model.columnCount() == 1
+    assert flight.data(QtCore.Qt.ToolTipRole) == "5 images\n1/2 transects annotated"
+    assert model.index(str(library / "Flight" / "Bravo")).data(
+        QtCore.Qt.ToolTipRole
+    ) == ("3 images\n0/1 transects annotated")
+
+
+def test_refresh_updates_rows_when_done(library):
+    makeTransect(library / "Flight" / "Alfa", 1)
+
+    model = ManifestFileSystemModel()
+    model.setRootPath(str(library))
+    assert waitFor(lambda: names(model) == ["Flight"])
+    flight = model.index(str(library / "Flight"))
+    assert names(model, flight) == ["Alfa"]
+
+    makeTransect(library / "Flight" / "Charlie", 1)
+    (library / "Other").mkdir()
+    model.refresh(str(library / "Flight"))
+    assert waitFor(lambda: names(model, flight) == ["Alfa", "Charlie"])
+
+    # Only the folder that was refreshed is revalidated
+    assert names(model) == ["Flight"]
+    model.refresh()
+    assert waitFor(lambda: names(model) == ["Flight", "Other"])
+
+
+def test_refresh_of_an_old_root_is_ignored(library, tmp_path):
+    makeTransect(library / "Flight" / "Alfa", 1)
+
+    model = ManifestFileSystemModel()
+    model.setRootPath(str(library))
+    model.setRootPath(str(library / "Flight"))
+    model.waitForRefreshes()
+    assert waitFor(lambda: names(model) == ["Alfa"])
+    QtCore.QCoreApplication.processEvents()
+    assert names(model) == ["Alfa"]
+
+
+def test_rows_follow_inserted_and_removed_folders(library):
+    for name in ["Alfa", "Bravo", "Delta", "Echo"]:
+        makeTransect(library / "Flight" / name, 1)
+
+    model = ManifestFileSystemModel()
+    model.setRootPath(str(library))
+    assert waitFor(lambda: names(model) == ["Flight"])
+    flight = model.index(str(library / "Flight"))
+    assert names(model, flight) == ["Alfa", "Bravo", "Delta", "Echo"]
+
+    for name in ["Alfa", "Bravo"]:
+        for fp in (library / "Flight" / name).iterdir():
+            fp.unlink()
+        (library / "Flight" / name).rmdir()
+    makeTransect(library / "Flight" / "Charlie", 1)
+    model.refresh()
+    assert waitFor(lambda: names(model, flight) == ["Charlie", "Delta", "Echo"])
+
+    for row, name in enumerate(["Charlie", "Delta", "Echo"]):
+        index = model.index(str(library / "Flight" / name))
+        assert index.row() == row
+        assert index.parent() == flight
+        assert names(model, index) == [f"{name}_000.JPG"]
+        assert model.index(0, 0, index).parent() == index
@@ -0,0 +1,94 @@
+import pytest
+from PySide2 import QtCore, QtGui
+
+from base import config
+from countdata import CountData
+from drawingdata import DrawingData, DrawingDataList
+from drawingdata.drawingdata import internPen
+from tools import exportMarkedImages, saving
+from tools.saving import saveImageAtomic, saveManyImages
+from transectdata import TransectData
+
+
+class FakeImage:
+    """ Writes `data` when saved, or fails after writing part of it """
+
+    def __init__(self, data: bytes, fail=False):
+        self.data = data
+        self.fail = fail
+
+    def save(self, path, fmt, quality):
+        with open(path, "wb") as f:
+            f.write(self.data[: len(self.data) // 2] if self.fail else self.data)
+        return not self.fail
+
+
+def test_only_the_newest_version_is_written(tmp_path):
+    target = tmp_path / "Alfa_000.JPG"
+    old = saving._queueVersion(str(target))
+    new = saving._queueVersion(str(target))
+
+    assert saveImageAtomic(FakeImage(b"new"), target, version=new)
+    assert not saveImageAtomic(FakeImage(b"old"), target, version=old)
+
+    assert target.read_bytes() == b"new"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_targets_are_forgotten_once_written(tmp_path):
+    targets = [tmp_path / f"Alfa_{i:03}.JPG" for i in range(3)]
+    saveManyImages([(FakeImage(b"data"), [str(t)]) for t in targets], maxWorkers=2)
+
+    assert all(t.read_bytes() == b"data" for t in targets)
+    assert not any(str(t) in saving._targetVersions for t in targets)
+
+
+def test_a_stale_version_is_not_written_after_the_target_is_forgotten(tmp_path):
+    target = tmp_path / "Alfa_000.JPG"
+    old = saving._queueVersion(str(target))
+    new = saving._queueVersion(str(target))
+    assert saveImageAtomic(FakeImage(b"new"), target, version=new)
+
+    # The target is queued again after the newer version was written
+    newest = saving._queueVersion(str(target))
+    assert not saveImageAtomic(FakeImage(b"old"), target, version=old)
+    assert saveImageAtomic(FakeImage(b"newest"), target, version=newest)
+    assert target.read_bytes() == b"newest"
+
+
+def test_failed_save_leaves_no_temporary_file(tmp_path):
+    target = tmp_path / "Alfa_000.JPG"
+    target.write_bytes(b"before")
+    version = saving._queueVersion(str(target))
+
+    with pytest.raises(IOError):
+        saveImageAtomic(FakeImage(b"after", fail=True), target, version=version)
+
+    assert list(tmp_path.iterdir()) == [target]
+    assert target.read_bytes() == b"before"
+    assert str(target) not in saving._targetVersions
+
+
+def test_export_renders_images_with_drawings(library):
+    transect = library / "Flight" / "Alfa"
+    markedFolder = config.markedFolder(transectFolder=transect)
+    markedFolder.mkdir(parents=True)
+    for name in ["Alfa_000.JPG", "Alfa_001.JPG"]:
+        image = QtGui.QImage(40, 20, QtGui.QImage.Format_RGB32)
+        image.fill(QtGui.QColor("white"))
+        assert image.save(str(transect / name))
+
+    # A marked image left over from drawings that were removed
+    (markedFolder / "Alfa_001.JPG").write_bytes(b"stale")
+
+    rect = DrawingData(
+        "Rect", QtCore.QRectF(1, 1, 4, 4), internPen("#ff0000", 1), CountData("Zebra"),
+    )
+    data = TransectData({}, config.markedDataFile(transect))
+    data.addDrawings("Alfa_000.JPG", DrawingDataList([rect]))
+    data.addDrawings("Alfa_001.JPG", DrawingDataList([]))
+    data.dump(config.markedDataFile(transect))
+
+    assert exportMarkedImages([transect]) == 1
+    assert sorted(p.name for p in markedFolder.glob("*.JPG")) == ["Alfa_000.JPG"]
+    assert not QtGui.QImage(str(markedFolder / "Alfa_000.JPG")).isNull()
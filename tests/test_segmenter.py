@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from ui.flightimport.flightimportwizard.transecttable import (
+    StreamingSegmenter,
+    TransectSegmenter,
+)
+
+start = datetime(2021, 3, 4, 5, 6, 7)
+
+
+def imageTimes(*seconds):
+    """ (path, capture time) of images taken `seconds` after `start` """
+    return [
+        (Path(f"DSC_{i:04}.JPG"), start + timedelta(seconds=s))
+        for i, s in enumerate(seconds)
+    ]
+
+
+def names(transects):
+    return [[fp.name for fp in t.files] for t in transects]
+
+
+def test_images_are_ordered_by_time_then_path():
+    times = imageTimes(0, 2, 1, 1)
+    segmenter = TransectSegmenter(reversed(times))
+
+    assert [fp.name for fp in segmenter.files] == [
+        "DSC_0000.JPG",
+        "DSC_0002.JPG",
+        "DSC_0003.JPG",
+        "DSC_0001.JPG",
+    ]
+    assert segmenter.gaps == [1, 0, 1]
+    assert len(segmenter) == 4
+
+
+def test_transects_split_at_long_gaps():
+    segmenter = TransectSegmenter(imageTimes(0, 1, 2, 10, 11, 30))
+
+    assert names(segmenter.segment(maxDelay=5, minCount=1)) == [
+        ["DSC_0000.JPG", "DSC_0001.JPG", "DSC_0002.JPG"],
+        ["DSC_0003.JPG", "DSC_0004.JPG"],
+        ["DSC_0005.JPG"],
+    ]
+
+    # A gap of exactly `maxDelay` doesn't split a transect
+    assert len(segmenter.segment(maxDelay=8, minCount=1)) == 2
+    assert len(segmenter.segment(maxDelay=19, minCount=1)) == 1
+
+
+def test_short_transects_are_dropped():
+    segmenter = TransectSegmenter(imageTimes(0, 1, 2, 10, 11, 30))
+
+    assert names(segmenter.segment(maxDelay=5, minCount=2)) == [
+        ["DSC_0000.JPG", "DSC_0001.JPG", "DSC_0002.JPG"],
+        ["DSC_0003.JPG", "DSC_0004.JPG"],
+    ]
+    assert segmenter.segment(maxDelay=5, minCount=4) == []
+
+
+def test_no_images():
+    assert TransectSegmenter([]).segment(maxDelay=5, minCount=1) == []
+
+
+def stream(times, maxDelay, minCount):
+    """ The transects closed while streaming `times`, and after closing """
+    closed = []
+    segmenter = StreamingSegmenter(maxDelay, minCount, closed.append)
+    for fp, dt in times:
+        segmenter.add(fp, dt)
+    beforeClose = names(closed)
+    segmenter.close()
+    return beforeClose, names(closed)
+
+
+def test_streamed_transects_close_at_long_gaps():
+    beforeClose, transects = stream(
+        imageTimes(0, 1, 2, 10, 11, 30), maxDelay=5, minCount=2
+    )
+
+    # The last transect is only known to be complete once closed
+    assert beforeClose == [
+        ["DSC_0000.JPG", "DSC_0001.JPG", "DSC_0002.JPG"],
+        ["DSC_0003.JPG", "DSC_0004.JPG"],
+    ]
+    assert transects == beforeClose
+
+    _, transects = stream(imageTimes(0, 1, 2, 10, 11, 30), maxDelay=5, minCount=1)
+    assert transects == beforeClose + [["DSC_0005.JPG"]]
+
+
+def test_streamed_transects_match_segmenter_when_in_order():
+    times = imageTimes(0, 3, 4, 20, 21, 22, 23, 40, 45, 46)
+    _, transects = stream(times, maxDelay=4, minCount=2)
+    assert transects == names(TransectSegmenter(times).segment(4, 2))
+
+
+def test_image_out_of_order_starts_a_transect():
+    times = imageTimes(0, 1, 2, 3)
+    times[2], times[3] = times[3], times[2]
+
+    _, transects = stream(times, maxDelay=5, minCount=1)
+    assert transects == [
+        ["DSC_0000.JPG", "DSC_0001.JPG", "DSC_0003.JPG"],
+        ["DSC_0002.JPG"],
+    ]
@@ -0,0 +1,48 @@
+from PySide2 import QtCore, QtGui
+
+from base import config
+from countdata import CountData
+from drawingdata import DrawingData, DrawingDataList
+from drawingdata.drawingdata import internPen
+from transectdata import TransectData
+from ui.gridviewer.snapshot import TransectSnapshot
+
+
+def drawings(*counts):
+    pen = internPen("#ff0000", 1)
+    return DrawingDataList(
+        [
+            DrawingData("Rect", QtCore.QRectF(i, i, 4, 4), pen, countData)
+            for i, countData in enumerate(counts)
+        ]
+    )
+
+
+def test_unreadable_original_still_saves_the_drawings(tmp_path):
+    transect = tmp_path / "Alfa"
+    transect.mkdir()
+    readable = transect / "Alfa_000.JPG"
+    image = QtGui.QImage(40, 20, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor("white"))
+    assert image.save(str(readable))
+    unreadable = transect / "Alfa_001.JPG"
+    unreadable.write_bytes(b"not an image")
+
+    # A marked image rendered from older drawings
+    markedFolder = config.markedFolder(transectFolder=transect)
+    markedFolder.mkdir()
+    (markedFolder / unreadable.name).write_bytes(b"stale")
+
+    snapshot = TransectSnapshot(
+        transect,
+        [
+            (unreadable, drawings(CountData("Kudu"))),
+            (readable, drawings(CountData("Zebra"))),
+        ],
+        renderMarkedImages=True,
+    )
+    snapshot.save()
+
+    saveData = TransectData.load(config.markedDataFile(transectFolder=transect))
+    assert saveData.speciesTotals() == {"Kudu": 1, "Zebra": 1}
+    assert [p.name for p in markedFolder.glob("*.JPG")] == [readable.name]
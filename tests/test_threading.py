@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+from PySide2 import QtCore
+
+from base import CancellationToken, Cancelled, QWorker
+
+
+def waitFor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def test_cancellation_token():
+    cancellation = CancellationToken()
+    assert not cancellation.cancelled
+    cancellation.raiseIfCancelled()
+
+    cancellation.cancel()
+    assert cancellation.cancelled
+    with pytest.raises(Cancelled):
+        cancellation.raiseIfCancelled()
+
+
+def runWorker(worker):
+    """ Starts `worker`, recording the signals it emits """
+    emitted = []
+    worker.signals.result.connect(lambda result: emitted.append(("result", result)))
+    worker.signals.success.connect(lambda: emitted.append("success"))
+    worker.signals.cancelled.connect(lambda: emitted.append("cancelled"))
+    worker.signals.error.connect(lambda error: emitted.append("error"))
+    worker.signals.finished.connect(lambda: emitted.append("finished"))
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return emitted
+
+
+def test_worker_emits_its_result():
+    worker = QWorker(lambda a, b: a + b, [1, 2])
+    emitted = runWorker(worker)
+
+    assert waitFor(lambda: "finished" in emitted)
+    assert emitted == [("result", 3), "success", "finished"]
+
+
+def test_cancelled_worker_emits_cancelled():
+    started = threading.Event()
+
+    def work(cancellation):
+        started.set()
+        while True:
+            cancellation.raiseIfCancelled()
+            time.sleep(0.01)
+
+    worker = QWorker(work, [])
+    worker.includeCancellation()
+    emitted = runWorker(worker)
+
+    assert started.wait(5)
+    worker.cancel()
+    assert waitFor(lambda: "finished" in emitted)
+    assert emitted == ["cancelled", "finished"]
+
+
+def test_worker_without_cancellation_ignores_cancel():
+    worker = QWorker(lambda: "done", [])
+    worker.cancel()
+    emitted = runWorker(worker)
+
+    assert waitFor(lambda: "finished" in emitted)
+    assert emitted == [("result", "done"), "success", "finished"]
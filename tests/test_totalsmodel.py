@@ -0,0 +1,85 @@
+import csv
+import time
+from types import SimpleNamespace
+
+from PySide2 import QtCore
+
+from base import config
+from countdata import CountData
+from drawingdata import DrawingData, DrawingDataList
+from drawingdata.drawingdata import internPen
+from transectdata import TransectData
+from ui.counttotals import totalsmodel
+from ui.counttotals.totalsmodel import TotalsModel
+
+
+def waitFor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def drawings(*counts):
+    pen = internPen("#ff0000", 1)
+    return DrawingDataList(
+        [
+            DrawingData("Rect", QtCore.QRectF(0, 0, 4, 4), pen, countData)
+            for countData in counts
+        ]
+    )
+
+
+def makeSaveFile(library, flight, transect, imageName, counts):
+    folder = library / flight / transect
+    config.markedFolder(transectFolder=folder).mkdir(parents=True)
+    fp = config.markedDataFile(transectFolder=folder)
+    data = TransectData({}, fp)
+    data.addDrawings(imageName, drawings(*counts))
+    data.dump(fp)
+    return data
+
+
+def test_export_includes_unsaved_counts(library, tmp_path, monkeypatch):
+    makeSaveFile(library, "Flight", "Alfa", "Alfa_000.JPG", [CountData("Zebra", 3)])
+    saved = makeSaveFile(
+        library, "Flight", "Bravo", "Bravo_000.JPG", [CountData("Kudu", 1)]
+    )
+
+    model = TotalsModel()
+    loaded = []
+    model.loadFinished.connect(lambda: loaded.append(True))
+    model.readDirectory(library)
+    assert waitFor(lambda: loaded)
+
+    # Counts made in the grid are shown (and exported) before they are saved
+    unsaved = saved.copy()
+    unsaved.addDrawings("Bravo_001.JPG", drawings(CountData("Impala", 4)))
+    model.updateTransectData(unsaved)
+
+    exportFile = tmp_path / "counts.csv"
+
+    class FileDialog:
+        @staticmethod
+        def getSaveFileName(*args, **kwargs):
+            return str(exportFile), ""
+
+    monkeypatch.setattr(
+        totalsmodel, "QtWidgets", SimpleNamespace(QFileDialog=FileDialog)
+    )
+    exported = []
+    monkeypatch.setattr(
+        TotalsModel, "_exportSucceeded", lambda self, fp, n: exported.append(n)
+    )
+
+    model.export()
+    assert waitFor(lambda: exported)
+    assert exported == [3]
+
+    with open(exportFile, newline="") as f:
+        rows = list(csv.reader(f))
+    assert [row[4:8] for row in rows[1:]] == [
+        ["Alfa", "Alfa_000.JPG", "Zebra", "3"],
+        ["Bravo", "Bravo_000.JPG", "Kudu", "1"],
+        ["Bravo", "Bravo_001.JPG", "Impala", "4"],
+    ]
@@ -0,0 +1,163 @@
+import pytest
+
+from base import CancellationToken, Cancelled, config
+from tools import FingerprintIndex, fileFingerprints
+from ui.flightimport.flightimportwizard.transecttable import Transect
+from ui.flightimport.flightimportwizard.transecttable.transectmodel import (
+    copyTransectFiles,
+    planCopies,
+    readMigrationLog,
+    recordCopies,
+)
+
+
+def makeImages(folder, names, content=None):
+    folder.mkdir(parents=True, exist_ok=True)
+    files = []
+    for name in names:
+        fp = folder / name
+        fp.write_bytes((content or name).encode() * 100)
+        files.append(fp)
+    return files
+
+
+def migrationLog(flight, transectName):
+    return readMigrationLog(config.transectMigrationLog(flight / transectName))
+
+
+class CancelAfterFirstCopy:
+    """ A `progress` signal that cancels once the first file is copied """
+
+    def __init__(self, cancellation):
+        self.cancellation = cancellation
+
+    def emit(self, value):
+        self.cancellation.cancel()
+
+
+def test_plan_skips_images_already_imported_or_repeated(tmp_path):
+    card = makeImages(tmp_path / "card", ["A.JPG", "B.JPG", "C.JPG"])
+    repeat = makeImages(tmp_path / "card" / "copy", ["B.JPG"])[0]
+
+    flight = tmp_path / "flight"
+    (flight / "Alfa").mkdir(parents=True)
+    imported = flight / "Alfa" / "Alfa_000.JPG"
+    imported.write_bytes(card[0].read_bytes())
+
+    index = FingerprintIndex(flight)
+    index.refresh()
+    files = card + [repeat]
+    plan = planCopies([Transect("Alfa", files)], flight, index, fileFingerprints(files))
+
+    assert plan.skipped == [card[0], repeat]
+    assert plan.alreadyImported == [imported]
+
+    # Images keep their place in the transect, unless it is taken
+    assert [(fp, dst.name) for _, fp, dst in plan.copies] == [
+        (card[1], "Alfa_001.JPG"),
+        (card[2], "Alfa_002.JPG"),
+    ]
+
+
+def test_plan_adds_new_images_after_the_last_taken_name(tmp_path):
+    card = makeImages(tmp_path / "card", ["A.JPG", "B.JPG"])
+    flight = tmp_path / "flight"
+    makeImages(flight / "Alfa", ["Alfa_000.JPG", "Alfa_001.JPG"], content="old")
+
+    index = FingerprintIndex(flight)
+    plan = planCopies([Transect("Alfa", card)], flight, index, fileFingerprints(card))
+    assert [dst.name for _, _, dst in plan.copies] == ["Alfa_002.JPG", "Alfa_003.JPG"]
+
+
+def test_cancelled_import_resumes_from_the_journal(tmp_path):
+    card = makeImages(tmp_path / "card", ["A.JPG", "B.JPG", "C.JPG"])
+    flight = tmp_path / "flight"
+    transects = [Transect("Alfa", card)]
+
+    cancellation = CancellationToken()
+    with pytest.raises(Cancelled):
+        copyTransectFiles(
+            transects,
+            flight,
+            maxWorkers=1,
+            progress=CancelAfterFirstCopy(cancellation),
+            cancellation=cancellation,
+        )
+
+    # The copy that completed is kept and logged, nothing else is left behind
+    assert sorted(p.name for p in (flight / "Alfa").iterdir()) == [
+        ".marked",
+        "Alfa_000.JPG",
+    ]
+    assert migrationLog(flight, "Alfa") == {"Alfa_000.JPG": "A.JPG"}
+
+    numCopied, numSkipped, _ = copyTransectFiles(transects, flight, maxWorkers=1)
+    assert (numCopied, numSkipped) == (2, 1)
+    assert migrationLog(flight, "Alfa") == {
+        "Alfa_000.JPG": "A.JPG",
+        "Alfa_001.JPG": "B.JPG",
+        "Alfa_002.JPG": "C.JPG",
+    }
+    for i, fp in enumerate(card):
+        assert (flight / "Alfa" / f"Alfa_00{i}.JPG").read_bytes() == fp.read_bytes()
+
+
+def test_journal_is_rewritten_in_order(tmp_path):
+    tFolder = tmp_path / "flight" / "Alfa"
+    config.markedFolder(tFolder).mkdir(parents=True)
+    log = config.transectMigrationLog(tFolder)
+
+    # Copies are journaled in the order they finish, and an interrupted
+    # write can leave a torn last line
+    log.write_text(
+        "A.JPG\t-->\tAlfa_000.JPG\n"
+        "C.JPG\t-->\tAlfa_002.JPG\n"
+        "B.JPG\t-->\tAlfa_001.JPG\n"
+        "D.JPG\t--"
+    )
+    logs = {tFolder: readMigrationLog(log)}
+    assert logs[tFolder] == {
+        "Alfa_000.JPG": "A.JPG",
+        "Alfa_002.JPG": "C.JPG",
+        "Alfa_001.JPG": "B.JPG",
+    }
+
+    transect = Transect("Alfa")
+    recordCopies(
+        [(transect, tmp_path / "card" / "D.JPG", tFolder / "Alfa_003.JPG")],
+        logs,
+        tmp_path / "flight",
+    )
+    assert log.read_text() == (
+        "A.JPG\t-->\tAlfa_000.JPG\n"
+        "B.JPG\t-->\tAlfa_001.JPG\n"
+        "C.JPG\t-->\tAlfa_002.JPG\n"
+        "D.JPG\t-->\tAlfa_003.JPG\n"
+    )
+
+
+def test_fingerprint_matches_are_confirmed_by_hash(tmp_path):
+    # Same size, start and end (so the same fingerprint), different middle
+    start, end = b"s" * 64 * 1024, b"e" * 64 * 1024
+    card = tmp_path / "card"
+    card.mkdir()
+    a, b, c = card / "A.JPG", card / "B.JPG", card / "C.JPG"
+    a.write_bytes(start + b"1" * 1000 + end)
+    b.write_bytes(start + b"2" * 1000 + end)
+    c.write_bytes(start + b"2" * 1000 + end)
+
+    flight = tmp_path / "flight"
+    (flight / "Alfa").mkdir(parents=True)
+    imported = flight / "Alfa" / "Alfa_000.JPG"
+    imported.write_bytes(a.read_bytes())
+
+    index = FingerprintIndex(flight)
+    index.refresh()
+    fingerprints = fileFingerprints([a, b, c])
+    assert len(set(fingerprints.values())) == 1
+
+    # Only A is in the flight, and only C repeats B
+    plan = planCopies([Transect("Alfa", [a, b, c])], flight, index, fingerprints)
+    assert plan.skipped == [a, c]
+    assert plan.alreadyImported == [imported]
+    assert [fp for _, fp, _ in plan.copies] == [b]
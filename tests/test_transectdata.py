@@ -0,0 +1,152 @@
+import json
+import os
+
+from PySide2 import QtCore
+
+from countdata import CountData
+from drawingdata import DrawingData, DrawingDataList
+from drawingdata.drawingdata import internPen
+from transectdata import TransectData
+from transectdata.transectdata import contentHash
+
+
+def drawings(*counts):
+    pen = internPen("#ff0000", 1)
+    return DrawingDataList(
+        [
+            DrawingData("Rect", QtCore.QRectF(i, i, 4, 4), pen, countData)
+            for i, countData in enumerate(counts)
+        ]
+    )
+
+
+def test_content_hash_is_stable():
+    assert contentHash({"a": 1, "b": [1, 2]}) == contentHash({"b": [1, 2], "a": 1})
+    assert contentHash({"a": 1}) != contentHash({"a": 2})
+    assert contentHash("text") == contentHash("text")
+
+
+def test_drawings_are_compared_by_hash(tmp_path):
+    data = TransectData({}, tmp_path / "data.transect")
+    assert data.drawingsHash("Alfa_000.JPG") is None
+    assert not data.imageHasDrawings("Alfa_000.JPG", drawings(CountData("Zebra")))
+
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Zebra")))
+    assert data.imageHasDrawings("Alfa_000.JPG", drawings(CountData("Zebra")))
+    assert not data.imageHasDrawings("Alfa_000.JPG", drawings(CountData("Kudu")))
+
+    data.removeDrawings("Alfa_000.JPG")
+    assert data.drawingsHash("Alfa_000.JPG") is None
+
+
+def test_loaded_drawings_match_the_drawings_they_were_saved_from(tmp_path):
+    fp = tmp_path / "data.transect"
+    data = TransectData({}, fp)
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Zebra", 2)))
+    data.dump(fp)
+
+    loaded = TransectData.load(fp)
+    assert loaded.drawingsHash("Alfa_000.JPG") == data.drawingsHash("Alfa_000.JPG")
+    assert loaded.imageHasDrawings("Alfa_000.JPG", drawings(CountData("Zebra", 2)))
+
+
+def test_unchanged_data_is_not_written_again(tmp_path):
+    fp = tmp_path / "data.transect"
+    data = TransectData({}, fp)
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Zebra")))
+    assert data.dump(fp)
+
+    # Make any rewrite visible in the mtime
+    os.utime(fp, (0, 0))
+    loaded = TransectData.load(fp)
+    assert not loaded.dump(fp)
+    assert os.stat(fp).st_mtime == 0
+
+    loaded.addDrawings("Alfa_001.JPG", drawings(CountData("Kudu")))
+    assert loaded.dump(fp)
+    assert os.stat(fp).st_mtime != 0
+    assert list(tmp_path.iterdir()) == [fp]
+
+
+def test_counters_follow_added_and_removed_drawings(tmp_path):
+    data = TransectData({}, tmp_path / "data.transect")
+    data.addDrawings(
+        "Alfa_000.JPG",
+        drawings(CountData("Zebra", 3), CountData("Kudu", 2, isDuplicate=True)),
+    )
+    data.addDrawings("Alfa_001.JPG", drawings(CountData("Zebra", 1)))
+    data.addImage("Alfa_002.JPG")
+
+    assert data.speciesTotals() == {"Zebra": 4, "Kudu": 0}
+    assert data.numUniqueAnimals() == 4
+    assert sorted(data.uniqueSpecies()) == ["Kudu", "Zebra"]
+    assert data.numImages() == 2
+    assert data.uniqueImages() == ["Alfa_000.JPG", "Alfa_001.JPG"]
+
+    # Replacing drawings replaces their counts
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Impala", 5)))
+    assert data.speciesTotals() == {"Zebra": 1, "Impala": 5}
+    assert data.numSpecies() == 2
+
+    data.removeDrawings("Alfa_001.JPG")
+    assert data.speciesTotals() == {"Impala": 5}
+    assert data.numImages() == 1
+    assert list(data.imageCounts()) == [
+        ("Alfa_000.JPG", c) for c in data.countsOfImage("Alfa_000.JPG")
+    ]
+
+
+def test_counters_are_rebuilt_on_load(tmp_path):
+    fp = tmp_path / "data.transect"
+    data = TransectData({}, fp)
+    data.addDrawings("Bravo_000.JPG", drawings(CountData("Zebra", 2)))
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Eland", 1), CountData()))
+    data.dump(fp)
+
+    loaded = TransectData.load(fp)
+    assert loaded.speciesTotals() == {"Zebra": 2, "Eland": 1}
+    assert loaded.numImages() == 2
+    assert [c.species for _, c in loaded.imageCounts()] == ["Zebra", "Eland"]
+
+
+def test_sorted_and_copied_data_keep_their_counters(tmp_path):
+    data = TransectData({}, tmp_path / "data.transect")
+    data.addDrawings("Bravo_000.JPG", drawings(CountData("Zebra", 2)))
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Kudu", 1)))
+
+    ordered = data.sorted()
+    assert [name for name, _ in ordered.imageCounts()] == [
+        "Alfa_000.JPG",
+        "Bravo_000.JPG",
+    ]
+    assert ordered.speciesTotals() == data.speciesTotals()
+
+    # Changing a copy doesn't change the original
+    copy = data.copy()
+    copy.removeDrawings("Bravo_000.JPG")
+    assert copy.speciesTotals() == {"Kudu": 1}
+    assert data.speciesTotals() == {"Zebra": 2, "Kudu": 1}
+    assert data.numImages() == 2
+
+
+def reparsed(data):
+    """ `data` with its index built again from the data it holds """
+    return TransectData(json.loads(data.dumps()), data.fp)
+
+
+def test_sorted_data_is_independent_of_the_original(tmp_path):
+    data = TransectData({}, tmp_path / "data.transect")
+    data.addDrawings("Bravo_000.JPG", drawings(CountData("Zebra", 2)))
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Kudu", 1)))
+    ordered = data.sorted()
+
+    ordered.removeDrawings("Bravo_000.JPG")
+    data.addDrawings("Alfa_000.JPG", drawings(CountData("Eland", 3)))
+
+    assert ordered.speciesTotals() == {"Kudu": 1}
+    assert [name for name, _ in ordered.drawings()] == ["Alfa_000.JPG"]
+    assert reparsed(ordered).speciesTotals() == ordered.speciesTotals()
+
+    assert data.speciesTotals() == {"Zebra": 2, "Eland": 3}
+    assert len(list(data.drawings())) == 2
+    assert reparsed(data).speciesTotals() == data.speciesTotals()